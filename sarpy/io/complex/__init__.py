@@ -6,7 +6,48 @@ standard, to the extent feasible.
 
 It also permits converting complex data from any form which can be read to a file or files in
 SICD or SIO format.
+
+The format readers (and their dependencies, like scipy and h5py) are only imported
+upon first use of :func:`open` or :func:`convert`, so importing this package is fast.
 """
 
-from .converter import open_complex as open, conversion_utility as convert
 
+def open(file_name):
+    """
+    Given a file, try to find and return the appropriate reader object.
+    See :func:`sarpy.io.complex.converter.open_complex`.
+
+    Parameters
+    ----------
+    file_name : str
+
+    Returns
+    -------
+    sarpy.io.complex.base.BaseReader
+    """
+
+    from .converter import open_complex
+    return open_complex(file_name)
+
+
+def convert(input_file, output_directory, *args, **kwargs):
+    """
+    Copy SAR complex data to a file of the specified format.
+    See :func:`sarpy.io.complex.converter.conversion_utility`.
+
+    Parameters
+    ----------
+    input_file : str|sarpy.io.complex.base.BaseReader
+    output_directory : str
+    args
+        The optional arguments of :func:`sarpy.io.complex.converter.conversion_utility`.
+    kwargs
+        The optional keyword arguments of :func:`sarpy.io.complex.converter.conversion_utility`.
+
+    Returns
+    -------
+    None
+    """
+
+    from .converter import conversion_utility
+    return conversion_utility(input_file, output_directory, *args, **kwargs)
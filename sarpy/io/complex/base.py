@@ -6,11 +6,21 @@ The base elements for reading and writing complex data files.
 import os
 import re
 import sys
+import time
 import logging
+import threading
+from collections import OrderedDict
 from typing import Union, Tuple
 
+try:
+    import queue
+except ImportError:
+    # noinspection PyUnresolvedReferences
+    import Queue as queue
+
 import numpy
 
+from .codec import PixelCodec
 from .sicd_elements.SICD import SICDType
 from .sicd_elements.ImageCreation import ImageCreationType
 from ...__about__ import __title__, __version__
@@ -27,6 +37,389 @@ __classification__ = "UNCLASSIFIED"
 __author__ = "Thomas McCullough"
 
 
+#############
+# The policy for validating the sicd metadata upon reader construction
+
+_VALIDATION_POLICIES = ('off', 'lazy', 'eager')
+_validation_policy = 'eager'
+
+
+def _check_validation_policy(policy):
+    """
+    Checks and normalizes the validation policy.
+
+    Parameters
+    ----------
+    policy : None|str
+
+    Returns
+    -------
+    str
+    """
+
+    if policy is None:
+        return _validation_policy
+    policy = policy.lower()
+    if policy not in _VALIDATION_POLICIES:
+        raise ValueError('Got unexpected validation policy {}, expected one of {}'.format(policy, _VALIDATION_POLICIES))
+    return policy
+
+
+def set_validation_policy(policy):
+    """
+    Sets the global policy for validating the sicd metadata when a reader is
+    constructed, which applies unless a given reader is constructed with its own
+    policy. The options are:
+
+    * `'off'` - no validation is performed.
+
+    * `'lazy'` - validation is performed upon first access of the sicd metadata
+      through the reader, i.e. `sicd_meta` or `get_sicds_as_tuple()`.
+
+    * `'eager'` - validation is performed upon construction. This is the default.
+
+    Note that the validity of a SICDType is memoized until any field is modified,
+    so validation is cheap for an already validated structure.
+
+    Parameters
+    ----------
+    policy : str
+
+    Returns
+    -------
+    None
+    """
+
+    global _validation_policy
+    _validation_policy = _check_validation_policy(policy)
+
+
+def get_validation_policy():
+    """
+    Gets the global policy for validating the sicd metadata. See :func:`set_validation_policy`.
+
+    Returns
+    -------
+    str
+    """
+
+    return _validation_policy
+
+
+class BlockCache(object):
+    """
+    A thread-safe, size bounded, least recently used cache of data blocks
+    (i.e. `numpy.ndarray` instances) keyed by any hashable.
+    """
+
+    __slots__ = ('_max_bytes', '_blocks', '_current_bytes', '_hits', '_misses', '_lock')
+
+    def __init__(self, max_bytes=2**28):
+        """
+
+        Parameters
+        ----------
+        max_bytes : int
+            The maximum total size in bytes of the blocks held in the cache.
+        """
+
+        max_bytes = int_func(max_bytes)
+        if max_bytes < 0:
+            raise ValueError('max_bytes must be non-negative, got {}'.format(max_bytes))
+        self._max_bytes = max_bytes
+        self._blocks = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        """
+        int: The maximum total size in bytes of the blocks held in the cache.
+        """
+
+        return self._max_bytes
+
+    @property
+    def current_bytes(self):
+        """
+        int: The total size in bytes of the blocks currently held in the cache.
+        """
+
+        return self._current_bytes
+
+    @property
+    def hits(self):
+        """
+        int: The number of block fetches satisfied from the cache.
+        """
+
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        int: The number of block fetches not satisfied from the cache.
+        """
+
+        return self._misses
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __contains__(self, key):
+        return key in self._blocks
+
+    def get(self, key):
+        """
+        Fetch the given block, and mark it as most recently used.
+
+        Parameters
+        ----------
+        key
+            The block key.
+
+        Returns
+        -------
+        None|numpy.ndarray
+            The block, or `None` if it is not in the cache.
+        """
+
+        with self._lock:
+            block = self._blocks.pop(key, None)
+            if block is None:
+                self._misses += 1
+                return None
+            self._blocks[key] = block  # re-insertion moves it to the most recent end
+            self._hits += 1
+            return block
+
+    def put(self, key, block):
+        """
+        Add the given block to the cache, evicting least recently used blocks as
+        necessary. A block which is larger than `max_bytes` will not be cached.
+
+        Parameters
+        ----------
+        key
+            The block key.
+        block : numpy.ndarray
+
+        Returns
+        -------
+        None
+        """
+
+        size = int_func(block.nbytes)
+        with self._lock:
+            old = self._blocks.pop(key, None)
+            if old is not None:
+                self._current_bytes -= int_func(old.nbytes)
+            if size > self._max_bytes:
+                return
+            while self._blocks and self._current_bytes + size > self._max_bytes:
+                _, evicted = self._blocks.popitem(last=False)
+                self._current_bytes -= int_func(evicted.nbytes)
+            self._blocks[key] = block
+            self._current_bytes += size
+
+    def invalidate(self):
+        """
+        Remove all blocks from the cache. The hit and miss counters are unchanged.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._blocks.clear()
+            self._current_bytes = 0
+
+    def reset_statistics(self):
+        """
+        Reset the hit and miss counters.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+
+def _get_default_block_size():
+    """
+    Gets the default upper bound for the size of an automatically tuned block,
+    which is 1/32 of the physical memory, but between 16 MB and 1 GB.
+
+    Returns
+    -------
+    int
+    """
+
+    try:
+        physical = os.sysconf('SC_PAGE_SIZE')*os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        physical = 2**31  # unknown, so assume 2 GB
+    return int_func(min(max(physical//32, 2**24), 2**30))
+
+
+class BlockSizeTuner(object):
+    """
+    Chooses the number of storage rows per block, see :meth:`BaseReader.iter_blocks`,
+    from the throughput measured over the first few blocks.
+
+    Each of a geometric sequence of trial block sizes, between `min_block_size`
+    and `max_block_size`, is used for one block. Subsequent blocks use the
+    trial size with the best throughput measured so far, preferring the smallest
+    size within 10% of the best to limit the memory in use. The time of every
+    block counts towards the throughput of its size, so the choice follows any
+    change in the performance of the storage. This is safe for use from multiple
+    threads.
+
+    The time spent reading each block is recorded by :meth:`BaseReader.iter_blocks`,
+    and the consumer of the blocks should record its own processing time
+    (e.g. writing) using :meth:`record`.
+    """
+
+    __slots__ = ('_row_bytes', '_trial_rows', '_issued', '_observations', '_current', '_lock')
+
+    def __init__(self, row_bytes, max_block_size=None, min_block_size=2**20, trials=4):
+        """
+
+        Parameters
+        ----------
+        row_bytes : int
+            The size in bytes of one storage row of a block in memory.
+        max_block_size : None|int
+            The (nominal) maximum block size in bytes, which determines the memory
+            budget. The default is 1/32 of the physical memory, but between 16 MB and 1 GB.
+        min_block_size : int
+            The (nominal) minimum block size in bytes. Default is 2**20 = 1 MB.
+        trials : int
+            The number of trial block sizes.
+        """
+
+        row_bytes = int_func(row_bytes)
+        if row_bytes < 1:
+            raise ValueError('row_bytes must be positive, got {}'.format(row_bytes))
+        trials = int_func(trials)
+        if trials < 1:
+            raise ValueError('trials must be positive, got {}'.format(trials))
+        if max_block_size is None:
+            max_block_size = _get_default_block_size()
+        min_block_size = max(1, int_func(min_block_size))
+        max_block_size = max(min_block_size, int_func(max_block_size))
+
+        sizes = numpy.geomspace(min_block_size, max_block_size, trials) if trials > 1 else [max_block_size, ]
+        self._row_bytes = row_bytes
+        self._trial_rows = tuple(sorted(set(max(1, int_func(size//row_bytes)) for size in sizes)))
+        self._issued = 0
+        self._observations = {}  # rows -> [total rows, total seconds]
+        self._current = None
+        self._lock = threading.Lock()
+
+    @property
+    def row_bytes(self):
+        """
+        int: The size in bytes of one storage row.
+        """
+
+        return self._row_bytes
+
+    @property
+    def trial_rows(self):
+        """
+        Tuple[int, ...]: The trial numbers of rows per block, in increasing order.
+        """
+
+        return self._trial_rows
+
+    @property
+    def rows_per_block(self):
+        """
+        None|int: The chosen number of rows per block, which is `None` while
+        the trials are ongoing.
+        """
+
+        return self._current
+
+    def get_throughput(self):
+        """
+        Gets the measured throughput for each block size.
+
+        Returns
+        -------
+        dict
+            The number of rows per block mapped to the throughput in bytes per second.
+        """
+
+        with self._lock:
+            return dict(
+                (rows, self._row_bytes*total_rows/seconds)
+                for rows, (total_rows, seconds) in self._observations.items() if seconds > 0)
+
+    def record(self, rows, seconds):
+        """
+        Records time spent on a block. Blocks whose size is not one of the trial
+        sizes, i.e. a truncated final block, are ignored.
+
+        Parameters
+        ----------
+        rows : int
+            The number of storage rows in the block.
+        seconds : float
+            The time spent.
+
+        Returns
+        -------
+        None
+        """
+
+        rows = int_func(rows)
+        if rows not in self._trial_rows:
+            return
+        with self._lock:
+            entry = self._observations.setdefault(rows, [0, 0.])
+            entry[0] += rows
+            entry[1] += max(float(seconds), 0.)
+
+    def next_rows(self):
+        """
+        Gets the number of rows for the next block.
+
+        Returns
+        -------
+        int
+        """
+
+        with self._lock:
+            if self._issued < len(self._trial_rows):
+                rows = self._trial_rows[self._issued]
+                self._issued += 1
+                return rows
+            rows = self._choose()
+            if rows != self._current:
+                logging.info(
+                    'Using {} rows ({:.1f} MB) per block, from the measured throughput {}'.format(
+                        rows, rows*self._row_bytes/2.**20, self._observations))
+                self._current = rows
+            return rows
+
+    def _choose(self):
+        throughput = dict(
+            (rows, total_rows/seconds) for rows, (total_rows, seconds) in self._observations.items() if seconds > 0)
+        if len(throughput) == 0:
+            # nothing is measured yet, so use a middling size
+            return self._trial_rows[len(self._trial_rows)//2]
+        best = max(throughput.values())
+        return min(rows for rows, value in throughput.items() if value >= 0.9*best)
+
+
 class BaseChipper(object):
     """
     Base class defining basic functionality for the literal extraction of data
@@ -46,8 +439,19 @@ class BaseChipper(object):
     **Extension Consideration:** It is possible that the basic functionality for
     conversion of raw data to complex data requires something more nuanced than
     the default provided in the `_data_to_complex` method.
+
+    **Caching:** An opt-in least recently used cache of raw data tiles can be
+    enabled using :func:`enable_cache`. The tiles are cached as read from the file
+    (i.e. before any complex conversion), so repeated or overlapping reads are
+    served from memory. Reads with large steps bypass the cache.
+
+    **Axis swap:** When the symmetry dictates swapping the axes, the data is read
+    in file storage order, then decoded and transposed in small square tiles into
+    a contiguous output array, rather than returning a strided view.
     """
-    __slots__ = ('_data_size', '_complex_type', '_symmetry')
+    __slots__ = ('_data_size', '_complex_type', '_symmetry', '_block_cache', '_cache_tile_shape', '_cache_key')
+    _CACHE_MAX_STEP = 4  # reads with larger steps bypass the block cache
+    _TRANSPOSE_TILE = 128  # edge length of the tiles for the swapped axes transpose
 
     def __init__(self, data_size, symmetry=(False, False, False), complex_type=False):
         """
@@ -59,16 +463,18 @@ class BaseChipper(object):
             `data_size` property.
         symmetry : tuple
             Describes any required data transformation. See the `symmetry` property.
-        complex_type : callable|bool
+        complex_type : callable|bool|PixelCodec
             For complex type handling.
+            If a PixelCodec, then its `decode` method transforms the raw data to the
+            complex data, directly into the output array.
             If callable, then this is expected to transform the raw data to the complex data.
             If this evaluates to `True`, then the assumption is that real/imaginary
             components are stored in adjacent bands, which will be combined into a
             single band upon extraction.
         """
 
-        if not (isinstance(complex_type, bool) or callable(complex_type)):
-            raise ValueError('complex-type must be a boolean or a callable')
+        if not (isinstance(complex_type, (bool, PixelCodec)) or callable(complex_type)):
+            raise ValueError('complex-type must be a boolean, a callable, or a PixelCodec')
         self._complex_type = complex_type
 
         if not isinstance(symmetry, tuple):
@@ -90,6 +496,9 @@ class BaseChipper(object):
             self._data_size = (data_size[1], data_size[0])
         else:
             self._data_size = data_size
+        self._block_cache = None
+        self._cache_tile_shape = None
+        self._cache_key = None
 
     @property
     def symmetry(self):
@@ -117,7 +526,88 @@ class BaseChipper(object):
 
         return self._data_size
 
-    def __call__(self, range1, range2):
+    @property
+    def block_cache(self):
+        """
+        None|BlockCache: The raw data tile cache, if caching has been enabled
+        using :func:`enable_cache`. This provides the hit and miss counters.
+        """
+
+        return self._block_cache
+
+    def enable_cache(self, max_bytes=2**28, tile_shape=(512, 512)):
+        """
+        Enable the least recently used cache of raw data tiles. Any previously
+        cached tiles are discarded.
+
+        Parameters
+        ----------
+        max_bytes : int
+            The maximum total size in bytes of the cached tiles. Default is 2**28 = 256MB.
+        tile_shape : Tuple[int, int]
+            The (rows, columns) tile shape, in terms of the data after any symmetry
+            transformation. Each chip read will fetch (and cache) the entirety of
+            every tile which it overlaps.
+
+        Returns
+        -------
+        None
+        """
+
+        tile_shape = (int_func(tile_shape[0]), int_func(tile_shape[1]))
+        if tile_shape[0] < 1 or tile_shape[1] < 1:
+            raise ValueError('All entries of tile_shape {} must be positive.'.format(tile_shape))
+        self._cache_tile_shape = tile_shape
+        self._block_cache = BlockCache(max_bytes=max_bytes)
+        self._cache_key = None
+
+    def _share_cache(self, block_cache, tile_shape, key):
+        """
+        Use the given block cache, which is shared with other chippers. The
+        `key` distinguishes the tiles of this chipper from those of the others.
+
+        Parameters
+        ----------
+        block_cache : BlockCache
+        tile_shape : Tuple[int, int]
+        key : object
+
+        Returns
+        -------
+        None
+        """
+
+        self._block_cache = block_cache
+        self._cache_tile_shape = tile_shape
+        self._cache_key = key
+
+    def disable_cache(self):
+        """
+        Disable the raw data tile cache, and discard any cached tiles.
+
+        Returns
+        -------
+        None
+        """
+
+        self._block_cache = None
+        self._cache_tile_shape = None
+        self._cache_key = None
+
+    def invalidate_cache(self):
+        """
+        Discard any cached tiles. This should be called if the underlying file
+        may have been modified. Caching remains enabled, if it was enabled.
+
+        Returns
+        -------
+        None
+        """
+
+        if self._block_cache is not None:
+            self._block_cache.invalidate()
+
+    def __call__(self, range1, range2, out=None, raw=False):
         """
         Reads and fetches data. Note that :code:`chipper(range1, range2)` is an alias
         for :code:`chipper.read_chip(range1, range2)`.
@@ -126,22 +616,146 @@ class BaseChipper(object):
         ----------
         range1 : None|int|tuple
         range2 : none|int|tuple
+        out : None|numpy.ndarray
+            If provided, the data will be decoded directly into this array, which
+            must be of the output shape (with any single band dimension omitted, or
+            not), and it will be returned. Otherwise, a new array will be allocated.
+            This is not applicable if `raw=True`.
+        raw : bool
+            If `True`, the stored samples are returned without complex conversion.
+            See :func:`_read_undecoded`.
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray|Tuple[numpy.ndarray, dict]
         """
 
-        data = self._read_raw_fun(range1, range2)
-        data = self._data_to_complex(data)
+        if raw:
+            if out is not None:
+                raise ValueError('The out argument is not supported for a raw read.')
+            return self._read_undecoded(range1, range2)
+        if out is not None:
+            return self._read_into(range1, range2, out)
+
+        data = self._read_raw(range1, range2)
+        if self._symmetry[2] and data.size > 0:
+            data = self._transpose_tiled(data)
+        else:
+            data = self._data_to_complex(data)
+            if isinstance(data, numpy.memmap):
+                # no conversion was required, so detach from the memory map
+                data = numpy.array(data)
+            data = self._reorder_data(data)
 
         # make a one band image flat
         if data.ndim == 3 and data.shape[2] == 1:
             data = numpy.reshape(data, data.shape[:-1])
-
-        data = self._reorder_data(data)
         return data
 
+    def _read_raw(self, range1, range2, out=None):
+        """
+        Reads the raw data, using the block cache if it is enabled and the steps
+        are no larger than `_CACHE_MAX_STEP`. Sparsely decimated reads bypass the
+        cache, since fetching whole tiles would defeat skipping the unneeded data.
+        """
+
+        if self._block_cache is not None:
+            arg1, arg2 = self._validate_arguments(range1, range2)
+            if max(abs(arg1[2]), abs(arg2[2])) <= self._CACHE_MAX_STEP:
+                return self._read_raw_cached(range1, range2, out=out)
+        return self._read_raw_fun(range1, range2, out=out)
+
+    def _get_decode_parameters(self):
+        """
+        Gets the parameters describing how the stored samples are decoded to
+        complex data.
+
+        Returns
+        -------
+        dict
+        """
+
+        if isinstance(self._complex_type, PixelCodec):
+            complex_type = 'interleaved' if self._complex_type.interleaved else 'callable'
+        elif callable(self._complex_type):
+            complex_type = 'callable'
+        elif self._complex_type:
+            complex_type = 'interleaved'
+        else:
+            complex_type = None
+        return {'complex_type': complex_type}
+
+    def _read_undecoded(self, range1, range2):
+        """
+        Reads the stored samples, without complex conversion, as a native-endian
+        array of shape `(rows, cols, bands)` in the oriented (i.e. after symmetry
+        transformation) frame.
+
+        Parameters
+        ----------
+        range1 : None|int|tuple
+        range2 : None|int|tuple
+
+        Returns
+        -------
+        (numpy.ndarray, dict)
+            The samples and the decode parameters. The `complex_type` entry is
+            `'interleaved'` when the real and imaginary components are stored in
+            adjacent bands, `'callable'` when a custom conversion (like amplitude
+            and phase) applies, and `None` when no conversion applies. The
+            `stored_dtype` entry is the dtype string of the samples in the file.
+        """
+
+        data = self._read_raw(range1, range2)
+        parameters = self._get_decode_parameters()
+        parameters['stored_dtype'] = data.dtype.str
+        if self._symmetry[2] and data.size > 0:
+            return self._transpose_tiled(data, decode=False), parameters
+        data = numpy.array(data, dtype=data.dtype.newbyteorder('='))
+        if data.ndim == 2:
+            data = data[:, :, numpy.newaxis]
+        return self._reorder_data(data), parameters
+
+    def _read_into(self, range1, range2, out):
+        """
+        Reads the data directly into the provided array.
+
+        Parameters
+        ----------
+        range1 : None|int|tuple
+        range2 : None|int|tuple
+        out : numpy.ndarray
+
+        Returns
+        -------
+        numpy.ndarray
+            `out`
+        """
+
+        if not isinstance(out, numpy.ndarray):
+            raise TypeError('out must be a numpy.ndarray, got type {}'.format(type(out)))
+        arg1, arg2 = self._validate_arguments(range1, range2)
+        shape = (numpy.arange(*arg1).size, numpy.arange(*arg2).size)
+        if out.ndim not in [2, 3] or out.shape[:2] != shape:
+            raise ValueError(
+                'The requested chip has shape {}, and out has incompatible shape {}'.format(shape, out.shape))
+
+        if self._symmetry[2]:
+            # read in storage order, and transpose tile-wise into out
+            data = self._read_raw(range1, range2)
+            if data.size > 0:
+                self._transpose_tiled(data, out=out if out.ndim == 3 else out[:, :, numpy.newaxis])
+            return out
+
+        if not (callable(self._complex_type) or self._complex_type):
+            # no conversion, so the data can be read directly into out
+            self._read_raw(range1, range2, out=out)
+            return out
+
+        data = self._read_raw(range1, range2)
+        self._data_to_complex(data, out=out if out.ndim == 3 else out[:, :, numpy.newaxis])
+        return out
+
     def __getitem__(self, item):
         """
         Reads and returns data using more traditional to python slice functionality.
@@ -177,10 +791,11 @@ class BaseChipper(object):
         else:
             return parse(item), None
 
-    def _reorder_arguments(self, range1, range2):
+    def _validate_arguments(self, range1, range2):
         """
-        Reinterpret the range arguments into actual "physical" arguments of memory,
-        in light of the symmetry attribute.
+        Validate the range arguments, and reinterpret them as explicit
+        `(start, stop, step)` tuples relative to the data *after* any symmetry
+        transformation.
 
         Parameters
         ----------
@@ -194,17 +809,17 @@ class BaseChipper(object):
 
         Returns
         -------
-        None|int|tuple
-            actual range 1 - in light of `range1`, `range2` and symmetry
-        None|int|tuple
-            actual range 2 - in light of `range1`, `range2` and symmetry
+        Tuple[int, int, int]
+            the explicit range for the first axis
+        Tuple[int, int, int]
+            the explicit range for the second axis
         """
 
         def extract(arg, siz):
             start, stop, step = None, None, None
             if isinstance(arg, integer_types):
                 step = arg
-            else:
+            elif arg is not None:
                 # NB: following this pattern to avoid confused pycharm inspection
                 if len(arg) == 1:
                     step = arg[0]
@@ -240,11 +855,6 @@ class BaseChipper(object):
                 stop += siz
             return start, stop, step
 
-        def reverse_arg(arg, siz):
-            start, stop, step = extract(arg, siz)
-            # read backwards
-            return (siz - 1) - start, (siz - 1) - stop, -step
-
         if isinstance(range1, (numpy.ndarray, list)):
             range1 = tuple(range1)
         if isinstance(range2, (numpy.ndarray, list)):
@@ -262,33 +872,175 @@ class BaseChipper(object):
         if isinstance(range2, tuple) and len(range2) > 3:
             raise TypeError('range2 must have no more than 3 entries, received {}.'.format(range2))
 
-        # validate the first range
+        return extract(range1, self._data_size[0]), extract(range2, self._data_size[1])
+
+    def _reorder_arguments(self, range1, range2):
+        """
+        Reinterpret the range arguments into actual "physical" arguments of memory,
+        in light of the symmetry attribute.
+
+        Parameters
+        ----------
+        range1 : None|int|tuple
+            * if `None`, then the range is not limited in first axis
+            * if `int` = step size
+            * if (`int`, `int`) = `end`, `step size`
+            * if (`int`, `int`, `int`) = `start`, `stop`, `step size`
+        range2 : None|int|tuple
+            same as `range1`, except for the second axis.
+
+        Returns
+        -------
+        None|int|tuple
+            actual range 1 - in light of `range1`, `range2` and symmetry
+        None|int|tuple
+            actual range 2 - in light of `range1`, `range2` and symmetry
+        """
+
+        def reverse_arg(arg, siz):
+            start, stop, step = arg
+            # read backwards
+            return (siz - 1) - start, (siz - 1) - stop, -step
+
+        real_arg1, real_arg2 = self._validate_arguments(range1, range2)
         if self._symmetry[0]:
-            real_arg1 = reverse_arg(range1, self._data_size[0])
-        else:
-            real_arg1 = extract(range1, self._data_size[0])
-        # validate the second range
+            real_arg1 = reverse_arg(real_arg1, self._data_size[0])
         if self._symmetry[1]:
-            real_arg2 = reverse_arg(range2, self._data_size[1])
-        else:
-            real_arg2 = extract(range2, self._data_size[1])
+            real_arg2 = reverse_arg(real_arg2, self._data_size[1])
 
         # switch the axes symmetry dictates
         real_arg1, real_arg2 = (real_arg2, real_arg1) if self._symmetry[2] else (real_arg1, real_arg2)
         return real_arg1, real_arg2
 
-    def _data_to_complex(self, data):
-        # type: (numpy.ndarray) -> numpy.ndarray
-        if callable(self._complex_type):
-            return self._complex_type(data)  # is this actually necessary?
+    def _read_raw_cached(self, range1, range2, out=None):
+        """
+        Assembles the raw data for the given ranges from whole tiles, which are
+        fetched from the block cache or read using :func:`_read_raw_fun` (and then
+        cached) as necessary. The result is identical to
+        :code:`self._read_raw_fun(range1, range2)`.
+
+        Parameters
+        ----------
+        range1 : None|int|tuple
+        range2 : None|int|tuple
+        out : None|numpy.ndarray
+            If provided, the raw data is assembled into this array.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+
+        def get_groups(arg, siz, tile_size):
+            # partition the requested indices into contiguous runs within a single tile
+            start, stop, step = arg
+            indices = numpy.arange(start, stop, step)
+            if indices.size == 0:
+                return 0, []
+            tile_ids = indices//tile_size
+            breaks = numpy.nonzero(numpy.diff(tile_ids))[0] + 1
+            bounds = numpy.concatenate(([0, ], breaks, [indices.size, ]))
+            groups = []
+            for begin, end in zip(bounds[:-1], bounds[1:]):
+                tile_id = int_func(tile_ids[begin])
+                tile_start = tile_id*tile_size
+                tile_end = min(tile_start + tile_size, siz)
+                local_start = int_func(indices[begin]) - tile_start
+                local_stop = int_func(indices[end-1]) - tile_start + (1 if step > 0 else -1)
+                if local_stop < 0:
+                    local_stop = None
+                groups.append(
+                    (tile_id, (tile_start, tile_end), slice(int_func(begin), int_func(end)),
+                     slice(local_start, local_stop, step)))
+            return indices.size, groups
+
+        arg1, arg2 = self._validate_arguments(range1, range2)
+        rows, row_groups = get_groups(arg1, self._data_size[0], self._cache_tile_shape[0])
+        cols, col_groups = get_groups(arg2, self._data_size[1], self._cache_tile_shape[1])
+
+        for row_id, row_bounds, row_out, row_local in row_groups:
+            for col_id, col_bounds, col_out, col_local in col_groups:
+                key = (self._cache_key, row_id, col_id)
+                tile = self._block_cache.get(key)
+                if tile is None:
+                    tile = self._read_raw_fun((row_bounds[0], row_bounds[1], 1), (col_bounds[0], col_bounds[1], 1))
+                    if isinstance(tile, numpy.memmap):
+                        tile = numpy.array(tile)
+                    self._block_cache.put(key, tile)
+                if out is None:
+                    shape = (cols, rows) if self._symmetry[2] else (rows, cols)
+                    out = numpy.empty(shape + tile.shape[2:], dtype=tile.dtype)
+                elif out.ndim < tile.ndim:
+                    # a flattened single band
+                    tile = numpy.reshape(tile, tile.shape[:out.ndim])
+                if self._symmetry[2]:
+                    out[col_out, row_out] = tile[col_local, row_local]
+                else:
+                    out[row_out, col_out] = tile[row_local, col_local]
+        if rows == 0 or cols == 0:
+            # the requested chip is empty
+            return self._read_raw_fun(range1, range2, out=out)
+        return out
+
+    def _data_to_complex(self, data, out=None):
+        # type: (numpy.ndarray, Union[None, numpy.ndarray]) -> numpy.ndarray
+        if isinstance(self._complex_type, PixelCodec):
+            return self._complex_type.decode(data, out=out)
+        elif callable(self._complex_type):
+            if out is None:
+                return self._complex_type(data)  # is this actually necessary?
+            out[:] = numpy.reshape(self._complex_type(data), out.shape)
+            return out
         elif self._complex_type:
-            out = numpy.zeros((data.shape[0], data.shape[1], int_func(data.shape[2]/2)), dtype=numpy.complex64)
+            if out is None:
+                out = numpy.empty((data.shape[0], data.shape[1], int_func(data.shape[2]/2)), dtype=numpy.complex64)
             out.real = data[:, :, 0::2]
             out.imag = data[:, :, 1::2]
             return out
-        else:
+        elif out is None:
             # nothing to be done
             return data
+        else:
+            out[:] = numpy.reshape(data, out.shape)
+            return out
+
+    def _transpose_tiled(self, data, out=None, decode=True):
+        """
+        Swaps the first two axes of the data, as read in file storage order, into
+        a contiguous array. The data is decoded and transposed in square tiles of
+        edge length `_TRANSPOSE_TILE`, so that each tile is read and written while
+        it resides in cache.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            The raw data of shape `(rows, cols[, bands])`, in storage order.
+        out : None|numpy.ndarray
+            The array of shape `(cols, rows, bands)` into which the result is written.
+        decode : bool
+            Perform the complex conversion? Otherwise, the stored samples are
+            only converted to native byte order.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+
+        rows, cols = data.shape[:2]
+        tile = self._TRANSPOSE_TILE
+        for row_start in range(0, rows, tile):
+            row_stop = min(row_start + tile, rows)
+            for col_start in range(0, cols, tile):
+                col_stop = min(col_start + tile, cols)
+                block = data[row_start:row_stop, col_start:col_stop]
+                if decode:
+                    block = self._data_to_complex(block)
+                if block.ndim == 2:
+                    block = block[:, :, numpy.newaxis]
+                if out is None:
+                    out = numpy.empty((cols, rows, block.shape[2]), dtype=block.dtype.newbyteorder('='))
+                out[col_start:col_stop, row_start:row_stop] = numpy.swapaxes(block, 0, 1)
+        return out
 
     def _reorder_data(self, data):
         # type: (numpy.ndarray) -> numpy.ndarray
@@ -296,7 +1048,7 @@ class BaseChipper(object):
             data = numpy.swapaxes(data, 1, 0)
         return data
 
-    def _read_raw_fun(self, range1, range2):
+    def _read_raw_fun(self, range1, range2, out=None):
         """
         Reads data as stored in a file, before any complex data and symmetry
         transformations are applied. The one potential exception to the "raw"
@@ -305,6 +1057,11 @@ class BaseChipper(object):
         as stored in Python's memory), regardless of how the data is stored in
         the file.
 
+        If `out` is provided, then the data must be written into it and it must be
+        returned. This will only be provided when no complex data conversion is
+        required, and it is in raw orientation, possibly with any single band
+        dimension omitted.
+
         Parameters
         ----------
         range1 : None|int|tuple
@@ -314,6 +1071,8 @@ class BaseChipper(object):
             * if (`int`, `int`, `int`) = `start`, `stop`, `step size`
         range2 : None|int|tuple
             same as `range1`, except for the second axis.
+        out : None|numpy.ndarray
+            the array into which the data will be read.
 
         Returns
         -------
@@ -388,9 +1147,13 @@ class SubsetChipper(BaseChipper):
         arange2 = _get_range(range2, self.shift2, self._data_size[1])
         return arange1, arange2
 
-    def _read_raw_fun(self, range1, range2):
+    def _read_raw_fun(self, range1, range2, out=None):
         arange1, arange2 = self._reformat_bounds(range1, range2)
-        return self.parent_chipper.__call__(arange1, arange2)
+        return self.parent_chipper.__call__(arange1, arange2, out=out)
+
+    def _read_undecoded(self, range1, range2):
+        arange1, arange2 = self._reformat_bounds(range1, range2)
+        return self.parent_chipper.__call__(arange1, arange2, raw=True)
 
 
 class BaseReader(object):
@@ -398,7 +1161,7 @@ class BaseReader(object):
     Abstract file reader class
     """
 
-    __slots__ = ('_sicd_meta', '_chipper', '_data_size')
+    __slots__ = ('_sicd_meta', '_chipper', '_data_size', '_validation_pending')
 
     def __init__(self, sicd_meta, chipper):
         """
@@ -449,6 +1212,46 @@ class BaseReader(object):
         self._sicd_meta = sicd_meta
         self._chipper = chipper
         self._data_size = data_size
+        self._validation_pending = False
+
+    def _apply_validation_policy(self, validation=None):
+        """
+        Applies the validation policy to the sicd metadata. See :func:`set_validation_policy`.
+
+        Parameters
+        ----------
+        validation : None|str
+            One of `('off', 'lazy', 'eager')`, or `None` to use the global policy.
+
+        Returns
+        -------
+        None
+        """
+
+        policy = _check_validation_policy(validation)
+        self._validation_pending = False
+        if policy == 'eager':
+            self._validate_sicds()
+        elif policy == 'lazy':
+            self._validation_pending = True
+
+    def _validate_sicds(self):
+        """
+        Validates the sicd metadata, noting any issues in the log.
+        Note that this results in potentially noisy logging for troubled sicd files.
+
+        Returns
+        -------
+        bool
+        """
+
+        self._validation_pending = False
+        sicds = self._sicd_meta if isinstance(self._sicd_meta, tuple) else (self._sicd_meta, )
+        valid = True
+        for sicd in sicds:
+            if sicd is not None:
+                valid &= sicd.is_valid(recursive=True)
+        return valid
 
     @property
     def sicd_meta(self):
@@ -456,6 +1259,8 @@ class BaseReader(object):
         SICDType|Tuple[SICDType]: the sicd meta_data or meta_data collection.
         """
 
+        if self._validation_pending:
+            self._validate_sicds()
         return self._sicd_meta
 
     @property
@@ -475,6 +1280,8 @@ class BaseReader(object):
         Tuple[SICDType]
         """
 
+        if self._validation_pending:
+            self._validate_sicds()
         if self._sicd_meta is None:
             return None
         elif isinstance(self._sicd_meta, tuple):
@@ -500,6 +1307,57 @@ class BaseReader(object):
             # noinspection PyRedundantParentheses
             return (self._data_size, )
 
+    def _get_chippers_as_tuple(self):
+        if isinstance(self._chipper, tuple):
+            return self._chipper
+        else:
+            # noinspection PyRedundantParentheses
+            return (self._chipper, )
+
+    def enable_cache(self, max_bytes=2**28, tile_shape=(512, 512)):
+        """
+        Enable the raw data tile cache for every chipper. Each chipper maintains
+        its own cache, so the memory ceiling applies separately to each.
+
+        Parameters
+        ----------
+        max_bytes : int
+            The maximum total size in bytes of the cached tiles, per chipper.
+        tile_shape : Tuple[int, int]
+            The (rows, columns) tile shape.
+
+        Returns
+        -------
+        None
+        """
+
+        for chipper in self._get_chippers_as_tuple():
+            chipper.enable_cache(max_bytes=max_bytes, tile_shape=tile_shape)
+
+    def disable_cache(self):
+        """
+        Disable the raw data tile cache for every chipper.
+
+        Returns
+        -------
+        None
+        """
+
+        for chipper in self._get_chippers_as_tuple():
+            chipper.disable_cache()
+
+    def invalidate_cache(self):
+        """
+        Discard all cached tiles for every chipper.
+
+        Returns
+        -------
+        None
+        """
+
+        for chipper in self._get_chippers_as_tuple():
+            chipper.invalidate_cache()
+
     def _validate_index(self, index):
         if isinstance(self._chipper, BaseChipper) or index is None:
             return 0
@@ -524,7 +1382,7 @@ class BaseReader(object):
                 return item[:2], index
         return item, 0
 
-    def __call__(self, range1, range2, index=0):
+    def __call__(self, range1, range2, index=0, out=None, raw=False):
         """
         Reads and fetches data. Note that :code:`reader(range1, range2, index)` is an alias
         for :code:`reader.read_chip(range1, range2, index)`.
@@ -534,17 +1392,15 @@ class BaseReader(object):
         range1 : None|int|tuple
         range2 : None|int|tuple
         index : None|int
+        out : None|numpy.ndarray
+        raw : bool
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray|Tuple[numpy.ndarray, dict]
         """
 
-        if isinstance(self._chipper, tuple):
-            index = self._validate_index(index)
-            return self._chipper[index](range1, range2)
-        else:
-            return self._chipper(range1, range2)
+        return self.read_chip(range1, range2, index=index, out=out, raw=raw)
 
     def __getitem__(self, item):
         """
@@ -566,7 +1422,7 @@ class BaseReader(object):
         else:
             return self._chipper.__getitem__(item)
 
-    def read_chip(self, dim1range, dim2range, index=None):
+    def read_chip(self, dim1range, dim2range, index=None, out=None, raw=False):
         """
         Read the given section of data as an array.
 
@@ -581,9 +1437,19 @@ class BaseReader(object):
         index : int|None
             Relative to which sicd/chipper, and only used in the event of multiple
             sicd/chippers. Defaults to `0`, if not provided.
+        out : None|numpy.ndarray
+            If provided, a preallocated array (usually of dtype complex64) of the
+            chip shape, into which the data will be decoded directly and which
+            will be returned. This permits buffer reuse for repeated reads.
+        raw : bool
+            If `True`, then the stored samples (e.g. int16 I/Q for RE16I_IM16I, or
+            uint8 amplitude/phase for AMP8I_PHS8I) are returned as a native-endian
+            array of shape `(rows, cols, bands)`, without expansion to complex64,
+            together with a dictionary of the decode parameters. This dictionary
+            includes the sicd `PixelType` and `AmpTable` (or `None`), where available.
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray|Tuple[numpy.ndarray, dict]
             The complex data, explicitly of dtype=complex.64. Be sure to upcast to
             complex128 if so desired.
 
@@ -601,11 +1467,197 @@ class BaseReader(object):
         :code:`reader[:, :, 0]` (where appropriate).
         """
 
-        if isinstance(self._chipper, tuple):
-            index = self._validate_index(index)
-            return self._chipper[index](dim1range, dim2range)
+        index = self._validate_index(index)
+        chipper = self._chipper[index] if isinstance(self._chipper, tuple) else self._chipper
+        if not raw:
+            return chipper(dim1range, dim2range, out=out)
+
+        data, parameters = chipper(dim1range, dim2range, out=out, raw=True)
+        sicds = self.get_sicds_as_tuple()
+        pixel_type, amp_table = None, None
+        if sicds is not None:
+            try:
+                pixel_type = sicds[index].ImageData.PixelType
+                amp_table = sicds[index].ImageData.AmpTable
+            except AttributeError:
+                pass
+        parameters['PixelType'] = pixel_type
+        parameters['AmpTable'] = None if amp_table is None else numpy.array(amp_table, dtype=numpy.float64)
+        return data, parameters
+
+    def _get_storage_symmetry(self, index):
+        """
+        Gets the symmetry of the chipper relative to the underlying file storage,
+        looking through any subset chipper to its parent.
+
+        Parameters
+        ----------
+        index : int
+
+        Returns
+        -------
+        Tuple[bool, bool, bool]
+        """
+
+        chipper = self._chipper[index] if isinstance(self._chipper, tuple) else self._chipper
+        while isinstance(chipper, SubsetChipper):
+            chipper = chipper.parent_chipper
+        if isinstance(chipper, tuple):
+            chipper = chipper[0]
+        return chipper.symmetry
+
+    def iter_blocks(self, rows_per_block=None, cols=None, index=0, prefetch=1, rows=None):
+        """
+        Iterate over the data in blocks, which are yielded in the order of the
+        underlying file storage. Each block spans the entire (limited) extent of one
+        axis, and `rows_per_block` entries of the axis which is the leading axis
+        of the file storage - that is, the second axis if the symmetry dictates an
+        axis swap, and the first axis otherwise. If the storage is flipped along
+        this axis, the blocks are yielded in decreasing order.
+
+        While the consumer is working on a block, a background thread reads the
+        next `prefetch` blocks.
+
+        Parameters
+        ----------
+        rows_per_block : None|int|str|BlockSizeTuner
+            The number of storage rows in each block. The default yields blocks
+            of roughly 64 MB of complex64 data. If `'auto'`, or a
+            :class:`BlockSizeTuner` instance, then the number of rows is tuned
+            from the measured read throughput, and any time that the consumer
+            records with the tuner. For `'auto'`, the blocks in flight are bounded
+            by the default memory budget of :class:`BlockSizeTuner`.
+        cols : None|Tuple[int, int]
+            The column limits of the form `(start, stop)`. Defaults to all columns.
+        index : int
+            The sicd/chipper index.
+        prefetch : int
+            The number of blocks to read ahead in a background thread. If `0`, then
+            the blocks are read synchronously.
+        rows : None|Tuple[int, int]
+            The row limits of the form `(start, stop)`. Defaults to all rows.
+
+        Yields
+        ------
+        Tuple[numpy.ndarray, Tuple[int, int]]
+            The block of data and the (row, column) indices of its first entry.
+        """
+
+        def get_limits(limits, siz, name):
+            if limits is None:
+                return 0, siz
+            start, stop = int_func(limits[0]), int_func(limits[1])
+            if not (0 <= start < stop <= siz):
+                raise ValueError('{} limits {} are not valid for axis of size {}'.format(name, limits, siz))
+            return start, stop
+
+        def read_block(begin, end):
+            if swap:
+                return self.read_chip(
+                    (row_limits[0], row_limits[1], 1), (begin, end, 1), index=index), (row_limits[0], begin)
+            else:
+                return self.read_chip(
+                    (begin, end, 1), (col_limits[0], col_limits[1], 1), index=index), (begin, col_limits[0])
+
+        def block_bounds():
+            if tuner is None:
+                block_starts = list(range(lead_limits[0], lead_limits[1], rows_per_block))
+                if flip:
+                    block_starts = block_starts[::-1]
+                for begin in block_starts:
+                    yield begin, min(begin + rows_per_block, lead_limits[1])
+            elif flip:
+                # the blocks are aligned with the end, so that only the final block is truncated
+                end = lead_limits[1]
+                while end > lead_limits[0]:
+                    begin = max(end - tuner.next_rows(), lead_limits[0])
+                    yield begin, end
+                    end = begin
+            else:
+                begin = lead_limits[0]
+                while begin < lead_limits[1]:
+                    end = min(begin + tuner.next_rows(), lead_limits[1])
+                    yield begin, end
+                    begin = end
+
+        def block_generator():
+            for begin, end in block_bounds():
+                if tuner is None:
+                    yield read_block(begin, end)
+                else:
+                    start_time = time.time()
+                    block = read_block(begin, end)
+                    tuner.record(end - begin, time.time() - start_time)
+                    yield block
+
+        index = self._validate_index(index)
+        data_size = self.get_data_size_as_tuple()[index]
+        row_limits = get_limits(rows, data_size[0], 'row')
+        col_limits = get_limits(cols, data_size[1], 'column')
+
+        symmetry = self._get_storage_symmetry(index)
+        swap = symmetry[2]
+        lead_limits, other_limits = (col_limits, row_limits) if swap else (row_limits, col_limits)
+        flip = symmetry[1] if swap else symmetry[0]
+
+        prefetch = int_func(prefetch)
+        tuner = None
+        if isinstance(rows_per_block, BlockSizeTuner):
+            tuner = rows_per_block
+        elif isinstance(rows_per_block, str) and rows_per_block == 'auto':
+            # the consumer holds one block, and the prefetch queue holds the others
+            tuner = BlockSizeTuner(
+                8*(other_limits[1] - other_limits[0]),
+                max_block_size=_get_default_block_size()//(max(prefetch, 0) + 1))
+        elif rows_per_block is None:
+            rows_per_block = max(1, int_func(2**26/(8*(other_limits[1] - other_limits[0]))))
         else:
-            return self._chipper(dim1range, dim2range)
+            rows_per_block = int_func(rows_per_block)
+            if rows_per_block < 1:
+                raise ValueError('rows_per_block must be positive, got {}'.format(rows_per_block))
+
+        if prefetch < 1:
+            for entry in block_generator():
+                yield entry
+            return
+
+        block_queue = queue.Queue(maxsize=prefetch)
+        stop_event = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop_event.is_set():
+                try:
+                    block_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def producer():
+            try:
+                for item in block_generator():
+                    if not put((item, None)):
+                        return
+            except Exception as e:
+                put((None, e))
+                return
+            put((done, None))
+
+        thread = threading.Thread(target=producer, name='iter_blocks_prefetch')
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                item, error = block_queue.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop_event.set()
+            thread.join()
 
     def get_suggestive_name(self, frame=None):
         """
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+A batch front end for :func:`sarpy.io.complex.converter.conversion_utility`, which
+converts every frame of many complex data files to SICD or SIO format across a
+pool of processes. A failure in one file does not affect the conversion of the
+others, and the throughput of each conversion is reported.
+
+This can be run from the command line as
+
+.. code-block:: bash
+
+    python -m sarpy.io.complex.batch "/data/*.ntf" /output/directory --processes 16
+
+or, when installed, as the `sarpy_convert` console script.
+"""
+
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+import traceback
+from multiprocessing import Pool, cpu_count
+
+int_func = int
+string_types = str
+if sys.version_info[0] < 3:
+    # noinspection PyUnresolvedReferences
+    int_func = long  # to accommodate 32-bit python 2
+    # noinspection PyUnresolvedReferences
+    string_types = basestring
+
+__classification__ = "UNCLASSIFIED"
+__author__ = "Thomas McCullough"
+
+
+def expand_inputs(inputs):
+    """
+    Expands the input file names or glob patterns, in order, and without duplicates.
+    An entry which matches no file is retained as is, so that its failure is reported.
+
+    Parameters
+    ----------
+    inputs : str|List[str]
+        A file name or glob pattern, or a list of such.
+
+    Returns
+    -------
+    List[str]
+    """
+
+    if isinstance(inputs, string_types):
+        inputs = [inputs, ]
+    file_names = []
+    for entry in inputs:
+        matches = sorted(glob.glob(entry))
+        if len(matches) == 0:
+            matches = [entry, ]
+        for file_name in matches:
+            if file_name not in file_names:
+                file_names.append(file_name)
+    return file_names
+
+
+def _convert_file(task):
+    """
+    Converts all frames of the given file, as the task for a worker process.
+    Any error is caught and reported in the result.
+
+    Parameters
+    ----------
+    task : Tuple[str, str, dict]
+        The input file, output directory and keyword arguments for :func:`conversion_utility`.
+
+    Returns
+    -------
+    dict
+        The conversion details, see :func:`batch_conversion`.
+    """
+
+    # imported here, so that the format readers are only imported by the workers
+    from .converter import open_complex, conversion_utility
+
+    input_file, output_directory, kwargs = task
+    result = {
+        'input_file': input_file, 'output_files': [], 'bytes': 0, 'seconds': 0.0,
+        'throughput': 0.0, 'error': None}
+    start = time.time()
+    output_paths = []
+    try:
+        reader = open_complex(input_file)
+        output_files = [reader.get_suggestive_name(frame) for frame in range(len(reader.get_sicds_as_tuple()))]
+        output_paths = [os.path.join(output_directory, entry) for entry in output_files]
+        # we verify that the outputs are new, so that a failure only removes our own files
+        existing = [entry for entry in output_paths if os.path.exists(entry)]
+        if len(existing) > 0:
+            output_paths = []
+            raise IOError('The output file(s) {} already exist'.format(existing))
+        conversion_utility(reader, output_directory, output_files=output_files, **kwargs)
+        del reader
+        result['output_files'] = output_paths
+        result['bytes'] = sum(os.path.getsize(entry) for entry in output_paths)
+    except Exception:
+        result['error'] = traceback.format_exc()
+        # remove any partially written output
+        for entry in output_paths:
+            if os.path.exists(entry):
+                os.remove(entry)
+    result['seconds'] = time.time() - start
+    if result['error'] is None and result['seconds'] > 0:
+        result['throughput'] = result['bytes']/(2.**20*result['seconds'])
+    return result
+
+
+def _log_result(result):
+    if result['error'] is None:
+        logging.info(
+            'Converted file {} to {} ({:.1f} MB) in {:.2f} seconds, at {:.1f} MB/s'.format(
+                result['input_file'], result['output_files'], result['bytes']/2.**20,
+                result['seconds'], result['throughput']))
+    else:
+        logging.error(
+            'Failed converting file {} after {:.2f} seconds, with error\n{}'.format(
+                result['input_file'], result['seconds'], result['error']))
+
+
+def batch_conversion(inputs, output_directory, processes=None, output_format='SICD', **kwargs):
+    """
+    Converts every frame of every given file across a pool of processes, using
+    :func:`sarpy.io.complex.converter.conversion_utility` with the suggested
+    output file names.
+
+    Parameters
+    ----------
+    inputs : str|List[str]
+        A file name or glob pattern, or a list of such.
+    output_directory : str
+        The output directory, which will be created if necessary.
+    processes : None|int
+        The number of worker processes, which defaults to the number of cpus.
+        This is limited to the number of files. If `1`, then the files are
+        converted in this process.
+    output_format : str
+        The output file format to write, from {'SICD', 'SIO'}. Default is SICD.
+    kwargs
+        Other keyword arguments for :func:`conversion_utility` - for example,
+        `max_block_size`, `workers`, `max_memory` or `auto_tune`.
+
+    Returns
+    -------
+    List[dict]
+        The conversion details for each file, in order. Each has keys `input_file`,
+        `output_files`, `bytes` (the size of the output), `seconds`, `throughput`
+        (MB/s of output), and `error` (`None` on success, otherwise the traceback).
+    """
+
+    file_names = expand_inputs(inputs)
+    if len(file_names) == 0:
+        return []
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+
+    if processes is None:
+        processes = cpu_count()
+    processes = int_func(processes)
+    if processes < 1:
+        raise ValueError('processes must be positive, got {}'.format(processes))
+    processes = min(processes, len(file_names))
+
+    kwargs['output_format'] = output_format
+    tasks = [(file_name, output_directory, kwargs) for file_name in file_names]
+    start = time.time()
+    results = []
+    if processes == 1:
+        for task in tasks:
+            results.append(_convert_file(task))
+            _log_result(results[-1])
+    else:
+        pool = Pool(processes=processes)
+        try:
+            for result in pool.imap(_convert_file, tasks, chunksize=1):
+                _log_result(result)
+                results.append(result)
+        finally:
+            pool.close()
+            pool.join()
+
+    elapsed = time.time() - start
+    total_bytes = sum(entry['bytes'] for entry in results)
+    failures = sum(1 for entry in results if entry['error'] is not None)
+    logging.info(
+        'Converted {} of {} files ({:.1f} MB) in {:.2f} seconds using {} processes, at {:.1f} MB/s'.format(
+            len(results) - failures, len(results), total_bytes/2.**20, elapsed, processes,
+            total_bytes/(2.**20*elapsed) if elapsed > 0 else 0.))
+    return results
+
+
+def main(args=None):
+    """
+    The command line entry point.
+
+    Parameters
+    ----------
+    args : None|List[str]
+        The command line arguments, which default to `sys.argv[1:]`.
+
+    Returns
+    -------
+    int
+        The exit status, which is `1` if any conversion failed, and `0` otherwise.
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Convert every frame of the given complex data files to SICD or SIO format.')
+    parser.add_argument('inputs', nargs='+', help='The input file names, or glob patterns.')
+    parser.add_argument('output_directory', help='The output directory.')
+    parser.add_argument(
+        '-p', '--processes', type=int, default=None,
+        help='The number of worker processes. Defaults to the number of cpus.')
+    parser.add_argument(
+        '-f', '--output-format', default='SICD', choices=['SICD', 'SIO'], type=str.upper,
+        help='The output file format.')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=0,
+        help='The number of encoding and writing threads per conversion.')
+    parser.add_argument(
+        '--max-block-size', type=int, default=None, help='The (nominal) maximum block size in bytes.')
+    parser.add_argument(
+        '--max-memory', type=int, default=None,
+        help='The (nominal) maximum memory in bytes per conversion, if using workers.')
+    parser.add_argument(
+        '-b', '--backend', default='memmap', choices=['memmap', 'sequential', 'sequential_direct'],
+        help='The writer backend.')
+    parser.add_argument(
+        '-a', '--auto-tune', action='store_true',
+        help='Tune the block size from the measured throughput, up to the maximum block size.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log progress details.')
+    parsed = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO if parsed.verbose else logging.WARNING)
+    results = batch_conversion(
+        parsed.inputs, parsed.output_directory, processes=parsed.processes,
+        output_format=parsed.output_format, workers=parsed.workers,
+        max_block_size=parsed.max_block_size, max_memory=parsed.max_memory, backend=parsed.backend,
+        auto_tune=parsed.auto_tune)
+
+    for result in results:
+        if result['error'] is None:
+            print('{}\t{:.1f} MB\t{:.2f} s\t{:.1f} MB/s'.format(
+                result['input_file'], result['bytes']/2.**20, result['seconds'], result['throughput']))
+        else:
+            print('{}\tFAILED\t{}'.format(result['input_file'], result['error'].strip().splitlines()[-1]))
+    return 1 if any(result['error'] is not None for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
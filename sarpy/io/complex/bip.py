@@ -4,13 +4,17 @@ This provides implementation of Reading and writing capabilities for files with
 data stored in *Band Interleaved By Pixel (BIP)* format.
 """
 
+import io
 import logging
 import os
 import sys
+import threading
+from multiprocessing.pool import ThreadPool
 
 import numpy
 
 from .base import BaseChipper, AbstractWriter
+from .codec import PixelCodec
 
 size_func = int
 int_func = int
@@ -23,17 +27,431 @@ __classification__ = "UNCLASSIFIED"
 __author__ = "Thomas McCullough"
 
 
+WRITER_BACKENDS = ('memmap', 'sequential', 'sequential_direct')
+"""
+The backends for :class:`BIPWriter`. `'memmap'` writes through a memory map (or
+positional writes, if that fails), and `'sequential'` writes through a
+:class:`SequentialFile`, optionally bypassing the page cache for `'sequential_direct'`.
+"""
+
+
+class PositionalFile(object):
+    """
+    Thread-safe positional (i.e. offset based) reading and writing of a file.
+    This uses :func:`os.preadv`, :func:`os.pread` and :func:`os.pwrite` where
+    available, and otherwise falls back to a seek followed by a read or write
+    which is guarded by a lock. No file position state is shared between callers,
+    so concurrent use from multiple threads is safe.
+    """
+
+    __slots__ = ('_file_name', '_fid', '_fd', '_lock')
+
+    def __init__(self, file_name, mode='r'):
+        """
+
+        Parameters
+        ----------
+        file_name : str
+        mode : str
+            One of `'r'` for reading or `'r+'` for reading and writing.
+        """
+
+        if mode not in ('r', 'r+'):
+            raise ValueError('mode must be one of "r" or "r+", got {}'.format(mode))
+        self._file_name = file_name
+        self._fid = io.open(file_name, mode='rb' if mode == 'r' else 'r+b', buffering=0)
+        self._fd = self._fid.fileno()
+        self._lock = threading.Lock()
+
+    @property
+    def file_name(self):
+        """
+        str: The file name.
+        """
+
+        return self._file_name
+
+    @property
+    def closed(self):
+        """
+        bool: Has the file been closed?
+        """
+
+        return self._fid.closed
+
+    def read_into(self, offset, buffer):
+        """
+        Read from the given file offset to completely fill the given buffer.
+
+        Parameters
+        ----------
+        offset : int
+            The byte offset from the start of the file.
+        buffer : numpy.ndarray
+            A C-contiguous array into which the bytes will be read.
+
+        Returns
+        -------
+        None
+        """
+
+        if not buffer.flags.c_contiguous:
+            raise ValueError('buffer must be C-contiguous')
+        view = memoryview(buffer.reshape(-1).view(numpy.uint8))
+        size = len(view)
+        position = 0
+        while position < size:
+            if hasattr(os, 'preadv'):
+                count = os.preadv(self._fd, [view[position:], ], offset + position)
+            elif hasattr(os, 'pread'):
+                chunk = os.pread(self._fd, size - position, offset + position)
+                count = len(chunk)
+                view[position:position+count] = chunk
+            else:
+                with self._lock:
+                    self._fid.seek(offset + position)
+                    count = self._fid.readinto(view[position:])
+            if not count:
+                raise IOError(
+                    'Reached the end of file {} reading {} bytes at offset {}'.format(
+                        self._file_name, size, offset))
+            position += count
+
+    def write_from(self, offset, buffer):
+        """
+        Write the contents of the given buffer at the given file offset.
+
+        Parameters
+        ----------
+        offset : int
+            The byte offset from the start of the file.
+        buffer : numpy.ndarray
+            A C-contiguous array whose bytes will be written.
+
+        Returns
+        -------
+        None
+        """
+
+        if not buffer.flags.c_contiguous:
+            buffer = numpy.ascontiguousarray(buffer)
+        view = memoryview(buffer.reshape(-1).view(numpy.uint8))
+        size = len(view)
+        position = 0
+        while position < size:
+            if hasattr(os, 'pwrite'):
+                count = os.pwrite(self._fd, view[position:], offset + position)
+            else:
+                with self._lock:
+                    self._fid.seek(offset + position)
+                    count = self._fid.write(view[position:])
+            position += count
+
+    def advise_random(self):
+        """
+        Advise the kernel that the file will be accessed in random order, so
+        that it does not read ahead. This is a no-op where :func:`os.posix_fadvise`
+        is unavailable.
+
+        Returns
+        -------
+        None
+        """
+
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_RANDOM)
+            except OSError:
+                logging.debug('posix_fadvise failed for file {}'.format(self._file_name))
+
+    def close(self):
+        """
+        Close the file.
+
+        Returns
+        -------
+        None
+        """
+
+        if not self._fid.closed:
+            self._fid.close()
+
+
+class SequentialFile(object):
+    """
+    Buffered writing of a file, intended for data which is written (mostly) in
+    sequential order. Each of the two aligned staging buffers covers an aligned
+    window of the file, and the written bytes are copied into place in the current
+    window. A full window is written with large :func:`os.pwrite` calls in a
+    background thread while the other buffer is filled. Writes anywhere inside the
+    current window, such as the row fragments of a column slab, are coalesced, and
+    only the byte ranges which were actually written are flushed. A write outside
+    of the current window is still correct, but causes the staged data to be flushed.
+
+    Optionally, the file is also opened with `O_DIRECT` to bypass the page cache,
+    which is used for the aligned portion of each flush, while the unaligned
+    ends are written normally. This falls back to normal writes where `O_DIRECT`
+    is not supported by the platform or file system.
+
+    This is safe for use from multiple threads.
+    """
+
+    __slots__ = (
+        '_file_name', '_fd', '_direct_fd', '_buffers', '_pending', '_current',
+        '_base', '_ranges', '_pool', '_lock')
+    _ALIGNMENT = 4096
+    """
+    The alignment in bytes of the file offsets, sizes and memory addresses for direct writes.
+    """
+
+    def __init__(self, file_name, offset=0, size=0, buffer_size=2**25, direct=False):
+        """
+
+        Parameters
+        ----------
+        file_name : str
+        offset : int
+            The offset of the region which will be written, which is preallocated
+            using :func:`os.posix_fallocate`, where available.
+        size : int
+            The size of the region which will be written. If `0`, nothing is preallocated.
+        buffer_size : int
+            The size in bytes of each of the two staging buffers, which is rounded
+            up to a multiple of the alignment. Default is 2**25 = 32 MB.
+        direct : bool
+            Bypass the page cache using `O_DIRECT`, if possible?
+        """
+
+        buffer_size = int_func(buffer_size)
+        if buffer_size < 1:
+            raise ValueError('buffer_size must be positive, got {}'.format(buffer_size))
+        buffer_size = self._ALIGNMENT*((buffer_size + self._ALIGNMENT - 1)//self._ALIGNMENT)
+
+        self._file_name = file_name
+        self._fd = None
+        self._direct_fd = None
+        self._pool = None
+        flags = os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+        self._fd = os.open(file_name, flags)
+        try:
+            if direct:
+                if hasattr(os, 'O_DIRECT'):
+                    try:
+                        self._direct_fd = os.open(file_name, flags | os.O_DIRECT)
+                    except OSError as e:
+                        logging.warning(
+                            'Direct writing is not supported for file {}, got error {}. '
+                            'Falling back to normal writes.'.format(file_name, e))
+                else:
+                    logging.warning(
+                        'Direct writing is not supported on this platform. Falling back to normal writes.')
+
+            offset, size = int_func(offset), int_func(size)
+            if size > 0 and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(self._fd, offset, size)
+                except OSError as e:
+                    logging.debug('posix_fallocate failed for file {}, got error {}'.format(file_name, e))
+
+            self._buffers = (self._aligned_buffer(buffer_size), self._aligned_buffer(buffer_size))
+            self._pending = [None, None]
+            self._current = 0
+            self._base = None
+            self._ranges = []
+            self._lock = threading.Lock()
+            self._pool = ThreadPool(processes=1)
+        except BaseException:
+            # don't leak the file descriptors of a partially constructed instance
+            self._release()
+            raise
+
+    @classmethod
+    def _aligned_buffer(cls, size):
+        raw = numpy.empty((size + cls._ALIGNMENT, ), dtype=numpy.uint8)
+        shift = (-raw.ctypes.data) % cls._ALIGNMENT
+        return raw[shift:shift + size]
+
+    @property
+    def file_name(self):
+        """
+        str: The file name.
+        """
+
+        return self._file_name
+
+    @property
+    def closed(self):
+        """
+        bool: Has the file been closed?
+        """
+
+        return self._fd is None
+
+    @staticmethod
+    def _write_all(fd, view, offset):
+        position = 0
+        while position < len(view):
+            if hasattr(os, 'pwrite'):
+                count = os.pwrite(fd, view[position:], offset + position)
+            else:
+                # only the single background thread writes
+                os.lseek(fd, offset + position, os.SEEK_SET)
+                count = os.write(fd, view[position:])
+            position += count
+
+    def _write_range(self, view, base, start, end):
+        if self._direct_fd is not None:
+            aligned_start = self._ALIGNMENT*((start + self._ALIGNMENT - 1)//self._ALIGNMENT)
+            aligned_end = self._ALIGNMENT*(end//self._ALIGNMENT)
+            if aligned_start < aligned_end:
+                self._write_all(self._fd, view[start - base:aligned_start - base], start)
+                self._write_all(self._direct_fd, view[aligned_start - base:aligned_end - base], aligned_start)
+                self._write_all(self._fd, view[aligned_end - base:end - base], aligned_end)
+                return
+        self._write_all(self._fd, view[start - base:end - base], start)
+
+    def _write_staged(self, task):
+        buffer, base, ranges = task
+        view = memoryview(buffer)
+        for start, end in ranges:
+            self._write_range(view, base, start, end)
+
+    @staticmethod
+    def _merge_ranges(ranges):
+        # sort the written byte ranges, and combine those which overlap or touch
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def _wait(self, index):
+        pending = self._pending[index]
+        if pending is not None:
+            self._pending[index] = None
+            pending.get()  # raises any error from the write
+
+    def _flush_staged(self):
+        if len(self._ranges) > 0:
+            self._pending[self._current] = self._pool.apply_async(
+                self._write_staged, ((self._buffers[self._current], self._base, self._merge_ranges(self._ranges)), ))
+            self._current = 1 - self._current
+        self._base, self._ranges = None, []
+
+    def write_from(self, offset, buffer):
+        """
+        Write the contents of the given buffer at the given file offset.
+
+        Parameters
+        ----------
+        offset : int
+            The byte offset from the start of the file.
+        buffer : numpy.ndarray
+            An array whose bytes will be written.
+
+        Returns
+        -------
+        None
+        """
+
+        source = numpy.ascontiguousarray(buffer).reshape(-1).view(numpy.uint8)
+        offset = int_func(offset)
+        with self._lock:
+            if self._fd is None:
+                raise ValueError('The file {} is closed'.format(self._file_name))
+            window = self._buffers[0].size
+            position = 0
+            while position < source.size:
+                start = offset + position
+                if self._base is None or not (self._base <= start < self._base + window):
+                    # outside of the current window, so start a new one
+                    self._flush_staged()
+                    self._wait(self._current)
+                    self._base = start - (start % self._ALIGNMENT)
+                staging = self._buffers[self._current]
+                index = start - self._base
+                count = min(source.size - position, window - index)
+                staging[index:index + count] = source[position:position + count]
+                if len(self._ranges) > 0 and self._ranges[-1][1] == start:
+                    self._ranges[-1][1] += count
+                else:
+                    self._ranges.append([start, start + count])
+                position += count
+                if index + count == window:
+                    self._flush_staged()
+
+    def flush(self):
+        """
+        Write all staged data, and wait for the writes to complete.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._flush_staged()
+            self._wait(0)
+            self._wait(1)
+
+    def close(self):
+        """
+        Write all staged data, and close the file.
+
+        Returns
+        -------
+        None
+        """
+
+        if getattr(self, '_fd', None) is None:
+            return
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._release()
+
+    def _release(self):
+        # NB: this tolerates a partially initialized instance
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._direct_fd is not None:
+            os.close(self._direct_fd)
+            self._direct_fd = None
+
+    def __del__(self):
+        self.close()
+
+
 class BIPChipper(BaseChipper):
     """
-    Band interleaved format file chipper
+    Band interleaved format file chipper. The data is read using a memory map,
+    if possible, and otherwise using thread-safe positional reads in which
+    contiguous runs of rows are combined into single reads.
+
+    Decimated reads, with row step at least `_DECIMATION_ROW_STEP`, bypass the
+    memory map and issue one positional read per needed row (or per needed
+    column, for very large column steps) on a file handle for which read ahead
+    has been disabled. This avoids faulting in the pages of skipped rows.
     """
 
     __slots__ = (
-        '_file_name', '_data_type', '_data_offset', '_shape', '_bands', '_memory_map', '_fid')
+        '_file_name', '_data_type', '_data_offset', '_shape', '_bands', '_memory_map', '_fid',
+        '_random_fid', '_lock')
+    _MAX_READ_BYTES = 2**24  # the maximum size of a single combined read
+    _DECIMATION_ROW_STEP = 8  # the row step at which reads skip the memory map
+    _MAX_COLUMN_GAP = 2**16  # the byte gap between needed columns above which they are read separately
 
     def __init__(self, file_name, data_type, data_size,
                  symmetry=(False, False, False), complex_type=False,
-                 data_offset=0, bands_ip=1):
+                 data_offset=0, bands_ip=1, use_memmap=True):
         """
 
         Parameters
@@ -57,6 +475,9 @@ class BIPChipper(BaseChipper):
             byte offset from the start of the file at which the data actually starts
         bands_ip : int
             number of bands - really intended for complex data
+        use_memmap : bool
+            Should we use a memory map? If `False`, or if the memory map fails, then
+            positional reads are used.
         """
 
         super(BIPChipper, self).__init__(data_size, symmetry=symmetry, complex_type=complex_type)
@@ -66,7 +487,7 @@ class BIPChipper(BaseChipper):
             bands *= 2
 
         self._data_offset = int_func(data_offset)
-        self._data_type = data_type
+        self._data_type = numpy.dtype(data_type)
         self._bands = bands
         self._shape = (int_func(data_size[0]), int_func(data_size[1]), self._bands)
 
@@ -78,72 +499,125 @@ class BIPChipper(BaseChipper):
 
         self._memory_map = None
         self._fid = None
-        try:
-            self._memory_map = numpy.memmap(self._file_name,
-                                            dtype=data_type,
-                                            mode='r',
-                                            offset=data_offset,
-                                            shape=self._shape)  # type: numpy.memmap
-        except (OverflowError, OSError):
-            # if 32-bit python, then we'll fail for any file larger than 2GB
-            # we fall-back to a slower version of reading manually
-            self._fid = open(self._file_name, mode='rb')
-            logging.warning(
-                'Falling back to reading file {} manually (instead of using mem-map). This has almost '
-                'certainly occurred because you are 32-bit python to try to read (portions of) a file '
-                'which is larger than 2GB.'.format(self._file_name))
+        self._random_fid = None
+        self._lock = threading.Lock()
+        if use_memmap:
+            try:
+                self._memory_map = numpy.memmap(self._file_name,
+                                                dtype=self._data_type,
+                                                mode='r',
+                                                offset=self._data_offset,
+                                                shape=self._shape)  # type: numpy.memmap
+            except (OverflowError, OSError):
+                # if 32-bit python, then we'll fail for any file larger than 2GB
+                # we fall-back to positional reads
+                logging.warning(
+                    'Falling back to reading file {} manually (instead of using mem-map). This has almost '
+                    'certainly occurred because you are 32-bit python to try to read (portions of) a file '
+                    'which is larger than 2GB.'.format(self._file_name))
+        if self._memory_map is None:
+            self._fid = PositionalFile(self._file_name, mode='r')
 
     def __del__(self):
-        if hasattr(self, '_fid') and self._fid is not None and \
-                hasattr(self._fid, 'closed') and not self._fid.closed:
+        if getattr(self, '_fid', None) is not None:
             self._fid.close()
+        if getattr(self, '_random_fid', None) is not None:
+            self._random_fid.close()
 
-    def _read_raw_fun(self, range1, range2):
+    def _get_random_fid(self):
+        """
+        Gets the file handle for decimated reads, which is opened on first use.
+
+        Returns
+        -------
+        PositionalFile
+        """
+
+        with self._lock:
+            if self._random_fid is None:
+                self._random_fid = PositionalFile(self._file_name, mode='r')
+                self._random_fid.advise_random()
+            return self._random_fid
+
+    def _read_raw_fun(self, range1, range2, out=None):
         range1, range2 = self._reorder_arguments(range1, range2)
-        if self._memory_map is not None:
-            return self._read_memory_map(range1, range2)
+        if abs(range1[2]) >= self._DECIMATION_ROW_STEP:
+            data = self._read_file(range1, range2, fid=self._get_random_fid())
+        elif self._memory_map is not None:
+            data = self._read_memory_map(range1, range2)
         elif self._fid is not None:
-            return self._read_file(range1, range2)
-
-    def _read_memory_map(self, range1, range2):
-        if (range1[1] == -1 and range1[2] < 0) and (range2[1] == -1 and range2[2] < 0):
-            out = numpy.array(self._memory_map[range1[0]::range1[2], range2[0]::range2[2]], dtype=self._data_type)
-        elif range1[1] == -1 and range1[2] < 0:
-            out = numpy.array(self._memory_map[range1[0]::range1[2], range2[0]:range2[1]:range2[2]], dtype=self._data_type)
-        elif range2[1] == -1 and range2[2] < 0:
-            out = numpy.array(self._memory_map[range1[0]:range1[1]:range1[2], range2[0]::range2[2]],
-                              dtype=self._data_type)
+            data = self._read_file(range1, range2)
         else:
-            out = numpy.array(self._memory_map[range1[0]:range1[1]:range1[2], range2[0]:range2[1]:range2[2]],
-                              dtype=self._data_type)
+            raise ValueError('Chipper for file {} has no open data source'.format(self._file_name))
+        if out is None:
+            return data
+        out[:] = numpy.reshape(data, out.shape)
         return out
 
-    def _read_file(self, range1, range2):
-        def get_row_location(rr, cc):
-            return self._data_offset + \
-                   rr*stride + \
-                   cc*element_size
-
-        # we have to manually map out the stride and all that for the array ourselves
-        element_size = int_func(numpy.dtype(self._data_type).itemsize*self._bands)
-        stride = element_size*int_func(self._shape[0])  # how much to skip a whole (real) row?
-        entries_per_row = abs(range1[1] - range1[0])  # not including the stride, if not +/-1
-        # let's determine the specific row/column arrays that we are going to read
-        dim1array = numpy.arange(range1)
-        dim2array = numpy.arange(range2)
-        # allocate our output array
-        out = numpy.empty((len(dim1array), len(dim2array), self._bands), dtype=self._data_type)
-        # determine the first column reading location (may be reading cols backwards)
-        col_begin = dim2array[0] if range2[2] > 0 else dim2array[-1]
-
-        for i, row in enumerate(dim1array):
-            # go to the appropriate point in the file for (row/col)
-            self._fid.seek(get_row_location(row, col_begin))
-            # interpret this of line as numpy.ndarray - inherently flat array
-            line = numpy.fromfile(self._fid, self._data_type, entries_per_row*self._bands)
-            # note that we purposely read without considering skipping elements, which
-            #   is factored in (along with any potential order reversal) below
-            out[i, :, :] = line[::range2[2]]
+    def _read_memory_map(self, range1, range2):
+        # NB: this is a view into the memory map, and no data is copied
+        slice1 = slice(range1[0], None, range1[2]) if (range1[1] == -1 and range1[2] < 0) else slice(*range1)
+        slice2 = slice(range2[0], None, range2[2]) if (range2[1] == -1 and range2[2] < 0) else slice(*range2)
+        return self._memory_map[slice1, slice2]
+
+    def _read_file(self, range1, range2, fid=None):
+        # NB: a "stop" of -1 with negative step is understood as running through 0
+        if fid is None:
+            fid = self._fid
+        rows = numpy.arange(*range1, dtype=numpy.int64)
+        cols = numpy.arange(*range2, dtype=numpy.int64)
+        out = numpy.empty((rows.size, cols.size, self._bands), dtype=self._data_type)
+        if rows.size == 0 or cols.size == 0:
+            return out
+
+        # always read forwards, and populate the output in the appropriate order
+        if range1[2] < 0:
+            rows = rows[::-1]
+            out_view = out[::-1]
+        else:
+            out_view = out
+        col_start, col_end = int_func(cols.min()), int_func(cols.max()) + 1
+        col_slice = slice(None, None, range2[2])
+        element_size = self._data_type.itemsize*self._bands
+        row_size = element_size*self._shape[1]
+
+        if abs(range1[2]) == 1 and 2*(col_end - col_start) >= self._shape[1]:
+            # combine runs of whole rows into single reads
+            rows_per_read = max(1, int_func(self._MAX_READ_BYTES/row_size))
+            full_rows = (col_start == 0 and col_end == self._shape[1] and range1[2] > 0 and range2[2] == 1)
+            for i in range(0, rows.size, rows_per_read):
+                count = min(rows_per_read, rows.size - i)
+                offset = self._data_offset + int_func(rows[i])*row_size
+                if full_rows:
+                    # read directly into the output
+                    fid.read_into(offset, out[i:i+count])
+                    continue
+                buffer = numpy.empty((count, self._shape[1], self._bands), dtype=self._data_type)
+                flat = buffer.reshape(-1).view(numpy.uint8)
+                begin = col_start*element_size
+                end = (count - 1)*row_size + col_end*element_size
+                fid.read_into(offset + begin, flat[begin:end])
+                out_view[i:i+count] = buffer[:, col_start:col_end][:, col_slice]
+        elif (abs(range2[2]) - 1)*element_size > self._MAX_COLUMN_GAP:
+            # one read per needed entry, since the gaps between columns are large
+            out_cols = numpy.arange(cols.size)
+            if range2[2] < 0:
+                cols, out_cols = cols[::-1], out_cols[::-1]
+            for i, row in enumerate(rows):
+                row_offset = self._data_offset + int_func(row)*row_size
+                for col, j in zip(cols, out_cols):
+                    fid.read_into(row_offset + int_func(col)*element_size, out_view[i, j])
+        else:
+            # one read per needed row
+            direct = (range2[2] == 1)
+            buffer = None if direct else numpy.empty((col_end - col_start, self._bands), dtype=self._data_type)
+            for i, row in enumerate(rows):
+                offset = self._data_offset + int_func(row)*row_size + col_start*element_size
+                if direct:
+                    fid.read_into(offset, out_view[i])
+                else:
+                    fid.read_into(offset, buffer)
+                    out_view[i] = buffer[col_slice]
         return out
 
 
@@ -158,7 +632,8 @@ class BIPWriter(AbstractWriter):
         '_data_size', '_data_type', '_complex_type', '_data_offset',
         '_shape', '_memory_map', '_fid')
 
-    def __init__(self, file_name, data_size, data_type, complex_type, data_offset=0):
+    def __init__(self, file_name, data_size, data_type, complex_type, data_offset=0, use_memmap=True,
+                 backend='memmap'):
         """
         For writing the SICD data into the NITF container. This is abstracted generally
         because an array of these writers is used for multi-image segment NITF files.
@@ -172,9 +647,13 @@ class BIPWriter(AbstractWriter):
             the shape of the form (rows, cols)
         data_type : numpy.dtype|str
             the underlying data type of the output data. Specify endianess here if necessary.
-        complex_type : callable|bool
+        complex_type : callable|bool|PixelCodec
             For complex type handling.
 
+            * If a PixelCodec, then the complex data is encoded to the raw data
+              using its `encode` method, directly into the memory map if possible.
+              The codec dtype must match `data_type`.
+
             * If callable, then this is expected to transform the complex data
               to the raw data. A ValueError will be raised if the data type of
               the output doesn't match `data_type`. By the sicd standard,
@@ -189,8 +668,19 @@ class BIPWriter(AbstractWriter):
               match `data_type`.
         data_offset : int
             byte offset from the start of the file at which the data actually starts
+        use_memmap : bool
+            Should we use a memory map? If `False`, or if the memory map fails, then
+            positional writes are used. Only used for the `'memmap'` backend.
+        backend : str
+            One of :data:`WRITER_BACKENDS`. The `'sequential'` backends avoid the
+            page cache pressure of a large memory map, and are best suited to
+            writing full rows in order.
         """
 
+        if backend is None:
+            backend = 'memmap'
+        if backend not in WRITER_BACKENDS:
+            raise ValueError('backend must be one of {}, got {}'.format(WRITER_BACKENDS, backend))
         super(BIPWriter, self).__init__(file_name)
         if not isinstance(data_size, tuple):
             data_size = tuple(data_size)
@@ -203,8 +693,8 @@ class BIPWriter(AbstractWriter):
         self._data_size = data_size
 
         self._data_type = numpy.dtype(data_type)
-        if not (isinstance(complex_type, bool) or callable(complex_type)):
-            raise ValueError('complex-type must be a boolean or a callable')
+        if not (isinstance(complex_type, (bool, PixelCodec)) or callable(complex_type)):
+            raise ValueError('complex-type must be a boolean, a callable, or a PixelCodec')
         self._complex_type = complex_type
 
         if self._complex_type is True and self._data_type.name != 'float32':
@@ -217,6 +707,10 @@ class BIPWriter(AbstractWriter):
                 'complex_type is callable, which requires that dtype complex64/128, '
                 'and output is written as uint8 or uint16. '
                 'data_type is given as {}.'.format(self._data_type.name))
+        if isinstance(self._complex_type, PixelCodec) and self._complex_type.dtype.name != self._data_type.name:
+            raise ValueError(
+                'complex_type is a PixelCodec for dtype {}, but data_type is '
+                'given as {}.'.format(self._complex_type.dtype.name, self._data_type.name))
 
         self._data_offset = int_func(data_offset)
         if self._complex_type is False:
@@ -226,20 +720,27 @@ class BIPWriter(AbstractWriter):
 
         self._memory_map = None
         self._fid = None
-        try:
-            self._memory_map = numpy.memmap(self._file_name,
-                                            dtype=self._data_type,
-                                            mode='r+',
-                                            offset=self._data_offset,
-                                            shape=self._shape)
-        except (OverflowError, OSError):
-            # if 32-bit python, then we'll fail for any file larger than 2GB
-            # we fall-back to a slower version of reading manually
-            self._fid = open(self._file_name, mode='r+b')
-            logging.warning(
-                'Falling back to writing file {} manually (instead of using mem-map). This has almost '
-                'certainly occurred because you are 32-bit python to try to read (portions of) a file '
-                'which is larger than 2GB.'.format(self._file_name))
+        if backend != 'memmap':
+            self._fid = SequentialFile(
+                self._file_name, offset=self._data_offset,
+                size=int_func(numpy.prod(self._shape))*self._data_type.itemsize,
+                direct=(backend == 'sequential_direct'))
+        elif use_memmap:
+            try:
+                self._memory_map = numpy.memmap(self._file_name,
+                                                dtype=self._data_type,
+                                                mode='r+',
+                                                offset=self._data_offset,
+                                                shape=self._shape)
+            except (OverflowError, OSError):
+                # if 32-bit python, then we'll fail for any file larger than 2GB
+                # we fall-back to positional writes
+                logging.warning(
+                    'Falling back to writing file {} manually (instead of using mem-map). This has almost '
+                    'certainly occurred because you are 32-bit python to try to read (portions of) a file '
+                    'which is larger than 2GB.'.format(self._file_name))
+        if self._memory_map is None and self._fid is None:
+            self._fid = PositionalFile(self._file_name, mode='r+')
 
     def write_chip(self, data, start_indices=(0, 0)):
         self.__call__(data, start_indices=start_indices)
@@ -274,6 +775,12 @@ class BIPWriter(AbstractWriter):
                 raise ValueError(
                     'Writer expects data type {}, and got data of type {}.'.format(self._data_type, data.dtype))
             self._call(start1, stop1, start2, stop2, data)
+        elif isinstance(self._complex_type, PixelCodec):
+            if self._memory_map is not None:
+                # encode directly into the memory map
+                self._complex_type.encode(data, out=self._memory_map[start1:stop1, start2:stop2])
+            else:
+                self._call(start1, stop1, start2, stop2, self._complex_type.encode(data))
         elif callable(self._complex_type):
             new_data = self._complex_type(data)
             if new_data.dtype.name != self._data_type.name:
@@ -294,41 +801,36 @@ class BIPWriter(AbstractWriter):
 
     def _call(self, start1, stop1, start2, stop2, data):
         if self._memory_map is not None:
-            self._memory_map[start1:stop1, start2:stop2, :] = data
+            self._memory_map[start1:stop1, start2:stop2] = data
             return
 
-        # we have to fall-back to manually write
+        # positional (or sequential) writes
+        data = numpy.ascontiguousarray(data, dtype=self._data_type)
         element_size = int_func(self._data_type.itemsize)
         if len(self._shape) == 3:
             element_size *= int_func(self._shape[2])
-        stride = element_size*int_func(self._data_size[0])
-        # go to the appropriate spot in the file for first entry
-        self._fid.seek(self._data_offset + stride*start1 + element_size*start2)
-        if start1 == 0 and stop1 == self._data_size[0]:
+        row_size = element_size*int_func(self._data_size[1])
+        offset = self._data_offset + row_size*start1 + element_size*start2
+        if start2 == 0 and stop2 == self._data_size[1]:
             # we can write the block all at once
-            data.astype(self._data_type).tofile(self._fid)
+            self._fid.write_from(offset, data)
         else:
             # have to write one row at a time
-            bytes_to_skip_per_row = element_size*(self._data_size[0]-(stop1-start1))
             for i, row in enumerate(data):
-                # we the row, and then skip to where the next row starts
-                row.astype(self._data_type).tofile(self._fid)
-                if i < len(data) - 1:
-                    # don't seek on last entry (avoid segfault, or whatever)
-                    self._fid.seek(bytes_to_skip_per_row, os.SEEK_CUR)
+                self._fid.write_from(offset + i*row_size, row)
 
     def close(self):
         """
         **Should be called on exit.** Cleanly close the file. This is actually only
-        required if memory map failed, and we fell back to manually writing the file.
+        required for the sequential backends, which flush the staged data, or if
+        memory map failed, and we fell back to manually writing the file.
 
         Returns
         -------
         None
         """
 
-        if hasattr(self, '_fid') and self._fid is not None and \
-                hasattr(self._fid, 'closed') and not self._fid.closed:
+        if getattr(self, '_fid', None) is not None:
             self._fid.close()
 
     def __del__(self):
@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized encoding and decoding of the SICD pixel types (`RE32F_IM32F`,
+`RE16I_IM16I`, and `AMP8I_PHS8I`) between stored samples and complex64 data.
+
+Each pixel type has a registered codec class, constructed via :func:`get_codec`.
+A codec processes its input in chunks of rows, so that any temporary arrays are
+bounded in size, and writes directly into a provided output array. Any required
+byte swapping happens as part of the assignment into the output, so no separate
+swapped copy of the data is ever made. Since numpy releases the GIL for these
+operations, the chunks may be processed concurrently using a thread pool.
+"""
+
+import sys
+import logging
+import threading
+import timeit
+from multiprocessing.pool import ThreadPool
+from collections import OrderedDict
+from typing import Union
+
+import numpy
+
+int_func = int
+if sys.version_info[0] < 3:
+    # noinspection PyUnresolvedReferences
+    int_func = long  # to accommodate for 32-bit python 2
+
+
+__classification__ = "UNCLASSIFIED"
+__author__ = "Thomas McCullough"
+
+
+_DEFAULT_CHUNK_PIXELS = 2**16  # the number of pixels processed per chunk, sized to stay in cache
+_CODECS = OrderedDict()
+
+
+def _validate_amp_table(amp_table):
+    # type: (Union[None, numpy.ndarray, list, tuple]) -> numpy.ndarray
+    if amp_table is None:
+        # the amplitude is just the stored value
+        return numpy.arange(256, dtype=numpy.float64)
+    amp_table = numpy.asarray(amp_table, dtype=numpy.float64)
+    if amp_table.shape != (256, ):
+        raise ValueError('Requires a one-dimensional amplitude table with 256 elements, '
+                         'got shape {}'.format(amp_table.shape))
+    return amp_table
+
+
+class PixelCodec(object):
+    """
+    Abstract codec converting between stored samples of shape `(rows, cols, 2*bands)`
+    and complex64 data of shape `(rows, cols, bands)`.
+    """
+
+    __slots__ = ('_dtype', '_chunk_pixels', '_threads', '_thread_pool', '_pool_lock')
+    pixel_type = None  # the SICD PixelType
+    base_dtype = None  # the stored type, without byte order
+    interleaved = True  # are the real and imaginary components stored in adjacent bands?
+    uses_amp_table = False
+
+    def __init__(self, byte_order='>', chunk_pixels=None, threads=1):
+        """
+
+        Parameters
+        ----------
+        byte_order : str
+            The byte order of the stored samples. SICD files are required to be
+            big-endian (`'>'`), the default.
+        chunk_pixels : None|int
+            The number of pixels processed per chunk, defaults to `2**16`.
+        threads : int
+            The number of threads used for processing chunks concurrently.
+        """
+
+        if byte_order not in ['>', '<', '=']:
+            raise ValueError('byte_order must be one of ">", "<", or "=", got {}'.format(byte_order))
+        self._dtype = numpy.dtype(self.base_dtype).newbyteorder(byte_order)
+        if chunk_pixels is None:
+            chunk_pixels = _DEFAULT_CHUNK_PIXELS
+        chunk_pixels = int_func(chunk_pixels)
+        if chunk_pixels < 1:
+            raise ValueError('chunk_pixels must be positive, got {}'.format(chunk_pixels))
+        self._chunk_pixels = chunk_pixels
+        self._threads = 1
+        self._thread_pool = None
+        self._pool_lock = threading.Lock()
+        self.threads = threads
+
+    def __del__(self):
+        if getattr(self, '_thread_pool', None) is not None:
+            self._thread_pool.terminate()
+
+    @property
+    def threads(self):
+        """
+        int: The number of threads used for processing chunks concurrently.
+        """
+
+        return self._threads
+
+    @threads.setter
+    def threads(self, value):
+        value = 1 if value is None else int_func(value)
+        if value < 1:
+            raise ValueError('threads must be a positive integer, got {}'.format(value))
+        with self._pool_lock:
+            if self._thread_pool is not None and value != self._threads:
+                self._thread_pool.close()
+                self._thread_pool = None
+            self._threads = value
+
+    def _get_thread_pool(self):
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPool(processes=self._threads)
+            return self._thread_pool
+
+    def _map(self, function, chunks):
+        """
+        Apply the function to each chunk, concurrently if more than one thread
+        is configured.
+
+        Parameters
+        ----------
+        function : callable
+        chunks : List[slice]
+
+        Returns
+        -------
+        None
+        """
+
+        if self._threads > 1 and len(chunks) > 1:
+            self._get_thread_pool().map(function, chunks, chunksize=1)
+        else:
+            for chunk in chunks:
+                function(chunk)
+
+    @property
+    def dtype(self):
+        """
+        numpy.dtype: The dtype of the stored samples.
+        """
+
+        return self._dtype
+
+    def _chunks(self, rows, cols):
+        """
+        Gets the row slices defining the chunks.
+
+        Parameters
+        ----------
+        rows : int
+        cols : int
+
+        Returns
+        -------
+        List[slice]
+        """
+
+        step = max(1, int_func(self._chunk_pixels/max(cols, 1)))
+        return [slice(start, min(start+step, rows)) for start in range(0, rows, step)]
+
+    def decode(self, data, out=None):
+        """
+        Decode stored samples to complex64 data.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            The stored samples, of shape `(rows, cols, 2*bands)`. Any byte order
+            is permitted.
+        out : None|numpy.ndarray
+            The complex64 array of shape `(rows, cols, bands)` into which the data
+            will be decoded. This will be created, if not provided.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+
+        if not isinstance(data, numpy.ndarray):
+            raise ValueError('Requires a numpy.ndarray, got {}'.format(type(data)))
+        if data.ndim != 3 or (data.shape[2] % 2) != 0:
+            raise ValueError('Requires a three-dimensional numpy.ndarray with an even number '
+                             'of bands in the final dimension, got shape {}'.format(data.shape))
+        if data.dtype.name != self._dtype.name:
+            raise ValueError('Requires a numpy.ndarray of {} dtype, got {}'.format(self._dtype.name, data.dtype.name))
+
+        shape = (data.shape[0], data.shape[1], int_func(data.shape[2]/2))
+        if out is None:
+            out = numpy.empty(shape, dtype=numpy.complex64)
+        elif out.shape != shape:
+            raise ValueError('Requires out of shape {}, got {}'.format(shape, out.shape))
+        self._map(
+            lambda chunk: self._decode_chunk(data[chunk], out[chunk]), self._chunks(data.shape[0], data.shape[1]))
+        return out
+
+    def encode(self, data, out=None):
+        """
+        Encode complex data to stored samples.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            The complex64 or complex128 data of shape `(rows, cols)`.
+        out : None|numpy.ndarray
+            The array of shape `(rows, cols, 2)` into which the samples will be
+            encoded, possibly a memory map. This will be created with the stored
+            dtype (including byte order) of the codec, if not provided.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+
+        if not isinstance(data, numpy.ndarray):
+            raise ValueError('Requires a numpy.ndarray, got {}'.format(type(data)))
+        if data.dtype.name not in ('complex64', 'complex128'):
+            raise ValueError('Requires a numpy.ndarray of complex dtype, got {}'.format(data.dtype.name))
+        if data.ndim != 2:
+            raise ValueError('Requires a two-dimensional numpy.ndarray, got {}'.format(data.shape))
+
+        shape = (data.shape[0], data.shape[1], 2)
+        if out is None:
+            out = numpy.empty(shape, dtype=self._dtype)
+        elif out.shape != shape:
+            raise ValueError('Requires out of shape {}, got {}'.format(shape, out.shape))
+        self._map(
+            lambda chunk: self._encode_chunk(data[chunk], out[chunk]), self._chunks(data.shape[0], data.shape[1]))
+        return out
+
+    def _decode_chunk(self, data, out):
+        # the assignment performs any required byte swap
+        out.real = data[:, :, 0::2]
+        out.imag = data[:, :, 1::2]
+
+    def _encode_chunk(self, data, out):
+        raise NotImplementedError
+
+
+class RE32FCodec(PixelCodec):
+    """
+    Codec for the `RE32F_IM32F` pixel type.
+    """
+
+    __slots__ = ()
+    pixel_type = 'RE32F_IM32F'
+    base_dtype = 'f4'
+
+    def _encode_chunk(self, data, out):
+        out[:, :, 0] = data.real
+        out[:, :, 1] = data.imag
+
+
+class RE16ICodec(PixelCodec):
+    """
+    Codec for the `RE16I_IM16I` pixel type. Encoding rounds to the nearest
+    integer, and clips to the int16 limits.
+    """
+
+    __slots__ = ()
+    pixel_type = 'RE16I_IM16I'
+    base_dtype = 'i2'
+
+    def _encode_chunk(self, data, out):
+        i16_info = numpy.iinfo(numpy.int16)
+        for index, component in enumerate([data.real, data.imag]):
+            temp = numpy.rint(component)
+            numpy.clip(temp, i16_info.min, i16_info.max, out=temp)
+            out[:, :, index] = temp
+
+
+class AMP8ICodec(PixelCodec):
+    """
+    Codec for the `AMP8I_PHS8I` pixel type. Decoding is a single lookup into a
+    precomputed table of all 256x256 amplitude/phase combinations. Encoding uses
+    the nearest amplitude table entry, and the nearest phase value.
+    """
+
+    __slots__ = ('_amp_table', '_amp_midpoints', '_amp_spacing', '_lookup')
+    pixel_type = 'AMP8I_PHS8I'
+    base_dtype = 'u1'
+    interleaved = False
+    uses_amp_table = True
+
+    def __init__(self, amp_table=None, byte_order='>', chunk_pixels=None, threads=1):
+        """
+
+        Parameters
+        ----------
+        amp_table : None|numpy.ndarray|list|tuple
+            The 256 element amplitude lookup table. If not provided, the amplitude
+            is the stored value.
+        byte_order : str
+        chunk_pixels : None|int
+        threads : int
+        """
+
+        super(AMP8ICodec, self).__init__(byte_order=byte_order, chunk_pixels=chunk_pixels, threads=threads)
+        self._amp_table = _validate_amp_table(amp_table)
+        if numpy.any(numpy.diff(self._amp_table) < 0):
+            logging.warning('The amplitude table is not non-decreasing, so encoding will be unreliable.')
+        self._amp_midpoints = 0.5*(self._amp_table[1:] + self._amp_table[:-1])
+        # an evenly spaced table permits direct computation of the nearest entry
+        spacing = numpy.diff(self._amp_table)
+        self._amp_spacing = float(spacing[0]) if spacing[0] > 0 and numpy.allclose(spacing, spacing[0]) else None
+        phase = numpy.exp((2j*numpy.pi/256)*numpy.arange(256))
+        # entry 256*amplitude + phase
+        self._lookup = numpy.outer(self._amp_table, phase).astype(numpy.complex64).ravel()
+
+    @property
+    def amp_table(self):
+        """
+        numpy.ndarray: The amplitude lookup table.
+        """
+
+        return self._amp_table
+
+    def _decode_chunk(self, data, out):
+        indices = numpy.left_shift(data[:, :, 0::2], 8, dtype=numpy.uint16)
+        indices |= data[:, :, 1::2]
+        # the indices are always in bounds, and clip mode avoids buffering
+        numpy.take(self._lookup, indices, out=out, mode='clip')
+
+    def _encode_chunk(self, data, out):
+        amplitude = numpy.abs(data)
+        if self._amp_spacing is None:
+            out[:, :, 0] = numpy.searchsorted(self._amp_midpoints, amplitude)
+        else:
+            amplitude -= self._amp_table[0]
+            amplitude *= 1./self._amp_spacing
+            numpy.rint(amplitude, out=amplitude)
+            numpy.clip(amplitude, 0, 255, out=amplitude)
+            out[:, :, 0] = amplitude
+        phase = numpy.angle(data)
+        phase *= 256/(2*numpy.pi)
+        numpy.rint(phase, out=phase)
+        numpy.mod(phase, 256, out=phase)
+        out[:, :, 1] = phase
+
+
+def register_codec(codec_class):
+    """
+    Register a codec class for its pixel type, replacing any codec previously
+    registered for that pixel type.
+
+    Parameters
+    ----------
+    codec_class : type
+        A subclass of :class:`PixelCodec`.
+
+    Returns
+    -------
+    None
+    """
+
+    if not (isinstance(codec_class, type) and issubclass(codec_class, PixelCodec)):
+        raise TypeError('codec_class must be a subclass of PixelCodec, got {}'.format(codec_class))
+    if codec_class.pixel_type is None:
+        raise ValueError('codec_class {} has no pixel_type defined'.format(codec_class))
+    _CODECS[codec_class.pixel_type] = codec_class
+
+
+def get_codec(pixel_type, amp_table=None, byte_order='>', chunk_pixels=None, threads=1):
+    """
+    Gets the codec for the given pixel type.
+
+    Parameters
+    ----------
+    pixel_type : str
+        The SICD PixelType.
+    amp_table : None|numpy.ndarray|list|tuple
+        The amplitude table, only used for `AMP8I_PHS8I`.
+    byte_order : str
+        The byte order of the stored samples.
+    chunk_pixels : None|int
+        The number of pixels processed per chunk.
+    threads : int
+        The number of threads used for processing chunks concurrently.
+
+    Returns
+    -------
+    PixelCodec
+    """
+
+    if pixel_type not in _CODECS:
+        raise ValueError('Pixel Type {} not recognized.'.format(pixel_type))
+    codec_class = _CODECS[pixel_type]
+    if codec_class.uses_amp_table:
+        return codec_class(amp_table=amp_table, byte_order=byte_order, chunk_pixels=chunk_pixels, threads=threads)
+    return codec_class(byte_order=byte_order, chunk_pixels=chunk_pixels, threads=threads)
+
+
+def benchmark_codecs(shape=(1024, 1024), number=5, chunk_pixels=None, threads=1):
+    """
+    Micro-benchmark the decode and encode of each registered codec, for random
+    big-endian data of the given shape.
+
+    Parameters
+    ----------
+    shape : tuple
+        The `(rows, cols)` shape of the test data.
+    number : int
+        The number of repetitions of each operation.
+    chunk_pixels : None|int
+        The number of pixels processed per chunk.
+    threads : int
+        The number of threads used for processing chunks concurrently.
+
+    Returns
+    -------
+    dict
+        Of the form `{pixel_type: {'decode': seconds, 'encode': seconds}}`, giving
+        the best time over the repetitions.
+    """
+
+    rows, cols = int_func(shape[0]), int_func(shape[1])
+    state = numpy.random.RandomState(0)
+    data = (state.normal(scale=100, size=(rows, cols)) +
+            1j*state.normal(scale=100, size=(rows, cols))).astype(numpy.complex64)
+    amp_table = numpy.linspace(0, 500, 256)
+    results = OrderedDict()
+    for pixel_type in _CODECS:
+        codec = get_codec(pixel_type, amp_table=amp_table, chunk_pixels=chunk_pixels, threads=threads)
+        stored = codec.encode(data)
+        decoded = numpy.empty((rows, cols, 1), dtype=numpy.complex64)
+        results[pixel_type] = {
+            'decode': min(timeit.repeat(lambda: codec.decode(stored, out=decoded), number=1, repeat=number)),
+            'encode': min(timeit.repeat(lambda: codec.encode(data, out=stored), number=1, repeat=number))}
+        logging.info(
+            'codec {} for shape {} with {} threads: decode {:0.6f} seconds, encode {:0.6f} seconds'.format(
+                pixel_type, (rows, cols), threads, results[pixel_type]['decode'], results[pixel_type]['encode']))
+    return results
+
+
+register_codec(RE32FCodec)
+register_codec(RE16ICodec)
+register_codec(AMP8ICodec)
@@ -6,13 +6,22 @@ read to SICD or SIO format. The same conversion utility can be used to subset da
 
 import os
 import sys
-import pkgutil
+import importlib
+import time
+import threading
+from collections import OrderedDict
 import numpy
 import logging
 from typing import Union, List, Tuple
 
-from . import __path__ as _complex_package_path, __name__ as _complex_package_name
-from .base import BaseReader
+try:
+    import queue
+except ImportError:
+    # noinspection PyUnresolvedReferences
+    import Queue as queue
+
+from . import __name__ as _complex_package_name
+from .base import BaseReader, BlockSizeTuner, _get_default_block_size
 from .sicd import SICDWriter
 from .sio import SIOWriter
 from .sicd_elements.SICD import SICDType
@@ -33,10 +42,123 @@ __classification__ = "UNCLASSIFIED"
 __author__ = ("Wade Schwartzkopf", "Thomas McCullough")
 
 
+###########
+# The format registry for open_complex
+
+_SIGNATURE_BYTES = 2048 + 8  # enough to find an hdf5 signature at offset 2048
+_HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+# little and big endian, for classic and BigTIFF
+_TIFF_SIGNATURES = (b'II*\x00', b'MM\x00*', b'II+\x00', b'MM\x00+')
+_SIO_SIGNATURES = (
+    b'\xff\x01\x7f\xfe', b'\xfe\x7f\x01\xff', b'\xff\x02\x7f\xfd', b'\xfd\x7f\x02\xff')
+# format module name -> signature check, in the order that they are checked
+_FORMATS = OrderedDict()
+
+
+def _is_nitf(file_name, header):
+    return header.startswith(b'NITF02.10')
+
+
+def _is_sio(file_name, header):
+    return header[:4] in _SIO_SIGNATURES
+
+
+def _is_tiff(file_name, header):
+    return header[:4] in _TIFF_SIGNATURES
+
+
+def _is_hdf5(file_name, header):
+    # the signature may follow a user block of 512 bytes or a larger power of two
+    return any(header[offset:offset+8] == _HDF5_SIGNATURE for offset in [0, 512, 1024, 2048])
+
+
+def _has_file_name(*names):
+    """
+    Gets a signature check for a file of one of the given names, or a directory
+    containing such a file.
+    """
+
+    def signature(file_name, header):
+        if os.path.isdir(file_name):
+            return any(os.path.isfile(os.path.join(file_name, name)) for name in names)
+        return os.path.basename(file_name) in [os.path.basename(name) for name in names]
+    return signature
+
+
+def register_format(module_name, signature=None):
+    """
+    Register a complex format handling module for :func:`open_complex`. The module
+    must provide an `is_a(file_name)` function, and it will only be imported, and
+    `is_a` called, for files which pass the (cheap) signature check. Registering
+    an already registered module replaces its signature check.
+
+    Parameters
+    ----------
+    module_name : str
+        The fully qualified module name.
+    signature : None|callable
+        Of the form `signature(file_name, header)`, where `header` is the bytes
+        at the beginning of the file (empty for a directory), returning `True`
+        if the file may be of this format. If `None`, then `is_a` is always called.
+
+    Returns
+    -------
+    None
+    """
+
+    if signature is not None and not callable(signature):
+        raise TypeError('signature must be callable, got type {}'.format(type(signature)))
+    _FORMATS[module_name] = signature
+
+
+def _read_signature_header(file_name):
+    """
+    Reads the bytes at the beginning of the file used for the signature checks.
+    """
+
+    if not os.path.isfile(file_name):
+        return b''
+    with open(file_name, 'rb') as fi:
+        return fi.read(_SIGNATURE_BYTES)
+
+
+def _get_candidate_formats(file_name):
+    """
+    Gets the names of the registered format modules whose signature check is
+    passed by the given file.
+
+    Parameters
+    ----------
+    file_name : str
+
+    Returns
+    -------
+    List[str]
+    """
+
+    header = _read_signature_header(file_name)
+    return [module_name for module_name, signature in _FORMATS.items()
+            if signature is None or signature(file_name, header)]
+
+
+register_format('{}.sicd'.format(_complex_package_name), _is_nitf)
+register_format('{}.sio'.format(_complex_package_name), _is_sio)
+register_format('{}.csk'.format(_complex_package_name), _is_hdf5)
+register_format('{}.sentinel'.format(_complex_package_name), _has_file_name('manifest.safe'))
+register_format(
+    '{}.radarsat'.format(_complex_package_name),
+    _has_file_name('product.xml', os.path.join('metadata', 'product.xml')))
+register_format('{}.tiff'.format(_complex_package_name), _is_tiff)
+
+
 def open_complex(file_name):
     """
     Given a file, try to find and return the appropriate reader object.
 
+    Only the registered formats (see :func:`register_format`) whose signature
+    check is passed are tried, importing the format module only at that point.
+    Any other format module must be registered to be found.
+
     Parameters
     ----------
     file_name : str
@@ -53,14 +175,9 @@ def open_complex(file_name):
     if not os.path.exists(file_name):
         raise IOError('File {} does not exist.'.format(file_name))
 
-    # Get a list of all the modules that describe SAR complex image file
-    # formats.  For this to work, all of the file format handling modules
-    # must be in the top level of this package.
-    mod_iter = pkgutil.iter_modules(path=_complex_package_path, prefix='{}.'.format(_complex_package_name))
-    module_names = [name for loader, name, ispkg in mod_iter if not ispkg]
-    modules = [sys.modules[names] for names in module_names if __import__(names)]
     # Determine file format and return the proper file reader object
-    for current_mod in modules:
+    for module_name in _get_candidate_formats(file_name):
+        current_mod = importlib.import_module(module_name)
         if hasattr(current_mod, 'is_a'):  # Make sure its a file format handling module
             reader = current_mod.is_a(file_name)
             if reader is not None:
@@ -78,7 +195,8 @@ class Converter(object):
 
     __slots__ = ('_reader', '_file_name', '_writer', '_frame', '_row_limits', '_col_limits')
 
-    def __init__(self, reader, output_directory, output_file=None, frame=None, row_limits=None, col_limits=None, output_format='SICD'):
+    def __init__(self, reader, output_directory, output_file=None, frame=None, row_limits=None, col_limits=None,
+                 output_format='SICD', backend=None):
         """
 
         Parameters
@@ -99,6 +217,10 @@ class Converter(object):
            Column start/stop. Default is all.
         output_format : str
            The output file format to write, from {'SICD', 'SIO'}.  Default is SICD.
+        backend : None|str
+           The writer backend, one of :data:`sarpy.io.complex.bip.WRITER_BACKENDS`.
+           Default is `'memmap'`. The `'sequential'` backends are best suited
+           to sequential writing, i.e. `workers <= 1` in :func:`write_data`.
         """
 
         if not (os.path.exists(output_directory) and os.path.isdir(output_directory)):
@@ -159,7 +281,7 @@ class Converter(object):
         this_sicd = self._update_sicd(this_sicd, this_shape)
         # set up our writer
         self._file_name = output_path
-        self._writer = writer_type(output_path, this_sicd)
+        self._writer = writer_type(output_path, this_sicd, backend=backend)
 
     def _update_sicd(self, sicd, t_size):
         # type: (SICDType, Tuple[int, int]) -> SICDType
@@ -172,16 +294,32 @@ class Converter(object):
             o_sicd.define_geo_image_corners(override=True)
         return o_sicd
 
+    def _get_storage_row_length(self):
+        """
+        Gets the length of a storage row. The blocks are planned along the file
+        storage order of the reader, so a storage row spans the (limited) columns,
+        unless the symmetry dictates an axis swap, when it spans the rows.
+        """
+
+        if self._reader._get_storage_symmetry(self._frame)[2]:
+            return self._row_limits[1] - self._row_limits[0]
+        else:
+            return self._col_limits[1] - self._col_limits[0]
+
     def _get_rows_per_block(self, max_block_size):
+        """
+        Gets the number of storage rows per block, see :func:`_get_storage_row_length`.
+        """
+
         pixel_type = self._writer.sicd_meta.ImageData.PixelType
-        cols = int_func(self._writer.sicd_meta.ImageData.NumCols)
-        bytes_per_row = 8*cols
+        row_length = self._get_storage_row_length()
+        bytes_per_row = 8*row_length
         if pixel_type == 'RE32F_IM32F':
-            bytes_per_row = 8*cols
+            bytes_per_row = 8*row_length
         elif pixel_type == 'RE16I_IM16I':
-            bytes_per_row = 4*cols
+            bytes_per_row = 4*row_length
         elif pixel_type == 'AMP8I_PHS8I':
-            bytes_per_row = 2*cols
+            bytes_per_row = 2*row_length
         return max(1, int_func(round(max_block_size/bytes_per_row)))
 
     @property
@@ -189,7 +327,7 @@ class Converter(object):
         """SICDWriter|SIOWriter: The writer instance."""
         return self._writer
 
-    def write_data(self, max_block_size=None):
+    def write_data(self, max_block_size=None, workers=0, max_memory=None, auto_tune=False):
         """
         Assuming that the desired changes have been made to the writer instance
         nitf header tags, write the data.
@@ -198,7 +336,22 @@ class Converter(object):
         ----------
         max_block_size : None|int
             (nominal) maximum block size in bytes. Minimum value is 2**20 = 1 MB.
-            Default value is 2**26 = 64MB.
+            Default value is 2**26 = 64MB, or if `auto_tune`, the default of
+            :class:`sarpy.io.complex.base.BlockSizeTuner` based on the physical memory.
+        workers : int
+            The number of worker threads which encode and write blocks. If `0`,
+            then each block is written as soon as it is read, while the next block
+            is read in the background. Otherwise, the reading of the next block,
+            and the encoding and writing of the previous blocks all overlap.
+        max_memory : None|int
+            Only used if `workers > 0`, the (nominal) maximum memory in bytes
+            occupied by the blocks in flight - i.e. read, but not yet written.
+            Minimum value is 2**20 = 1 MB. Default value is `(workers + 1)*max_block_size`.
+            The block size is reduced, if necessary, so that one block fits.
+        auto_tune : bool
+            If `True`, then the block size is tuned using the read and write throughput
+            measured over the first few blocks, up to the (nominal) maximum block size,
+            see :class:`sarpy.io.complex.base.BlockSizeTuner`.
 
         Returns
         -------
@@ -207,21 +360,117 @@ class Converter(object):
 
         # validate max_block_size
         if max_block_size is None:
-            max_block_size = 2**26
+            max_block_size = _get_default_block_size() if auto_tune else 2**26
         else:
             max_block_size = int_func(max_block_size)
             if max_block_size < 2**20:
                 max_block_size = 2**20
 
-        # now, write the data
+        workers = int_func(workers)
+        if workers < 0:
+            raise ValueError('workers must be non-negative, got {}'.format(workers))
+
         rows_per_block = self._get_rows_per_block(max_block_size)
-        block_start = self._row_limits[0]
-        while block_start < self._row_limits[1]:
-            block_end = min(block_start + rows_per_block, self._row_limits[1])
-            data = self._reader[block_start:block_end, self._col_limits[0]:self._col_limits[1], self._frame]
-            self._writer.write_chip(data, start_indices=(block_start - self._row_limits[0], 0))
-            logging.info('Done writing block {}-{} to file {}'.format(block_start, block_end, self._file_name))
-            block_start = block_end
+        if workers == 0:
+            tuner = self._get_tuner(max_block_size) if auto_tune else None
+            # now, write the data - the next block is read while the current one is written
+            for data, (row_start, col_start) in self._reader.iter_blocks(
+                    rows_per_block=rows_per_block if tuner is None else tuner, cols=self._col_limits,
+                    index=self._frame, prefetch=1, rows=self._row_limits):
+                self._write_block(data, row_start, col_start, tuner=tuner)
+            return
+
+        # validate max_memory
+        if max_memory is None:
+            max_memory = (workers + 1)*max_block_size
+        else:
+            max_memory = int_func(max_memory)
+            if max_memory < 2**20:
+                max_memory = 2**20
+        # the blocks in flight are complex64 data
+        bytes_per_row = 8*self._get_storage_row_length()
+        if auto_tune:
+            # the semaphore counts blocks, so the budget must accommodate the largest trial block
+            tuner = self._get_tuner(min(max_block_size, max_memory))
+            max_blocks = max(1, int_func(max_memory//(bytes_per_row*tuner.trial_rows[-1])))
+            self._write_pipelined(tuner, workers, max_blocks, tuner=tuner)
+            return
+        rows_per_block = max(1, min(rows_per_block, int_func(max_memory//bytes_per_row)))
+        max_blocks = max(1, int_func(max_memory//(bytes_per_row*rows_per_block)))
+        self._write_pipelined(rows_per_block, workers, max_blocks)
+
+    def _get_tuner(self, max_block_size):
+        """
+        Gets the block size tuner, for the complex64 blocks in flight.
+        """
+
+        return BlockSizeTuner(8*self._get_storage_row_length(), max_block_size=max_block_size)
+
+    def _write_block(self, data, row_start, col_start, tuner=None):
+        start_time = time.time()
+        self._writer.write_chip(
+            data, start_indices=(row_start - self._row_limits[0], col_start - self._col_limits[0]))
+        if tuner is not None:
+            swap = self._reader._get_storage_symmetry(self._frame)[2]
+            tuner.record(data.shape[1] if swap else data.shape[0], time.time() - start_time)
+        logging.info(
+            'Done writing block of shape {} at ({}, {}) to file {}'.format(
+                data.shape, row_start, col_start, self._file_name))
+
+    def _write_pipelined(self, rows_per_block, workers, max_blocks, tuner=None):
+        """
+        Writes the data using a pipeline. The blocks are read in this thread,
+        and handed to `workers` threads through a queue for encoding and writing.
+        At most `max_blocks` blocks are in flight at any time. If `tuner` is
+        provided, then the write times are recorded with it.
+        """
+
+        blocks_available = threading.Semaphore(max_blocks)
+        block_queue = queue.Queue()
+        errors = []
+        done = object()
+
+        def worker():
+            while True:
+                item = block_queue.get()
+                if item is done:
+                    return
+                try:
+                    if len(errors) == 0:
+                        self._write_block(*item, tuner=tuner)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    del item
+                    blocks_available.release()
+
+        threads = [threading.Thread(target=worker, name='converter_worker_{}'.format(i)) for i in range(workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            # the blocks are read synchronously, so that the memory is bounded
+            blocks = self._reader.iter_blocks(
+                rows_per_block=rows_per_block, cols=self._col_limits, index=self._frame,
+                prefetch=0, rows=self._row_limits)
+            while True:
+                blocks_available.acquire()
+                if len(errors) > 0:
+                    break
+                try:
+                    data, (row_start, col_start) = next(blocks)
+                except StopIteration:
+                    break
+                block_queue.put((data, row_start, col_start))
+                del data
+        finally:
+            for _ in threads:
+                block_queue.put(done)
+            for thread in threads:
+                thread.join()
+        if len(errors) > 0:
+            raise errors[0]
 
     def __del__(self):
         if hasattr(self, '_writer'):
@@ -243,7 +492,8 @@ class Converter(object):
 
 def conversion_utility(
         input_file, output_directory, output_files=None, frames=None, output_format='SICD',
-        row_limits=None, column_limits=None, max_block_size=None):
+        row_limits=None, column_limits=None, max_block_size=None, workers=0, max_memory=None, backend=None,
+        auto_tune=False):
     """
     Copy SAR complex data to a file of the specified format.
 
@@ -266,6 +516,14 @@ def conversion_utility(
        Columns start/stop. Default is all.
     max_block_size : None|int
         (nominal) maximum block size in bytes. Passed through to the Converter class.
+    workers : int
+        The number of worker threads for pipelined writing. Passed through to the Converter class.
+    max_memory : None|int
+        (nominal) maximum memory in bytes for pipelined writing. Passed through to the Converter class.
+    backend : None|str
+        The writer backend. Passed through to the Converter class.
+    auto_tune : bool
+        Whether to tune the block size from the measured throughput. Passed through to the Converter class.
 
     Returns
     -------
@@ -368,5 +626,7 @@ def conversion_utility(
         logging.info('Converting frame {} from file {} to file {}'.format(frame, input_file, o_file))
         with Converter(
                 reader, output_directory, output_file=o_file, frame=frame,
-                row_limits=row_lims, col_limits=col_lims, output_format=output_format) as converter:
-            converter.write_data(max_block_size=max_block_size)
+                row_limits=row_lims, col_limits=col_lims, output_format=output_format,
+                backend=backend) as converter:
+            converter.write_data(
+                max_block_size=max_block_size, workers=workers, max_memory=max_memory, auto_tune=auto_tune)
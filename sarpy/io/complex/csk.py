@@ -5,11 +5,11 @@ Functionality for reading Cosmo Skymed data into a SICD model.
 
 from collections import OrderedDict
 from typing import Tuple, Dict
+import threading
 import warnings
 
 import numpy
 from numpy.polynomial import polynomial
-from scipy.constants import speed_of_light
 from datetime import date
 
 try:
@@ -36,6 +36,7 @@ from .sicd_elements.RMA import RMAType, INCAType
 from .sicd_elements.Radiometric import RadiometricType
 from ...geometry import point_projection
 from .base import BaseChipper, BaseReader
+from .sicd_elements.utils import speed_of_light
 from .utils import get_seconds, fit_time_coa_polynomial
 
 __classification__ = "UNCLASSIFIED"
@@ -491,20 +492,146 @@ class CSKDetails(object):
 ################
 # The CSK chipper and reader
 
+class HDF5Handle(object):
+    """
+    A lazily opened, read-only :code:`h5py.File` handle, to be shared by the
+    chippers for the bands of a given file, so that the file is not reopened
+    (and the chunk cache not discarded) for every read. The raw data chunk cache
+    of the handle is configurable.
+    """
+
+    __slots__ = ('_file_name', '_chunk_cache_bytes', '_chunk_cache_slots', '_file', '_lock')
+
+    def __init__(self, file_name, chunk_cache_bytes=2**26, chunk_cache_slots=10007):
+        """
+
+        Parameters
+        ----------
+        file_name : str
+        chunk_cache_bytes : int
+            The size in bytes of the raw data chunk cache for each dataset. Default
+            is 2**26 = 64MB.
+        chunk_cache_slots : int
+            The number of slots in the chunk cache hash table, which should be
+            a prime number significantly larger than the number of cached chunks.
+        """
+
+        self._file_name = file_name
+        self._chunk_cache_bytes = int(chunk_cache_bytes)
+        self._chunk_cache_slots = int(chunk_cache_slots)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def file_name(self):
+        """
+        str: The file name.
+        """
+
+        return self._file_name
+
+    @property
+    def chunk_cache_bytes(self):
+        """
+        int: The size in bytes of the raw data chunk cache for each dataset.
+        """
+
+        return self._chunk_cache_bytes
+
+    def get_file(self):
+        """
+        Gets the open file object, opening the file if necessary.
+
+        Returns
+        -------
+        h5py.File
+        """
+
+        with self._lock:
+            if self._file is None:
+                self._file = h5py.File(
+                    self._file_name, 'r', rdcc_nbytes=self._chunk_cache_bytes, rdcc_nslots=self._chunk_cache_slots)
+            return self._file
+
+    def close(self):
+        """
+        Closes the file, if open. It will be reopened by the next call to :func:`get_file`.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
 class CSKBandChipper(BaseChipper):
-    __slots__ = ('_file_name', '_band_name')
+    """
+    Chipper for the `SBI` dataset of a given band. Reads are made through a
+    persistent file handle, and are broken up along the chunk boundaries of the
+    dataset, so that each read selection touches only a single row of chunks.
+    """
+
+    __slots__ = ('_file_name', '_band_name', '_handle')
+
+    def __init__(self, file_name, band_name, data_size, symmetry, handle=None):
+        """
+
+        Parameters
+        ----------
+        file_name : str
+        band_name : str
+        data_size : tuple
+        symmetry : tuple
+        handle : None|HDF5Handle
+            The (shared) file handle, which will be created if not provided.
+        """
 
-    def __init__(self, file_name, band_name, data_size, symmetry):
         self._file_name = file_name
         self._band_name = band_name
+        if handle is None:
+            handle = HDF5Handle(file_name)
+        self._handle = handle
         super(CSKBandChipper, self).__init__(data_size, symmetry=symmetry, complex_type=True)
 
-    def _read_raw_fun(self, range1, range2):
+    def _get_dataset(self):
+        return self._handle.get_file()['{}/SBI'.format(self._band_name)]
+
+    def _read_raw_fun(self, range1, range2, out=None):
         r1, r2 = self._reorder_arguments(range1, range2)
-        with h5py.File(self._file_name, 'r') as hf:
-            gp = hf['{}/SBI'.format(self._band_name)]
-            data = gp[r1[0]:r1[1]:r1[2], r2[0]:r2[1]:r2[2], :]
-        return data
+        # NB: a "stop" of -1 with negative step is understood as running through 0
+        rows = numpy.arange(*r1, dtype=numpy.int64)
+        cols = numpy.arange(*r2, dtype=numpy.int64)
+        dataset = self._get_dataset()
+        data = numpy.empty((rows.size, cols.size, dataset.shape[2]), dtype=dataset.dtype)
+        if rows.size > 0 and cols.size > 0:
+            # h5py requires increasing selections, so always read forwards
+            # and then reverse the order, if necessary
+            if r1[2] < 0:
+                rows = rows[::-1]
+            col_slice = slice(int(cols.min()), int(cols.max()) + 1, abs(r2[2]))
+            chunk_rows = dataset.shape[0] if dataset.chunks is None else dataset.chunks[0]
+            chunk_ids = rows//chunk_rows
+            bounds = numpy.concatenate(([0, ], numpy.nonzero(numpy.diff(chunk_ids))[0] + 1, [rows.size, ]))
+            for begin, end in zip(bounds[:-1], bounds[1:]):
+                begin, end = int(begin), int(end)
+                row_slice = slice(int(rows[begin]), int(rows[end-1]) + 1, abs(r1[2]))
+                # each piece of data is contiguous, since it's a range of whole rows
+                dataset.read_direct(data[begin:end], source_sel=numpy.s_[row_slice, col_slice, :])
+            if r1[2] < 0:
+                data = data[::-1]
+            if r2[2] < 0:
+                data = data[:, ::-1]
+        if out is None:
+            return data
+        out[:] = numpy.reshape(data, out.shape)
+        return out
 
 
 class CSKReader(BaseReader):
@@ -512,15 +639,18 @@ class CSKReader(BaseReader):
     Gets a reader type object for Cosmo Skymed files
     """
 
-    __slots__ = ('_csk_details', )
+    __slots__ = ('_csk_details', '_handle')
 
-    def __init__(self, csk_details):
+    def __init__(self, csk_details, chunk_cache_bytes=2**26):
         """
 
         Parameters
         ----------
         csk_details : str|CSKDetails
             file name or CSKDetails object
+        chunk_cache_bytes : int
+            The size in bytes of the HDF5 raw data chunk cache for each band. This
+            should hold at least one row of chunks of the image data.
         """
 
         if isinstance(csk_details, str):
@@ -528,14 +658,30 @@ class CSKReader(BaseReader):
         if not isinstance(csk_details, CSKDetails):
             raise TypeError('The input argument for RadarSatCSKReader must be a '
                             'filename or CSKDetails object')
+        self._csk_details = csk_details
         sicd_data, shape_dict, symmetry = csk_details.get_sicd_collection()
+        # all the band chippers share one file handle
+        self._handle = HDF5Handle(csk_details.file_name, chunk_cache_bytes=chunk_cache_bytes)
         chippers = []
         sicds = []
         for band_name in sicd_data:
             sicds.append(sicd_data[band_name])
-            chippers.append(CSKBandChipper(csk_details.file_name, band_name, shape_dict[band_name], symmetry))
+            chippers.append(CSKBandChipper(
+                csk_details.file_name, band_name, shape_dict[band_name], symmetry, handle=self._handle))
         super(CSKReader, self).__init__(tuple(sicds), tuple(chippers))
 
+    def close(self):
+        """
+        Closes the underlying file handle. It will be reopened, if any further
+        reads are performed.
+
+        Returns
+        -------
+        None
+        """
+
+        self._handle.close()
+
     def get_suggestive_name(self, frame=0):
         frame = int(frame)
         out = super(CSKReader, self).get_suggestive_name(frame=frame)
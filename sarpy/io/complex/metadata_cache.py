@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+An optional on-disk cache of the fully derived metadata for complex products,
+so that reopening an already seen product skips the parsing, derivation and
+fitting of the metadata.
+
+The entries are keyed by the absolute path, size and modification time of the
+file, and of any other files from which the metadata is derived, and the sarpy
+version, and are stored in pickle format. The total size of
+the cache is capped, evicting the least recently used entries. The cache is
+disabled by default, and is enabled globally using :func:`enable_metadata_cache`.
+"""
+
+import os
+import sys
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Union
+
+try:
+    # noinspection PyPep8Naming
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from ...__about__ import __version__
+
+int_func = int
+if sys.version_info[0] < 3:
+    # noinspection PyUnresolvedReferences
+    int_func = long  # to accommodate 32-bit python 2
+
+__classification__ = "UNCLASSIFIED"
+__author__ = "Thomas McCullough"
+
+
+_CACHE_SUFFIX = '.pkl'
+
+
+class MetadataCache(object):
+    """
+    A directory based cache of metadata objects, with a least recently used
+    size cap. This is safe for use from multiple threads, and for use by multiple
+    processes sharing the directory.
+    """
+
+    __slots__ = ('_directory', '_max_bytes', '_lock')
+
+    def __init__(self, directory=None, max_bytes=2**28):
+        """
+
+        Parameters
+        ----------
+        directory : None|str
+            The cache directory, which will be created if necessary. The default
+            is `~/.sarpy/metadata_cache`.
+        max_bytes : int
+            The maximum total size in bytes of the cache entries. Default is 2**28 = 256MB.
+        """
+
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.sarpy', 'metadata_cache')
+        max_bytes = int_func(max_bytes)
+        if max_bytes < 0:
+            raise ValueError('max_bytes must be non-negative, got {}'.format(max_bytes))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        """
+        str: The cache directory.
+        """
+
+        return self._directory
+
+    @property
+    def max_bytes(self):
+        """
+        int: The maximum total size in bytes of the cache entries.
+        """
+
+        return self._max_bytes
+
+    @property
+    def current_bytes(self):
+        """
+        int: The current total size in bytes of the cache entries.
+        """
+
+        return sum(size for _, size, _ in self._list_entries())
+
+    def _list_entries(self):
+        """
+        Gets the cache entries.
+
+        Returns
+        -------
+        List[Tuple[str, int, float]]
+            The path, size and access time of each entry.
+        """
+
+        entries = []
+        for name in os.listdir(self._directory):
+            if not name.endswith(_CACHE_SUFFIX):
+                continue
+            path = os.path.join(self._directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # removed by another process
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    @staticmethod
+    def get_key(file_name, kind, dependencies=None):
+        """
+        Gets the cache key for the given file.
+
+        Parameters
+        ----------
+        file_name : str
+        kind : str
+            Identifies the type of metadata, since more than one reader may use
+            the same file.
+        dependencies : None|List[str]
+            The other files from which the metadata is derived, so that modifying
+            any of these also invalidates the entry. A dependency which does not
+            exist is permitted, and is recorded as missing.
+
+        Returns
+        -------
+        None|str
+            `None` if the file does not exist.
+        """
+
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return None
+        parts = [kind, os.path.abspath(file_name), str(stat.st_size), repr(stat.st_mtime), __version__]
+        if dependencies is not None:
+            for dependency in dependencies:
+                parts.append(os.path.abspath(dependency))
+                try:
+                    stat = os.stat(dependency)
+                except OSError:
+                    parts.append('missing')
+                    continue
+                parts.extend([str(stat.st_size), repr(stat.st_mtime)])
+        identifier = '|'.join(parts)
+        return hashlib.sha1(identifier.encode('utf-8')).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self._directory, key + _CACHE_SUFFIX)
+
+    def get(self, file_name, kind, dependencies=None):
+        """
+        Gets the cached metadata for the given file.
+
+        Parameters
+        ----------
+        file_name : str
+        kind : str
+        dependencies : None|List[str]
+            See :meth:`get_key`.
+
+        Returns
+        -------
+        None|object
+            `None` if there is no (valid) entry.
+        """
+
+        key = self.get_key(file_name, kind, dependencies=dependencies)
+        if key is None:
+            return None
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as fi:
+                value = pickle.load(fi)
+        except (IOError, OSError):
+            return None
+        except Exception as e:
+            logging.warning('Removing unreadable metadata cache entry {}, got error {}'.format(path, e))
+            self._remove(path)
+            return None
+        try:
+            os.utime(path, None)  # mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def put(self, file_name, kind, value, dependencies=None):
+        """
+        Stores the metadata for the given file, and evicts the least recently
+        used entries as necessary to respect the size cap.
+
+        Parameters
+        ----------
+        file_name : str
+        kind : str
+        value : object
+            Any picklable object.
+        dependencies : None|List[str]
+            See :meth:`get_key`.
+
+        Returns
+        -------
+        None
+        """
+
+        key = self.get_key(file_name, kind, dependencies=dependencies)
+        if key is None:
+            return
+        path = self._get_path(key)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as fi:
+                pickle.dump(value, fi, protocol=pickle.HIGHEST_PROTOCOL)
+            if os.path.exists(path):
+                self._remove(path)
+            os.rename(temp_path, path)
+        except Exception as e:
+            logging.warning('Failed writing metadata cache entry for file {}, got error {}'.format(file_name, e))
+            self._remove(temp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._list_entries(), key=lambda entry: entry[2])
+            total = sum(entry[1] for entry in entries)
+            for path, size, _ in entries:
+                if total <= self._max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """
+        Removes all entries.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            for path, _, _ in self._list_entries():
+                self._remove(path)
+
+    def get_or_create(self, file_name, kind, create, dependencies=None):
+        """
+        Gets the cached metadata for the given file, or creates and stores it.
+
+        Parameters
+        ----------
+        file_name : str
+        kind : str
+        create : callable
+            Creates the metadata, called with no arguments.
+        dependencies : None|List[str]
+            See :meth:`get_key`.
+
+        Returns
+        -------
+        object
+        """
+
+        value = self.get(file_name, kind, dependencies=dependencies)
+        if value is None:
+            value = create()
+            self.put(file_name, kind, value, dependencies=dependencies)
+        return value
+
+
+_metadata_cache = None  # type: Union[None, MetadataCache]
+
+
+def enable_metadata_cache(directory=None, max_bytes=2**28):
+    """
+    Enables the global metadata cache, used by the format readers.
+
+    Parameters
+    ----------
+    directory : None|str
+        See :class:`MetadataCache`.
+    max_bytes : int
+        See :class:`MetadataCache`.
+
+    Returns
+    -------
+    MetadataCache
+    """
+
+    global _metadata_cache
+    _metadata_cache = MetadataCache(directory=directory, max_bytes=max_bytes)
+    return _metadata_cache
+
+
+def disable_metadata_cache():
+    """
+    Disables the global metadata cache. The entries on disk are retained.
+
+    Returns
+    -------
+    None
+    """
+
+    global _metadata_cache
+    _metadata_cache = None
+
+
+def get_metadata_cache():
+    """
+    Gets the global metadata cache.
+
+    Returns
+    -------
+    None|MetadataCache
+        `None` if the cache is disabled.
+    """
+
+    return _metadata_cache
+
+
+def load_metadata(file_name, kind, create, dependencies=None):
+    """
+    Gets the metadata for the given file from the global metadata cache, if it
+    is enabled, creating it if necessary. Otherwise, the metadata is simply created.
+
+    Parameters
+    ----------
+    file_name : str
+    kind : str
+        Identifies the type of metadata.
+    create : callable
+        Creates the metadata, called with no arguments.
+    dependencies : None|List[str]
+        The other files from which the metadata is derived. **These must be
+        provided** for metadata which is not derived solely from `file_name`,
+        since otherwise modifying them will not invalidate the cached entry.
+
+    Returns
+    -------
+    object
+    """
+
+    cache = _metadata_cache
+    if cache is None:
+        return create()
+    return cache.get_or_create(file_name, kind, create, dependencies=dependencies)
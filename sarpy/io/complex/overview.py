@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+"""
+Functionality for building and reading a reduced resolution overview pyramid for
+complex data, which is persisted in a sidecar file. The pyramid consists of the
+magnitude of the data at reduction factors 2, 4, 8, etc, and is constructed in a
+single streaming pass through the data. Reads at coarse resolution (i.e. large
+steps) can then be served from the pyramid, rather than from the full resolution
+complex data.
+
+The sidecar file consists of an 8 byte magic number, the (little-endian, 8 byte
+unsigned integer) offset to the start of the data, the (little-endian, 8 byte unsigned
+integer) length of the header, a JSON header, and then the levels stored in order
+as little-endian float32 arrays.
+"""
+
+import os
+import sys
+import json
+import struct
+import logging
+import tempfile
+
+import numpy
+
+from .base import BaseReader
+
+int_func = int
+if sys.version_info[0] < 3:
+    # noinspection PyUnresolvedReferences
+    int_func = long  # to accommodate for 32-bit python 2
+
+
+__classification__ = "UNCLASSIFIED"
+__author__ = "Thomas McCullough"
+
+
+_MAGIC = b'SARPYOVR'
+_VERSION = 1
+_ALIGNMENT = 4096
+_PREFIX = struct.Struct('<8sQQ')
+_METHODS = ('power', 'decimate')
+# os.replace is not available in python 2, where os.rename replaces on posix
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _get_indices(arg, size):
+    """
+    Gets the explicit array of indices for a range argument of the form used in
+    :func:`BaseReader.read_chip`.
+
+    Parameters
+    ----------
+    arg : None|int|tuple
+    size : int
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+
+    start, stop, step = None, None, None
+    if isinstance(arg, (list, numpy.ndarray)):
+        arg = tuple(arg)
+    if arg is None:
+        pass
+    elif isinstance(arg, tuple):
+        if len(arg) == 1:
+            step = arg[0]
+        elif len(arg) == 2:
+            stop, step = arg
+        elif len(arg) == 3:
+            start, stop, step = arg
+        else:
+            raise ValueError('Range argument {} has too many entries'.format(arg))
+    else:
+        step = arg
+    return numpy.arange(*slice(start, stop, step).indices(size), dtype=numpy.int64)
+
+
+def _reduce_by_two(sums, counts):
+    """
+    Sums the entries of the arrays over 2x2 cells, where partial cells at the
+    edges are accommodated.
+
+    Parameters
+    ----------
+    sums : numpy.ndarray
+    counts : numpy.ndarray
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+    """
+
+    def reduce(array):
+        rows, cols = array.shape
+        if rows % 2 != 0 or cols % 2 != 0:
+            padded = numpy.zeros((rows + rows % 2, cols + cols % 2), dtype=array.dtype)
+            padded[:rows, :cols] = array
+            array = padded
+        return array.reshape((array.shape[0]//2, 2, array.shape[1]//2, 2)).sum(axis=(1, 3))
+
+    return reduce(sums), reduce(counts)
+
+
+class OverviewPyramid(object):
+    """
+    A reduced resolution magnitude pyramid, read from a sidecar file constructed
+    using :func:`build_overview`.
+    """
+
+    __slots__ = ('_file_name', '_header', '_levels', '_reader', '_index')
+
+    def __init__(self, file_name, reader=None, index=0):
+        """
+
+        Parameters
+        ----------
+        file_name : str
+            The overview sidecar file name.
+        reader : None|BaseReader
+            The reader for the full resolution data, which is used for reads at
+            finer resolution than the first pyramid level.
+        index : int
+            The reader index to which the overview applies.
+        """
+
+        self._file_name = file_name
+        with open(file_name, 'rb') as fi:
+            magic, data_offset, header_length = _PREFIX.unpack(fi.read(_PREFIX.size))
+            if magic != _MAGIC:
+                raise IOError('File {} is not an overview file'.format(file_name))
+            self._header = json.loads(fi.read(header_length).decode('utf-8'))
+        self._levels = tuple(
+            numpy.memmap(file_name, dtype='<f4', mode='r', offset=data_offset + entry['offset'],
+                         shape=tuple(entry['shape']))
+            for entry in self._header['levels'])
+        if reader is not None and not isinstance(reader, BaseReader):
+            raise TypeError('reader must be a BaseReader instance, got type {}'.format(type(reader)))
+        self._reader = reader
+        self._index = int_func(index)
+
+    @property
+    def file_name(self):
+        """
+        str: The overview sidecar file name.
+        """
+
+        return self._file_name
+
+    @property
+    def data_size(self):
+        """
+        Tuple[int, int]: The size of the full resolution data.
+        """
+
+        return tuple(self._header['data_size'])
+
+    @property
+    def source_file(self):
+        """
+        None|str: The source file, if the overview was built from a file name.
+        """
+
+        return self._header.get('source_file', None)
+
+    @property
+    def method(self):
+        """
+        str: The reduction method, one of `'power'` or `'decimate'`.
+        """
+
+        return self._header['method']
+
+    @property
+    def factors(self):
+        """
+        Tuple[int]: The reduction factor of each level.
+        """
+
+        return tuple(entry['factor'] for entry in self._header['levels'])
+
+    def get_level(self, level):
+        """
+        Gets the magnitude array for the given level. Note that level `0` corresponds
+        to reduction factor 2.
+
+        Parameters
+        ----------
+        level : int
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+
+        return self._levels[level]
+
+    def matches(self, index, data_size):
+        """
+        Was the overview built for the given reader index and data size?
+
+        Parameters
+        ----------
+        index : int
+        data_size : Tuple[int, int]
+
+        Returns
+        -------
+        bool
+        """
+
+        return self._header.get('index', None) == int_func(index) and \
+            tuple(self._header['data_size']) == tuple(int_func(entry) for entry in data_size)
+
+    def is_current(self, source_file=None):
+        """
+        Does the overview correspond to the current state of the source file? This
+        compares the size and modification time recorded when the overview was built.
+
+        Parameters
+        ----------
+        source_file : None|str
+            Defaults to the source file recorded in the overview, if any.
+
+        Returns
+        -------
+        bool
+        """
+
+        if source_file is None:
+            source_file = self._header.get('source_file', None)
+        if source_file is None or not os.path.isfile(source_file):
+            return False
+        stat = os.stat(source_file)
+        return self._header.get('source_size', None) == stat.st_size and \
+            self._header.get('source_mtime', None) == stat.st_mtime
+
+    def read_magnitude(self, range1, range2):
+        """
+        Read the magnitude of the data for the given range. This is served from
+        the coarsest pyramid level whose reduction factor does not exceed the smaller
+        of the two steps, so the result has the same shape as for the full resolution
+        data. If the steps are too small for any level, the full resolution data is
+        read using the reader.
+
+        Parameters
+        ----------
+        range1 : None|int|tuple
+            The row range, as for :func:`BaseReader.read_chip`.
+        range2 : None|int|tuple
+            The column range, as for :func:`BaseReader.read_chip`.
+
+        Returns
+        -------
+        numpy.ndarray
+            The float32 magnitude array.
+        """
+
+        rows = _get_indices(range1, self.data_size[0])
+        cols = _get_indices(range2, self.data_size[1])
+        step = min(abs(rows[1] - rows[0]) if rows.size > 1 else 1, abs(cols[1] - cols[0]) if cols.size > 1 else 1)
+        level = None
+        for i, factor in enumerate(self.factors):
+            if factor <= step:
+                level = i
+        if level is None:
+            if self._reader is None:
+                raise ValueError(
+                    'The requested step {} is finer than any overview level, and '
+                    'no reader has been provided.'.format(step))
+            return numpy.abs(self._reader.read_chip(range1, range2, index=self._index)).astype(numpy.float32)
+        factor = self.factors[level]
+        return numpy.array(self._levels[level][numpy.ix_(rows//factor, cols//factor)])
+
+
+def _get_default_overview_file(source_file, index):
+    """
+    Gets the default overview file name, which is `<file name>.ovr` for index `0`,
+    and `<file name>.<index>.ovr` otherwise.
+    """
+
+    if index == 0:
+        return source_file + '.ovr'
+    return '{}.{}.ovr'.format(source_file, index)
+
+
+def _fill_levels(reader, index, method, file_name, data_offset, levels, data_size):
+    """
+    Populates the levels of the (new) overview file in a single streaming pass
+    through the data.
+    """
+
+    max_factor = levels[-1]['factor']
+    level_arrays = [
+        numpy.memmap(file_name, dtype='<f4', mode='r+', offset=data_offset + entry['offset'],
+                     shape=tuple(entry['shape']))
+        for entry in levels]
+
+    # the blocks must be aligned with the coarsest level cells
+    lead_size = data_size[1] if reader._get_storage_symmetry(index)[2] else data_size[0]
+    other_size = data_size[0] + data_size[1] - lead_size
+    rows_per_block = max_factor*max(1, int_func(2**26/(8*other_size*max_factor)))
+    rows_per_block = min(rows_per_block, max_factor*int_func(numpy.ceil(lead_size/float(max_factor))))
+    for block, (row_start, col_start) in reader.iter_blocks(rows_per_block=rows_per_block, index=index):
+        if method == 'power':
+            sums = numpy.abs(block).astype(numpy.float32)
+            sums *= sums
+            counts = numpy.ones(block.shape, dtype=numpy.float32)
+        for entry, array in zip(levels, level_arrays):
+            factor = entry['factor']
+            first_row, first_col = row_start//factor, col_start//factor
+            if method == 'power':
+                # noinspection PyUnboundLocalVariable
+                sums, counts = _reduce_by_two(sums, counts)
+                array[first_row:first_row+sums.shape[0], first_col:first_col+sums.shape[1]] = numpy.sqrt(sums/counts)
+            else:
+                values = numpy.abs(block[::factor, ::factor])
+                array[first_row:first_row+values.shape[0], first_col:first_col+values.shape[1]] = values
+        logging.debug('Processed overview block at ({}, {})'.format(row_start, col_start))
+
+    for array in level_arrays:
+        array.flush()
+    del level_arrays
+
+
+def build_overview(reader, overview_file=None, index=0, method='power', min_size=256, max_levels=None):
+    """
+    Build an overview pyramid in a single streaming pass through the data, and
+    persist it in a sidecar file.
+
+    Parameters
+    ----------
+    reader : str|BaseReader
+        The reader, or the name of a file which can be opened using
+        :func:`sarpy.io.complex.open`.
+    overview_file : None|str
+        The overview file name. This defaults to `<file name>.ovr` for index `0`,
+        and `<file name>.<index>.ovr` otherwise, in the event that `reader` is a
+        file name, and is otherwise required.
+    index : int
+        The reader index.
+    method : str
+        One of `'power'`, where each level is the square root of the mean power
+        over each cell, or `'decimate'`, where each level is the magnitude of the
+        first entry of each cell.
+    min_size : int
+        Levels are added until both dimensions of the coarsest level are at
+        most this size.
+    max_levels : None|int
+        The maximum number of levels.
+
+    Returns
+    -------
+    OverviewPyramid
+    """
+
+    index = int_func(index)
+    source_file = None
+    if isinstance(reader, str):
+        from .converter import open_complex
+        source_file = reader
+        reader = open_complex(source_file)
+        if overview_file is None:
+            overview_file = _get_default_overview_file(source_file, index)
+    if not isinstance(reader, BaseReader):
+        raise TypeError('reader must be a file name or BaseReader instance, got type {}'.format(type(reader)))
+    if overview_file is None:
+        raise ValueError('overview_file must be provided, unless reader is a file name')
+    if method not in _METHODS:
+        raise ValueError('method must be one of {}, got {}'.format(_METHODS, method))
+
+    data_size = tuple(int_func(entry) for entry in reader.get_data_size_as_tuple()[index])
+
+    # determine the level structure
+    levels = []
+    offset = 0
+    factor = 1
+    while max(data_size) > factor*min_size or not levels:
+        if max_levels is not None and len(levels) >= max_levels:
+            break
+        factor *= 2
+        shape = (int_func(numpy.ceil(data_size[0]/float(factor))), int_func(numpy.ceil(data_size[1]/float(factor))))
+        levels.append({'factor': factor, 'shape': shape, 'offset': offset})
+        offset += 4*shape[0]*shape[1]
+
+    header = {
+        'version': _VERSION,
+        'method': method,
+        'index': index,
+        'data_size': data_size,
+        'levels': levels}
+    if source_file is not None:
+        stat = os.stat(source_file)
+        header.update({
+            'source_file': os.path.abspath(source_file),
+            'source_size': stat.st_size,
+            'source_mtime': stat.st_mtime})
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_offset = _PREFIX.size + len(header_bytes)
+    data_offset += (-data_offset) % _ALIGNMENT
+
+    # the sidecar is built in a temporary file, which only replaces the sidecar once
+    # every level is complete, so that an interrupted build never leaves a valid header
+    file_descriptor, temp_file = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(overview_file)), suffix='.ovr.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as fi:
+            fi.write(_PREFIX.pack(_MAGIC, data_offset, len(header_bytes)))
+            fi.write(header_bytes)
+            fi.seek(data_offset + offset - 1)
+            fi.write(b'\x00')
+        _fill_levels(reader, index, method, temp_file, data_offset, levels, data_size)
+        _replace(temp_file, overview_file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    return OverviewPyramid(overview_file, reader=reader, index=index)
+
+
+def open_overview(reader, overview_file=None, index=0, **kwargs):
+    """
+    Opens the overview for the given file, building it if it does not exist, if
+    it was built for a different index or data size, or if it is out of date
+    with respect to the file. The latter is only checked for an overview built
+    from a file name.
+
+    Parameters
+    ----------
+    reader : str|BaseReader
+        See :func:`build_overview`.
+    overview_file : None|str
+        See :func:`build_overview`.
+    index : int
+    kwargs
+        Keyword arguments passed through to :func:`build_overview`, if the overview
+        must be built.
+
+    Returns
+    -------
+    OverviewPyramid
+    """
+
+    index = int_func(index)
+    source_file = reader if isinstance(reader, str) else None
+    if overview_file is None and source_file is not None:
+        overview_file = _get_default_overview_file(source_file, index)
+    if overview_file is not None and os.path.isfile(overview_file):
+        try:
+            pyramid = OverviewPyramid(overview_file, index=index)
+            if source_file is None:
+                if not pyramid.matches(index, reader.get_data_size_as_tuple()[index]):
+                    logging.info(
+                        'Overview file {} does not match index {} of the reader, and will be '
+                        'rebuilt'.format(overview_file, index))
+                elif pyramid.source_file is None or pyramid.is_current():
+                    return OverviewPyramid(overview_file, reader=reader, index=index)
+                else:
+                    logging.info('Overview file {} is out of date, and will be rebuilt'.format(overview_file))
+            else:
+                from .converter import open_complex
+                source_reader = open_complex(source_file)
+                if not pyramid.matches(index, source_reader.get_data_size_as_tuple()[index]):
+                    logging.info(
+                        'Overview file {} does not match index {} of file {}, and will be '
+                        'rebuilt'.format(overview_file, index, source_file))
+                elif pyramid.is_current(source_file):
+                    return OverviewPyramid(overview_file, reader=source_reader, index=index)
+                else:
+                    logging.info('Overview file {} is out of date, and will be rebuilt'.format(overview_file))
+            del pyramid
+        except (IOError, ValueError, KeyError, IndexError):
+            logging.warning('Failed to read overview file {}, and it will be rebuilt'.format(overview_file))
+    return build_overview(reader, overview_file=overview_file, index=index, **kwargs)
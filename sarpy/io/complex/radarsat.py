@@ -12,10 +12,10 @@ import logging
 
 import numpy
 from numpy.polynomial import polynomial
-from scipy.constants import speed_of_light
 
 from .base import BaseReader
 from .tiff import TiffDetails, TiffReader
+from .metadata_cache import load_metadata
 
 from .sicd_elements.blocks import Poly1DType, Poly2DType
 from .sicd_elements.SICD import SICDType
@@ -32,6 +32,7 @@ from .sicd_elements.ImageFormation import ImageFormationType, RcvChanProcType, T
 from .sicd_elements.RMA import RMAType, INCAType
 from .sicd_elements.SCPCOA import SCPCOAType
 from .sicd_elements.Radiometric import RadiometricType, NoiseLevelType_
+from .sicd_elements.utils import speed_of_light
 from ...geometry import point_projection
 from .utils import get_seconds, fit_time_coa_polynomial
 
@@ -784,6 +785,61 @@ class RadarSatDetails(object):
             raise ValueError('unhandled ModeType {}'.format(collection_info.RadarMode.ModeType))
         return RMAType(RMAlgoType='OMEGA_K', INCA=inca)
 
+    def _get_calibration_file_names(self):
+        """
+        Gets the names of the beta, sigma and gamma lookup table files.
+
+        Returns
+        -------
+        Tuple[str, str, str]
+        """
+
+        base_path = os.path.dirname(self.file_name)
+        if self.generation == 'RS2':
+            return tuple(
+                os.path.join(base_path, self._find(
+                    './imageAttributes/lookupTable[@incidenceAngleCorrection="{}"]'.format(kind)).text)
+                for kind in ['Beta Nought', 'Sigma Nought', 'Gamma'])
+        elif self.generation == 'RCM':
+            return tuple(
+                os.path.join(base_path, 'calibration', self._find(
+                    './imageReferenceAttributes/lookupTableFileName[@sarCalibrationType="{}"]'.format(kind)).text)
+                for kind in ['Beta Nought', 'Sigma Nought', 'Gamma'])
+        else:
+            raise ValueError('unhandled generation {}'.format(self.generation))
+
+    def _get_noise_file_name(self):
+        """
+        Gets the name of the noise level file, which only exists for RCM. For
+        RS2, the noise is in the main product.xml.
+
+        Returns
+        -------
+        None|str
+        """
+
+        if self.generation != 'RCM':
+            return None
+        return os.path.join(
+            os.path.dirname(self.file_name), 'calibration',
+            self._find('./imageReferenceAttributes/noiseLevelFileName').text)
+
+    def get_metadata_file_names(self):
+        """
+        Gets the names of the calibration and noise files, from which the sicd
+        collection is derived along with the product.xml file.
+
+        Returns
+        -------
+        List[str]
+        """
+
+        file_names = list(self._get_calibration_file_names())
+        noise_file = self._get_noise_file_name()
+        if noise_file is not None:
+            file_names.append(noise_file)
+        return file_names
+
     def _get_radiometric(self, image_data, grid):
         """
         Gets the Radiometric metadata.
@@ -816,29 +872,7 @@ class RadarSatDetails(object):
                     coords_rg = coords_rg[rng_indices]
                 return numpy.atleast_2d(polynomial.polyfit(coords_rg, comp_values, 3))
 
-        base_path = os.path.dirname(self.file_name)
-        if self.generation == 'RS2':
-            beta_file = os.path.join(base_path, self._find('./imageAttributes'
-                                                           '/lookupTable'
-                                                           '[@incidenceAngleCorrection="Beta Nought"]').text)
-            sigma_file = os.path.join(base_path, self._find('./imageAttributes'
-                                                            '/lookupTable'
-                                                            '[@incidenceAngleCorrection="Sigma Nought"]').text)
-            gamma_file = os.path.join(base_path, self._find('./imageAttributes'
-                                                            '/lookupTable'
-                                                            '[@incidenceAngleCorrection="Gamma"]').text)
-        elif self.generation == 'RCM':
-            beta_file = os.path.join(base_path, 'calibration', self._find('./imageReferenceAttributes'
-                                                                          '/lookupTableFileName'
-                                                                          '[@sarCalibrationType="Beta Nought"]').text)
-            sigma_file = os.path.join(base_path, 'calibration', self._find('./imageReferenceAttributes'
-                                                                           '/lookupTableFileName'
-                                                                           '[@sarCalibrationType="Sigma Nought"]').text)
-            gamma_file = os.path.join(base_path, 'calibration', self._find('./imageReferenceAttributes'
-                                                                           '/lookupTableFileName'
-                                                                           '[@sarCalibrationType="Gamma"]').text)
-        else:
-            raise ValueError('unhandled generation {}'.format(self.generation))
+        beta_file, sigma_file, gamma_file = self._get_calibration_file_names()
 
         if not os.path.isfile(beta_file):
             logging.error(msg="Beta calibration information should be located in file {}, which doesn't exist.".format(beta_file))
@@ -856,9 +890,7 @@ class RadarSatDetails(object):
             beta0_element = self._find('./sourceAttributes/radarParameters'
                                        '/referenceNoiseLevel[@incidenceAngleCorrection="Beta Nought"]')
         elif self.generation == 'RCM':
-            noise_file = os.path.join(
-                base_path, 'calibration',
-                self._find('./imageReferenceAttributes/noiseLevelFileName').text)
+            noise_file = self._get_noise_file_name()
             noise_root = _parse_xml(noise_file, without_ns=True)
             noise_levels = noise_root.findall('./referenceNoiseLevel')
             beta0s = [entry for entry in noise_levels if entry.find('sarCalibrationType').text.startswith('Beta')]
@@ -978,7 +1010,9 @@ class RadarSatReader(BaseReader):
         # get the datafiles
         data_files = self._radar_sat_details.get_data_file_names()
         # get the sicd metadata objects
-        sicds = self._radar_sat_details.get_sicd_collection()
+        sicds = load_metadata(
+            self._radar_sat_details.file_name, 'RadarSatDetails', self._radar_sat_details.get_sicd_collection,
+            dependencies=self._radar_sat_details.get_metadata_file_names())
         readers = []
         for sicd, file_name in zip(sicds, data_files):
             # create one reader per file/sicd
@@ -11,11 +11,10 @@ from typing import List, Tuple, Union
 
 import numpy
 from numpy.polynomial import polynomial
-from scipy.constants import speed_of_light
-from scipy.interpolate import griddata
 
 from .base import SubsetReader, BaseReader
 from .tiff import TiffDetails, TiffReader
+from .metadata_cache import load_metadata
 
 from .sicd_elements.blocks import Poly1DType, Poly2DType
 from .sicd_elements.SICD import SICDType
@@ -31,6 +30,7 @@ from .sicd_elements.Timeline import TimelineType, IPPSetType
 from .sicd_elements.ImageFormation import ImageFormationType, RcvChanProcType, TxFrequencyProcType
 from .sicd_elements.RMA import RMAType, INCAType
 from .sicd_elements.Radiometric import RadiometricType, NoiseLevelType_
+from .sicd_elements.utils import speed_of_light
 from ...geometry import point_projection
 from ...geometry.geocoords import geodetic_to_ecf
 from .utils import two_dim_poly_fit, get_seconds, get_im_physical_coords
@@ -227,6 +227,19 @@ class SentinelDetails(object):
             files.append(fnames)
         return files
 
+    def get_metadata_file_names(self):
+        """
+        Gets the names of the product, calibration and noise files, from which the
+        sicd collection is derived along with the manifest.safe file.
+
+        Returns
+        -------
+        List[str]
+        """
+
+        return [entry[key] for entry in self._get_file_sets()
+                for key in ['product', 'calibration', 'noise'] if entry[key] is not None]
+
     def _get_base_sicd(self):
         """
         Gets the base SICD element.
@@ -683,6 +696,7 @@ class SentinelDetails(object):
             scp_pixels[:, 0] = int((out_sicd.ImageData.NumRows - 1)/2.)
             scp_pixels[:, 1] = int((out_sicd.ImageData.NumCols - 1)/2.) + out_sicd.ImageData.NumCols*(numpy.arange(count, dtype=numpy.float64))
             scps = numpy.zeros((count, 3), dtype=numpy.float64)
+            from scipy.interpolate import griddata  # scipy is slow to import, so only when required
             for j in range(3):
                 scps[:, j] = griddata(geo_pixels, geo_coords[:, j], scp_pixels)
             return scps
@@ -1035,7 +1049,9 @@ class SentinelReader(BaseReader):
 
         symmetry = (False, False, True)  # True for all Sentinel-1 data
         readers = []
-        sicd_collection = self._sentinel_details.get_sicd_collection()
+        sicd_collection = load_metadata(
+            self._sentinel_details.file_name, 'SentinelDetails', self._sentinel_details.get_sicd_collection,
+            dependencies=self._sentinel_details.get_metadata_file_names())
         for data_file, sicds in sicd_collection:
             tiff_details = TiffDetails(data_file)
             if isinstance(sicds, SICDType):
@@ -6,7 +6,8 @@ Module for reading SICD files - should support SICD version 0.3 and above.
 import re
 import sys
 import logging
-from xml.etree import ElementTree
+import threading
+from multiprocessing.pool import ThreadPool
 from typing import Union, Tuple
 
 import numpy
@@ -14,7 +15,9 @@ import numpy
 from ..nitf_headers import NITFDetails, DataExtensionHeader, _HeaderScraper, \
     NITFHeader, NITFSecurityTags, ImageSegmentHeader, ImageBands, _ItemArrayHeaders
 from .base import BaseChipper, BaseReader, BaseWriter
-from .bip import BIPChipper, BIPWriter
+from .bip import BIPChipper, BIPWriter, WRITER_BACKENDS
+from .codec import PixelCodec, get_codec
+from .metadata_cache import load_metadata
 from .sicd_elements.SICD import SICDType
 from .sicd_elements.blocks import LatLonType
 
@@ -278,37 +281,29 @@ class SICDDetails(NITFDetails):
                 if subhead_bytes.startswith(b'DEXML_DATA_CONTENT'):
                     des_header = SICDDataExtensionHeader.from_string(subhead_bytes, start=0)
                     fi.seek(int_func(self.des_segment_offsets[0]))
-                    data_extension = fi.read(int_func(self._nitf_header.DataExtensions.item_sizes[0])).decode('utf-8')
-        if des_header is None or not data_extension.startswith('<SICD'):
+                    data_extension = fi.read(int_func(self._nitf_header.DataExtensions.item_sizes[0]))
+        if des_header is None or not data_extension.startswith(b'<SICD'):
             return
 
-        # junk the namespace (for now)
-        data_extension = re.sub('\\sxmlns="[^"]+"', '', data_extension, count=1)
-        root_node = ElementTree.fromstring(data_extension)  # handles bytes?
+        def parse_sicd():
+            # the namespace is junked (for now)
+            sicd_meta = SICDType.from_xml_bytes(data_extension)
+            sicd_meta.derive()
+            # TODO: account for the reference frequency offset situation
+            return sicd_meta
+
         self._is_sicd = True
         self._des_header = des_header
-
-        self._sicd_meta = SICDType.from_node(root_node)
-        self._sicd_meta.derive()
-        # TODO: account for the reference frequency offset situation
+        self._sicd_meta = load_metadata(self._file_name, 'SICDDetails', parse_sicd)
 
 
 #######
 #  The actual reading implementation
 
-def _validate_lookup(lookup_table):  # type: (numpy.ndarray) -> None
-    if not isinstance(lookup_table, numpy.ndarray):
-        raise ValueError('requires a numpy.ndarray, got {}'.format(type(lookup_table)))
-    if lookup_table.dtype.name != 'float64':
-        raise ValueError('requires a numpy.ndarray of float64 dtype, got {}'.format(lookup_table.dtype))
-    if lookup_table.shape != (256, ):
-        raise ValueError('Requires a one-dimensional numpy.ndarray with 256 elements, '
-                         'got shape {}'.format(lookup_table.shape))
-
-
 def amp_phase_to_complex(lookup_table):
     """
     This constructs the function to convert from AMP8I_PHS8I format data to complex64 data.
+    See :class:`sarpy.io.complex.codec.AMP8ICodec`.
 
     Parameters
     ----------
@@ -319,26 +314,7 @@ def amp_phase_to_complex(lookup_table):
     callable
     """
 
-    _validate_lookup(lookup_table)
-
-    def converter(data):
-        if not isinstance(data, numpy.ndarray):
-            raise ValueError('requires a numpy.ndarray, got {}'.format(type(data)))
-
-        if data.dtype.name != 'uint8':
-            raise ValueError('requires a numpy.ndarray of uint8 dtype, got {}'.format(data.dtype.name))
-
-        if len(data.shape) == 3:
-            raise ValueError('Requires a three-dimensional numpy.ndarray (with band '
-                             'in the first dimension), got shape {}'.format(data.shape))
-
-        out = numpy.zeros((data.shape[0] / 2, data.shape[1], data.shape[2]), dtype=numpy.complex64)
-        amp = lookup_table[data[0::2, :, :]]
-        theta = data[1::2, :, :]*(2*numpy.pi/256)
-        out.real = amp*numpy.cos(theta)
-        out.imag = amp*numpy.sin(theta)
-        return out
-    return converter
+    return get_codec('AMP8I_PHS8I', amp_table=lookup_table).decode
 
 
 class MultiSegmentChipper(BaseChipper):
@@ -347,14 +323,18 @@ class MultiSegmentChipper(BaseChipper):
     and row/column limits. Any sufficiently large SICD collect must be broken into a series of
     image segments (along rows). We must have a parser to transparently extract data between
     this collection of image segments.
+
+    When `threads` is greater than one, the image segments touched by a given
+    read are read concurrently using a thread pool, each directly into its slice
+    of the output array.
     """
 
     __slots__ = ('_file_name', '_data_size', '_dtype', '_complex_out',
                  '_symmetry', '_row_starts', '_row_ends',
-                 '_bands_ip', '_child_chippers')
+                 '_bands_ip', '_child_chippers', '_threads', '_thread_pool', '_pool_lock')
 
     def __init__(self, file_name, data_sizes, data_offsets, data_type, symmetry=None,
-                 complex_type=True, bands_ip=1):
+                 complex_type=True, bands_ip=1, threads=1):
         """
 
         Parameters
@@ -373,6 +353,9 @@ class MultiSegmentChipper(BaseChipper):
             See `BaseChipper` for description of `complex_type`
         bands_ip : int
             number of bands - this will always be one for sicd.
+        threads : None|int
+            The number of threads used for reading the image segments concurrently.
+            `None` or `1` reads the segments serially.
         """
 
         if not isinstance(data_sizes, numpy.ndarray):
@@ -411,31 +394,187 @@ class MultiSegmentChipper(BaseChipper):
         self._row_starts[1:] = self._row_ends[:-1]
         self._bands_ip = int_func(bands_ip)
 
+        self._threads = 1
+        self._thread_pool = None
+        self._pool_lock = threading.Lock()
+        self.threads = threads
+
         data_size = (self._row_ends[-1], data_sizes[0, 1])
         # all of the actual reading and reorienting done by child chippers,
         # so do not reorient or change type at this level
         super(MultiSegmentChipper, self).__init__(data_size, symmetry=(False, False, False), complex_type=False)
 
-    def _read_raw_fun(self, range1, range2):
-        range1, range2 = self._reorder_arguments(range1, range2)
-        # this method just assembles the final data from the child chipper pieces
+    def __del__(self):
+        if getattr(self, '_thread_pool', None) is not None:
+            self._thread_pool.terminate()
+
+    @property
+    def block_cache(self):
+        """
+        None|BlockCache: The raw data tile cache, which is shared by the image
+        segment chippers, if caching has been enabled using :func:`enable_cache`.
+        """
+
+        return self._child_chippers[0].block_cache
+
+    def enable_cache(self, max_bytes=2**28, tile_shape=(512, 512)):
+        """
+        Enable the least recently used cache of raw data tiles. The image segment
+        chippers read and decode the data, so the cache is shared between them,
+        and holds the samples as stored in the file. Any previously cached tiles
+        are discarded.
+
+        Parameters
+        ----------
+        max_bytes : int
+            The maximum total size in bytes of the cached tiles. Default is 2**28 = 256MB.
+        tile_shape : Tuple[int, int]
+            The (rows, columns) tile shape, within each image segment.
+
+        Returns
+        -------
+        None
+        """
+
+        self._child_chippers[0].enable_cache(max_bytes=max_bytes, tile_shape=tile_shape)
+        block_cache = self._child_chippers[0].block_cache
+        tile_shape = self._child_chippers[0]._cache_tile_shape
+        for i, child_chipper in enumerate(self._child_chippers):
+            child_chipper._share_cache(block_cache, tile_shape, i)
+
+    def disable_cache(self):
+        """
+        Disable the raw data tile cache, and discard any cached tiles.
+
+        Returns
+        -------
+        None
+        """
+
+        for child_chipper in self._child_chippers:
+            child_chipper.disable_cache()
+
+    def invalidate_cache(self):
+        """
+        Discard any cached tiles. Caching remains enabled, if it was enabled.
+
+        Returns
+        -------
+        None
+        """
+
+        block_cache = self.block_cache
+        if block_cache is not None:
+            block_cache.invalidate()
+
+    @property
+    def threads(self):
+        """
+        int: The number of threads used for reading the image segments concurrently.
+        """
+
+        return self._threads
+
+    @threads.setter
+    def threads(self, value):
+        value = 1 if value is None else int_func(value)
+        if value < 1:
+            raise ValueError('threads must be a positive integer, got {}'.format(value))
+        with self._pool_lock:
+            if self._thread_pool is not None and value != self._threads:
+                self._thread_pool.close()
+                self._thread_pool = None
+            self._threads = value
+
+    def _get_thread_pool(self):
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPool(processes=self._threads)
+            return self._thread_pool
+
+    @staticmethod
+    def _read_segment(task):
+        child_chipper, crange1, range2, out_view = task
+        child_chipper(crange1, range2, out=out_view)
+
+    def _get_segment_reads(self, range1):
+        """
+        Determines the segment reads for the given (validated) row range.
+
+        Parameters
+        ----------
+        range1 : Tuple[int, int, int]
+
+        Returns
+        -------
+        (int, List[Tuple[BIPChipper, Tuple[int, int, int], slice]])
+            The number of rows, and a list of the child chipper, the (forward)
+            child row range, and the slice of the output rows to populate.
+        """
+
         rows = numpy.arange(*range1, dtype=numpy.int64)  # array
-        cols_size = int_func((range2[1] - range2[0] - 1)/range2[2]) + 1
-        if self._bands_ip == 1:
-            out = numpy.empty((rows.size, cols_size), dtype=numpy.complex64)
+        step = range1[2]
+        if step > 0:
+            first_rows = numpy.searchsorted(rows, self._row_starts, side='left')
+            last_rows = numpy.searchsorted(rows, self._row_ends, side='left')
+        else:
+            # rows are in decreasing order
+            first_rows = numpy.searchsorted(-rows, -self._row_ends, side='right')
+            last_rows = numpy.searchsorted(-rows, -self._row_starts, side='right')
+
+        reads = []
+        for row_start, child_chipper, i0, i1 in zip(self._row_starts, self._child_chippers, first_rows, last_rows):
+            if i1 <= i0:
+                continue
+            if step > 0:
+                crange1 = (rows[i0]-row_start, rows[i1-1]+1-row_start, step)
+                out_slice = slice(int_func(i0), int_func(i1))
+            else:
+                # read forward from the segment, and populate the output in reverse order
+                crange1 = (rows[i1-1]-row_start, rows[i0]+1-row_start, -step)
+                out_slice = slice(int_func(i1) - 1, None if i0 == 0 else int_func(i0) - 1, -1)
+            reads.append((child_chipper, crange1, out_slice))
+        return rows.size, reads
+
+    def _map(self, function, tasks):
+        if self._threads > 1 and len(tasks) > 1:
+            return self._get_thread_pool().map(function, tasks, chunksize=1)
         else:
-            out = numpy.empty((rows.size, cols_size, self._bands_ip), dtype=numpy.complex64)
-        for row_start, row_end, child_chipper in zip(self._row_starts, self._row_ends, self._child_chippers):
-            row_bool = ((rows >= row_start) & (rows < row_end))
-            if numpy.any(row_bool):
-                crows = rows[row_bool]
-                crange1 = (crows[0]-row_start, crows[-1]+1-row_start, range1[2])
-                if self._bands_ip == 1:
-                    out[row_bool, :] = child_chipper(crange1, range2)
-                else:
-                    out[row_bool, :, :] = child_chipper(crange1, range2)
+            return [function(task) for task in tasks]
+
+    def _read_raw_fun(self, range1, range2, out=None):
+        range1, range2 = self._reorder_arguments(range1, range2)
+        # this method just assembles the final data from the child chipper pieces,
+        # each of which decodes directly into its portion of out
+        row_count, reads = self._get_segment_reads(range1)
+        cols_size = numpy.arange(*range2).size
+        if out is not None:
+            pass
+        elif self._bands_ip == 1:
+            out = numpy.empty((row_count, cols_size), dtype=numpy.complex64)
+        else:
+            out = numpy.empty((row_count, cols_size, self._bands_ip), dtype=numpy.complex64)
+
+        tasks = [(child_chipper, crange1, range2, out[out_slice]) for child_chipper, crange1, out_slice in reads]
+        self._map(self._read_segment, tasks)
         return out
 
+    def _read_undecoded(self, range1, range2):
+        range1, range2 = self._reorder_arguments(range1, range2)
+        row_count, reads = self._get_segment_reads(range1)
+        if len(reads) == 0:
+            # no segment is touched, so get the empty array and parameters from the first segment
+            return self._child_chippers[0]((0, 0, 1), range2, raw=True)
+        results = self._map(
+            lambda task: task[0](task[1], range2, raw=True), [(child_chipper, crange1) for child_chipper, crange1, _ in reads])
+        out = None
+        parameters = None
+        for (_, _, out_slice), (data, parameters) in zip(reads, results):
+            if out is None:
+                out = numpy.empty((row_count, ) + data.shape[1:], dtype=data.dtype)
+            out[out_slice] = data
+        return out, parameters
+
 
 class SICDReader(BaseReader):
     """
@@ -444,13 +583,19 @@ class SICDReader(BaseReader):
 
     __slots__ = ('_nitf_details', '_sicd_meta', '_chipper')
 
-    def __init__(self, nitf_details):
+    def __init__(self, nitf_details, threads=1, validation=None):
         """
 
         Parameters
         ----------
         nitf_details : str|SICDDetails
             filename or SICDDetails object
+        threads : None|int
+            The number of threads for concurrently reading image segments. See
+            :class:`MultiSegmentChipper`.
+        validation : None|str
+            The policy for validating the sicd metadata, one of `('off', 'lazy', 'eager')`.
+            The default `None` uses the global policy, see :func:`sarpy.io.complex.base.set_validation_policy`.
         """
 
         if isinstance(nitf_details, str):
@@ -466,18 +611,10 @@ class SICDReader(BaseReader):
 
         self._sicd_meta = self._nitf_details.sicd_meta
 
-        pixel_type = self._sicd_meta.ImageData.PixelType
-        complex_type = True
         # NB: SICDs are required to be stored as big-endian
-        if pixel_type == 'RE32F_IM32F':
-            dtype = numpy.dtype('>f4')
-        elif pixel_type == 'RE16I_IM16I':
-            dtype = numpy.dtype('>i2')
-        elif pixel_type == 'AMP8I_PHS8I':
-            dtype = numpy.dtype('>u1')
-            complex_type = amp_phase_to_complex(self._sicd_meta.ImageData.AmpTable)
-        else:
-            raise ValueError('Pixel Type {} not recognized.'.format(pixel_type))
+        complex_type = get_codec(
+            self._sicd_meta.ImageData.PixelType, amp_table=self._sicd_meta.ImageData.AmpTable, byte_order='>')
+        dtype = complex_type.dtype
 
         data_sizes = numpy.column_stack(
             (self._nitf_details.img_segment_rows, self._nitf_details.img_segment_columns))
@@ -488,34 +625,19 @@ class SICDReader(BaseReader):
         chipper = MultiSegmentChipper(
             nitf_details.file_name, data_sizes, self._nitf_details.img_segment_offsets.copy(), dtype,
             symmetry=symmetry, complex_type=complex_type,
-            bands_ip=1)
+            bands_ip=1, threads=threads)
 
         super(SICDReader, self).__init__(self._sicd_meta, chipper)
-
-        # should we do a preliminary check that the structure is valid?
-        #   note that this results in potentially noisy logging for troubled sicd files
-        self._sicd_meta.is_valid(recursive=True)
+        self._apply_validation_policy(validation)
 
 
 #######
 #  The actual writing implementation
 
-def _validate_input(data):
-    # type: (numpy.ndarray) -> tuple
-    if not isinstance(data, numpy.ndarray):
-        raise ValueError('Requires a numpy.ndarray, got {}'.format(type(data)))
-    if data.dtype.name not in ('complex64', 'complex128'):
-        raise ValueError('Requires a numpy.ndarray of complex dtype, got {}'.format(data.dtype.name))
-    if len(data.shape) != 2:
-        raise ValueError('Requires a two-dimensional numpy.ndarray, got {}'.format(data.shape))
-
-    new_shape = (data.shape[0], data.shape[1], 2)
-    return new_shape
-
-
 def complex_to_amp_phase(lookup_table):
     """
     This constructs the function to convert from complex64 or 128 to AMP8I_PHS8I format data.
+    See :class:`sarpy.io.complex.codec.AMP8ICodec`.
 
     Parameters
     ----------
@@ -526,23 +648,13 @@ def complex_to_amp_phase(lookup_table):
     callable
     """
 
-    _validate_lookup(lookup_table)
-
-    def converter(data):
-        new_shape = _validate_input(data)
-        out = numpy.zeros(new_shape, dtype=numpy.uint8)
-        # NB: for numpy before 1.10, digitize requires 1-d
-        out[:, :, 0] = numpy.digitize(numpy.abs(data).ravel(), lookup_table, right=False).reshape(data.shape)
-        out[:, :, 1] = numpy.arctan2(data.real, data.imag)*(256/(2*numpy.pi))
-        # truncation takes care of properly rolling negative to positive
-        return out
-
-    return converter
+    return get_codec('AMP8I_PHS8I', amp_table=lookup_table, byte_order='=').encode
 
 
 def complex_to_int(data):
     """
-    This converts from complex64 or 128 data to int16 data.
+    This converts from complex64 or 128 data to int16 data, rounding to the nearest
+    integer and clipping to the int16 limits. See :class:`sarpy.io.complex.codec.RE16ICodec`.
 
     Parameters
     ----------
@@ -553,27 +665,16 @@ def complex_to_int(data):
     numpy.ndarray
     """
 
-    # TODO: this is naive. Scaling down to 16-bit limits requires thought.
-    new_shape = _validate_input(data)
-
-    if data.dtype.name == 'complex128':
-        view_dtype = numpy.float64
-    else:
-        view_dtype = numpy.float32
-
-    i16_info = numpy.iinfo(numpy.int16)  # for getting max/min type values
-    data_view = data.view(dtype=view_dtype).reshape(new_shape)
-    out = numpy.zeros(new_shape, dtype=numpy.int16)
-    out[:] = numpy.round(numpy.clip(data_view, i16_info.min, i16_info.max))
-    # this is nonsense without the clip - gets cast to int64 and then truncated.
-    # should we round? Without it, it will be the floor, I believe.
-    return out
+    return get_codec('RE16I_IM16I', byte_order='=').encode(data)
 
 
 class SICDWriter(BaseWriter):
     """
     Writer object for SICD file - that is, a NITF file containing SICD data
     following standard 1.1.0
+
+    When `segment_threads` is greater than one, the image segments touched by a
+    given chip are written concurrently using a thread pool.
     """
 
     __slots__ = (
@@ -581,17 +682,43 @@ class SICDWriter(BaseWriter):
         '_complex_type', '_image_segment_limits',
         '_security_tags', '_image_segment_headers', '_data_extension_header', '_nitf_header',
         '_header_offsets', '_image_offsets',
-        '_final_header_info', '_writing_chippers', '_pixels_written', '_des_written')
+        '_final_header_info', '_writing_chippers', '_pixels_written', '_des_written', '_lock',
+        '_fid', '_segment_threads', '_thread_pool', '_backend')
 
-    def __init__(self, file_name, sicd_meta):
+    _IM_SEG_LIMIT = 10**10 - 2
+    """
+    The maximum image segment size in bytes, as big as can be stored in 10 digits, given at least 2 bytes per pixel
+    """
+    _DIM_LIMIT = 10**5 - 1
+    """
+    The maximum image segment rows/columns, as big as can be stored in 5 digits
+    """
+
+    def __init__(self, file_name, sicd_meta, threads=1, segment_threads=1, backend='memmap'):
         """
 
         Parameters
         ----------
         file_name : str
         sicd_meta : SICDType
+        threads : int
+            The number of threads used for encoding the complex data.
+        segment_threads : int
+            The number of threads used for writing the image segments touched by
+            a given chip concurrently. `1` writes the segments serially.
+        backend : str
+            The image segment writer backend, one of :data:`sarpy.io.complex.bip.WRITER_BACKENDS`.
         """
 
+        if backend is None:
+            backend = 'memmap'
+        if backend not in WRITER_BACKENDS:
+            raise ValueError('backend must be one of {}, got {}'.format(WRITER_BACKENDS, backend))
+
+        segment_threads = int_func(segment_threads)
+        if segment_threads < 1:
+            raise ValueError('segment_threads must be a positive integer, got {}'.format(segment_threads))
+
         super(SICDWriter, self).__init__(file_name, sicd_meta)
         self._shape = (sicd_meta.ImageData.NumRows, sicd_meta.ImageData.NumCols)
 
@@ -600,6 +727,7 @@ class SICDWriter(BaseWriter):
         # get image segment details
         self._pixel_size, self._dtype, self._complex_type, pv_type, isubcat, \
             self._image_segment_limits = self._image_segment_details()
+        self._complex_type.threads = threads
         # prepare our pixels written counter
         self._pixels_written = numpy.zeros((self._image_segment_limits.shape[0],), dtype=numpy.int64)
         # define _image_segment_headers
@@ -613,6 +741,12 @@ class SICDWriter(BaseWriter):
         self._final_header_info = None
         self._writing_chippers = None
         self._des_written = False
+        self._fid = None
+        self._segment_threads = segment_threads
+        self._thread_pool = None
+        self._backend = backend
+        # guards the header writing and bookkeeping, so chips may be written concurrently
+        self._lock = threading.Lock()
 
     @property
     def security_tags(self):  # type: () -> NITFSecurityTags
@@ -687,28 +821,24 @@ class SICDWriter(BaseWriter):
         return sec
 
     def _image_segment_details(self):
-        # type: () -> (int, numpy.dtype, Union[bool, callable], str, tuple, numpy.ndarray)
+        # type: () -> (int, numpy.dtype, PixelCodec, str, tuple, numpy.ndarray)
         pixel_type = self._sicd_meta.ImageData.PixelType  # required to be defined
         # NB: SICDs are required to be stored as big-endian, so the endian-ness
         #   of the memmap must be explicit
         if pixel_type == 'RE32F_IM32F':
             pv_type, isubcat = 'R', ('I', 'Q')
             pixel_size = 8
-            dtype = numpy.dtype('>f4')
-            complex_type = True
         elif pixel_type == 'RE16I_IM16I':
             pv_type, isubcat = 'SI', ('I', 'Q')
             pixel_size = 4
-            dtype = numpy.dtype('>i2')
-            complex_type = complex_to_int
         else:  # pixel_type == 'AMP8I_PHS8I':
             pv_type, isubcat = 'INT', ('M', 'P')
             pixel_size = 2
-            dtype = numpy.dtype('>u1')
-            complex_type = complex_to_amp_phase(self._sicd_meta.ImageData.AmpTable)
+        complex_type = get_codec(pixel_type, amp_table=self._sicd_meta.ImageData.AmpTable, byte_order='>')
+        dtype = complex_type.dtype
 
-        IM_SEG_LIMIT = 10**10 - 2  # as big as can be stored in 10 digits, given at least 2 bytes per pixel
-        DIM_LIMIT = 10**5 - 1  # as big as can be stored in 5 digits
+        IM_SEG_LIMIT = self._IM_SEG_LIMIT
+        DIM_LIMIT = self._DIM_LIMIT
         IM_ROWS = self._sicd_meta.ImageData.NumRows  # required to be defined
         IM_COLS = self._sicd_meta.ImageData.NumCols  # required to be defined
         im_segments = []
@@ -766,12 +896,12 @@ class SICDWriter(BaseWriter):
         if self._sicd_meta.CollectionInfo is not None and self._sicd_meta.CollectionInfo.CollectorName is not None:
             isource = 'SICD: {}'.format(self._sicd_meta.CollectionInfo.CollectorName)
 
-        icp, rows, cols = None, None, None
+        icp = None
         if self._sicd_meta.GeoData is not None and self._sicd_meta.GeoData.ImageCorners is not None:
             # noinspection PyTypeChecker
             icp = self._sicd_meta.GeoData.ImageCorners.get_array(dtype=numpy.float64)
-            rows = self._sicd_meta.ImageData.NumRows
-            cols = self._sicd_meta.ImageData.NumCols
+        rows = self._sicd_meta.ImageData.NumRows
+        cols = self._sicd_meta.ImageData.NumCols
         abpp = 4*self._pixel_size
         nppbh = 0 if rows > 8192 else rows
         nppbv = 0 if cols > 8192 else cols
@@ -928,23 +1058,61 @@ class SICDWriter(BaseWriter):
             'Writing NITF header and setting up the chippers, this likely causes '
             'a large physical memory allocation and may be time consuming.')
 
-        # write the nitf header
-        with open(self._file_name, mode='r+b') as fi:
-            fi.write(self._final_header_info['nitf'])
+        # write the nitf header and all image segment headers, through the handle
+        # which is kept until the data extension is written on close
+        self._fid = open(self._file_name, mode='r+b')
+        self._fid.write(self._final_header_info['nitf'])
+        for header_offset, header in zip(header_offsets, self._final_header_info['image_headers']):
+            self._fid.seek(int_func(header_offset))
+            self._fid.write(header)
+        self._fid.flush()
 
         # prepare out writing chippers
         self._writing_chippers = tuple(
             BIPWriter(self._file_name, (ent[1]-ent[0], ent[3]-ent[2]),
-                      self._dtype, self._complex_type, data_offset=offset)
+                      self._dtype, self._complex_type, data_offset=offset, backend=self._backend)
             for ent, offset in zip(self._image_segment_limits, image_offsets))
 
-    def _write_image_header(self, index):
-        # type: (int) -> None
-        if self._pixels_written[index] > 0:
-            return
-        with open(self._file_name, mode='r+b') as fi:
-            fi.seek(self._header_offsets[index])
-            fi.write(self._final_header_info['image_headers'][index])
+    def _get_thread_pool(self):
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPool(processes=self._segment_threads)
+            return self._thread_pool
+
+    @staticmethod
+    def _write_segment(task):
+        writing_chipper, data, start_indices = task
+        writing_chipper(data, start_indices)
+
+    def _get_segment_writes(self, row_range, col_range):
+        """
+        Determines the image segment writes for the given (validated) row and column ranges.
+
+        Parameters
+        ----------
+        row_range : Tuple[int, int]
+        col_range : Tuple[int, int]
+
+        Returns
+        -------
+        List[Tuple[int, Tuple[slice, slice], Tuple[int, int]]]
+            The image segment index, the slice of the data for that segment,
+            and the start indices relative to the segment.
+        """
+
+        limits = self._image_segment_limits
+        row_starts = numpy.maximum(limits[:, 0], row_range[0])
+        row_ends = numpy.minimum(limits[:, 1], row_range[1])
+        col_starts = numpy.maximum(limits[:, 2], col_range[0])
+        col_ends = numpy.minimum(limits[:, 3], col_range[1])
+        writes = []
+        for i in numpy.nonzero((row_starts < row_ends) & (col_starts < col_ends))[0]:
+            data_slice = (
+                slice(int_func(row_starts[i] - row_range[0]), int_func(row_ends[i] - row_range[0])),
+                slice(int_func(col_starts[i] - col_range[0]), int_func(col_ends[i] - col_range[0])))
+            segment_start = (int_func(row_starts[i] - limits[i, 0]), int_func(col_starts[i] - limits[i, 2]))
+            writes.append((int_func(i), data_slice, segment_start))
+        return writes
 
     def close(self):
         """
@@ -981,51 +1149,28 @@ class SICDWriter(BaseWriter):
         # let's write the data extension, if we can
         # noinspection PyBroadException
         try:
-            with open(self._file_name, mode='r+b') as fi:
-                fi.seek(self._image_offsets[-1] + self._image_segment_limits[-1, 4])
-                fi.write(self._final_header_info['des']['header'])
-                fi.write(self._final_header_info['des']['xml'])
-            self._des_written = True
-            logging.info('Data file {} fully written.'.format(self._file_name))
-        except FileNotFoundError:
-            logging.info('Data file {} not created.'.format(self._file_name))
+            if self._fid is None:
+                logging.info('Data file {} not created.'.format(self._file_name))
+            else:
+                self._fid.seek(int_func(self._image_offsets[-1] + self._image_segment_limits[-1, 4]))
+                self._fid.write(self._final_header_info['des']['header'])
+                self._fid.write(self._final_header_info['des']['xml'])
+                self._des_written = True
+                logging.info('Data file {} fully written.'.format(self._file_name))
         except Exception:
             logging.info('Data file {} improperly created, and is likely corrupt.'.format(self._file_name))
-        # now, we close all the chippers
-        if hasattr(self, '_writing_chippers'):
-            if self._writing_chippers is not None:
-                for entry in self._writing_chippers:
-                    entry.close()
+        # now, we close all the chippers, the file and the thread pool
+        if getattr(self, '_writing_chippers', None) is not None:
+            for entry in self._writing_chippers:
+                entry.close()
+        if getattr(self, '_fid', None) is not None:
+            self._fid.close()
+            self._fid = None
+        if getattr(self, '_thread_pool', None) is not None:
+            self._thread_pool.close()
+            self._thread_pool = None
 
     def __call__(self, data, start_indices=(0, 0)):
-        def overlap(rrange, crange):
-            def element_overlap(this_range, segment_range):
-                if segment_range[0] <= this_range[0] < segment_range[1]:
-                    # this_range starts in this image segment?
-                    if segment_range[0] < this_range[1] <= segment_range[1]:
-                        return this_range[0], this_range[1]
-                    else:
-                        return this_range[0], segment_range[1]
-                elif segment_range[0] < this_range[1] <= segment_range[1]:
-                    # does this_range stops (but doesn't start) in this image segment
-                    return segment_range[0], this_range[1]
-                elif (this_range[0] < segment_range[0]) and (segment_range[1] <= this_range[1]):
-                    # this_range encompasses this entire segment
-                    return segment_range[0], segment_range[1]
-                else:
-                    return None
-
-            need_segs = numpy.zeros((len(self._image_segment_limits),), dtype=numpy.bool)
-            data_ents = numpy.zeros((len(self._image_segment_limits), 4), dtype=numpy.int64)
-            for j, ent in enumerate(self._image_segment_limits):
-                row_inds = element_overlap(rrange, ent[0:2])
-                col_inds = element_overlap(crange, ent[2:4])
-                if (row_inds is not None) and (col_inds is not None):
-                    need_segs[j] = True
-                    data_ents[j, :2] = row_inds
-                    data_ents[j, 2:] = col_inds
-            return need_segs, data_ents
-
         if not isinstance(data, numpy.ndarray):
             raise ValueError('data is required to be an instance of numpy.ndarray, got {}'.format(type(data)))
 
@@ -1044,26 +1189,25 @@ class SICDWriter(BaseWriter):
                 'Got start_indices = {} and data of shape {}. '
                 'This is incompatible with total data shape {}.'.format(start_indices, data.shape, self._shape))
 
-        if self._writing_chippers is None:
-            self.prepare_for_writing()
+        with self._lock:
+            if self._writing_chippers is None:
+                self.prepare_for_writing()
 
-        # which segment(s) will we write in?
-        need_segments, data_entries = overlap(row_range, col_range)
-        # need_segments - boolean array of which segments that we'll write in
-        # data entries - array of [row start, row end, col start, col end] wrt to full image coordinates.
-        for i, need_seg in enumerate(need_segments):
-            if not need_seg:
-                continue
-            self._write_image_header(i)  # will just exit if already written
-            entry = data_entries[i, :]
-            # how many elements will we write?
-            write_els = (entry[1] - entry[0])*(entry[3] - entry[2])
-            # write the data using this chipper
-            drows = (entry[0]-start_indices[0], entry[1]-start_indices[0])
-            dcols = (entry[2]-start_indices[1], entry[3]-start_indices[1])
-            sinds = (
-                start_indices[0] - self._image_segment_limits[i, 0],
-                start_indices[1] - self._image_segment_limits[i, 2])
-            self._writing_chippers[i](data[drows[0]:drows[1], dcols[0]:dcols[1]], sinds)
-            # update how many pixels we have written to this segment
-            self._pixels_written[i] += write_els
+        # which segment(s) will we write in, and where?
+        tasks = []
+        pixels = []
+        for i, data_slice, segment_start in self._get_segment_writes(row_range, col_range):
+            segment_data = data[data_slice]
+            tasks.append((self._writing_chippers[i], segment_data, segment_start))
+            pixels.append((i, segment_data.shape[0]*segment_data.shape[1]))
+
+        if self._segment_threads > 1 and len(tasks) > 1:
+            self._get_thread_pool().map(self._write_segment, tasks, chunksize=1)
+        else:
+            for task in tasks:
+                self._write_segment(task)
+
+        # update how many pixels we have written to each segment
+        with self._lock:
+            for i, write_els in pixels:
+                self._pixels_written[i] += write_els
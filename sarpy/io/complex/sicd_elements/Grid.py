@@ -7,15 +7,13 @@ import logging
 
 import numpy
 from numpy.linalg import norm
-from scipy.optimize import newton
-from scipy.constants import speed_of_light
 
 from .base import Serializable, DEFAULT_STRICT, \
     _StringDescriptor, _StringEnumDescriptor, _FloatDescriptor, _FloatArrayDescriptor, \
     _IntegerEnumDescriptor, _SerializableDescriptor, _UnitVectorDescriptor, \
     _ParametersDescriptor, ParametersCollection
 from .blocks import XYZType, Poly2DType
-from .utils import _get_center_frequency
+from .utils import _get_center_frequency, speed_of_light
 
 
 __classification__ = "UNCLASSIFIED"
@@ -336,6 +334,7 @@ class DirParamType(Serializable):
                 coef = 0.5
 
             if coef is not None:
+                from scipy.optimize import newton  # scipy is slow to import, so only when required
                 zero = newton(_hamming_ipr, 0.1, args=(coef,), tol=1e-12, maxiter=10000)
                 return 2*zero
 
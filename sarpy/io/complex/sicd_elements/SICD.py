@@ -7,7 +7,7 @@ import logging
 
 import numpy
 
-from .base import Serializable, _SerializableDescriptor
+from .base import Serializable, _SerializableDescriptor, get_modification_count
 from .CollectionInfo import CollectionInfoType
 from .ImageCreation import ImageCreationType
 from .ImageData import ImageDataType
@@ -281,6 +281,38 @@ class SICDType(Serializable):
             return True
         return True
 
+    def is_valid(self, recursive=False):
+        """
+        Returns the validity of this object according to the schema. The result is
+        memoized until any field of this instance, or of any of its children, is
+        set. See :func:`sarpy.io.complex.sicd_elements.base.get_modification_count`.
+
+        Parameters
+        ----------
+        recursive : bool
+            True if we recursively check that child are also valid. This may result in verbose (i.e. noisy) logging.
+
+        Returns
+        -------
+        bool
+            condition for validity of this element
+        """
+
+        key = (bool(recursive), get_modification_count(self))
+        memo = self.__dict__.get('_validity_memo', None)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        result = super(SICDType, self).is_valid(recursive=recursive)
+        # NB: set directly, since this is not a field modification
+        self.__dict__['_validity_memo'] = (key, result)
+        return result
+
+    def __getstate__(self):
+        instance_dict, fields = super(SICDType, self).__getstate__()
+        # the memoized validity is not meaningful in another process
+        instance_dict.pop('_validity_memo', None)
+        return instance_dict, fields
+
     def _basic_validity_check(self):
         condition = super(SICDType, self)._basic_validity_check()
         # do our image formation parameters match, as appropriate?
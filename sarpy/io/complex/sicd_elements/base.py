@@ -5,12 +5,14 @@ This module contains the base objects for use in the SICD elements, and the base
 
 import sys
 import copy
+import itertools
+from io import BytesIO
 
 from xml.etree import ElementTree
 from collections import OrderedDict
 from datetime import datetime, date
 import logging
-from weakref import WeakKeyDictionary
+from weakref import WeakKeyDictionary, ref
 
 import numpy
 import numpy.polynomial.polynomial
@@ -39,6 +41,119 @@ bool: package level default behavior for whether to handle standards compliance
     loosely (by logging a warning)
 """
 
+# NB: next() on a count is atomic, so concurrent modifications get distinct stamps
+_stamp_counter = itertools.count(1)
+# the bookkeeping attributes, which are neither copied nor pickled
+_TRACKING_ATTRIBUTES = ('_modification_stamp', '_parent_refs')
+
+
+def _note_modification(instance):
+    """
+    Stamps the given instance, and every instance which (transitively) contains
+    it, with a new modification stamp. See :func:`get_modification_count`.
+
+    Parameters
+    ----------
+    instance : Serializable|SerializableArray|ParametersCollection
+
+    Returns
+    -------
+    None
+    """
+
+    stamp = next(_stamp_counter)
+    object.__setattr__(instance, '_modification_stamp', stamp)
+    parent_refs = getattr(instance, '_parent_refs', None)
+    if not parent_refs:
+        return
+    pending = [parent_ref() for parent_ref in parent_refs]
+    visited = set()
+    while len(pending) > 0:
+        entry = pending.pop()
+        if entry is None or id(entry) in visited:
+            continue
+        visited.add(id(entry))
+        object.__setattr__(entry, '_modification_stamp', stamp)
+        parent_refs = getattr(entry, '_parent_refs', None)
+        if parent_refs:
+            pending.extend(parent_ref() for parent_ref in parent_refs)
+
+
+def _link_children(parent, value):
+    """
+    Records (a weak reference to) `parent` as a container of the Serializable
+    (or SerializableArray or ParametersCollection) instances in `value`, so that
+    their modification is propagated to `parent` by :func:`_note_modification`.
+
+    Parameters
+    ----------
+    parent : Serializable|SerializableArray
+    value
+        The field value.
+
+    Returns
+    -------
+    None
+    """
+
+    if isinstance(value, (Serializable, SerializableArray, ParametersCollection)):
+        parent_refs = getattr(value, '_parent_refs', None)
+        if not parent_refs:
+            object.__setattr__(value, '_parent_refs', (ref(parent), ))
+        elif not any(parent_ref() is parent for parent_ref in parent_refs):
+            # discard any references to collected parents
+            object.__setattr__(
+                value, '_parent_refs',
+                tuple(parent_ref for parent_ref in parent_refs if parent_ref() is not None) + (ref(parent), ))
+    elif isinstance(value, (list, tuple)) or (isinstance(value, numpy.ndarray) and value.dtype == numpy.object_):
+        for entry in (value.flat if isinstance(value, numpy.ndarray) else value):
+            _link_children(parent, entry)
+
+
+def _get_slot_state(instance):
+    """
+    Gets the values of the populated `__slots__` of the instance, excluding the
+    modification tracking attributes.
+
+    Parameters
+    ----------
+    instance : object
+
+    Returns
+    -------
+    dict
+    """
+
+    state = {}
+    for the_class in instance.__class__.__mro__:
+        for attribute in the_class.__dict__.get('__slots__', ()):
+            if attribute not in state and attribute != '__weakref__' and \
+                    attribute not in _TRACKING_ATTRIBUTES and hasattr(instance, attribute):
+                state[attribute] = getattr(instance, attribute)
+    return state
+
+
+def get_modification_count(instance):
+    """
+    Gets the modification stamp of the given instance, which changes whenever
+    a field of the instance, or of any Serializable (or SerializableArray or
+    ParametersCollection) which it contains, is set. Setting a field elsewhere
+    does not change it. This permits memoizing expensive quantities, like validity,
+    until the tree changes. Note that in-place modification of a list or numpy
+    array field is not counted.
+
+    Parameters
+    ----------
+    instance : Serializable|SerializableArray|ParametersCollection
+
+    Returns
+    -------
+    int
+        `0` if no field has been set.
+    """
+
+    return getattr(instance, '_modification_stamp', 0)
+
 
 #################
 # dom helper functions
@@ -65,6 +180,36 @@ def _get_node_value(nod):
         return val
 
 
+def _parse_xml_bytes(xml_bytes):
+    """XML parsing helper which constructs the ElementTree in a single pass using
+    :func:`ElementTree.iterparse`, stripping any namespace from the element tags
+    as it goes.
+
+    Parameters
+    ----------
+    xml_bytes : bytes|str
+        the xml document. A string will be encoded as utf-8.
+
+    Returns
+    -------
+    ElementTree.Element
+        the root element.
+    """
+
+    if not isinstance(xml_bytes, bytes):
+        xml_bytes = xml_bytes.encode('utf-8')
+
+    root = None
+    for event, elem in ElementTree.iterparse(BytesIO(xml_bytes), events=('start', )):
+        if root is None:
+            root = elem
+        if elem.tag[0] == '{':
+            elem.tag = elem.tag.split('}', 1)[1]
+    if root is None:
+        raise ValueError('The xml document contains no elements')
+    return root
+
+
 def _create_new_node(doc, tag, parent=None):
     """XML ElementTree node creation helper function.
 
@@ -1092,6 +1237,50 @@ class _SerializableListDescriptor(_BasicDescriptor):
 # base Serializable class.
 
 
+_CHILD_DISPATCH = {}
+"""
+dict: the precompiled child tag dispatch table for each Serializable subclass, see :func:`Serializable._get_child_dispatch`
+"""
+
+
+_IMMUTABLE_TYPES = (type(None), bool, float, complex, datetime, date, numpy.generic) + integer_types + \
+    ((string_types, ) if isinstance(string_types, type) else string_types)
+
+
+def _copy_value(value):
+    """
+    Deep copy helper for :func:`Serializable.copy`, avoiding the generic (and slow)
+    `copy.deepcopy` for the types typically populated in fields.
+
+    Parameters
+    ----------
+    value
+
+    Returns
+    -------
+    object
+    """
+
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return value
+    elif isinstance(value, (Serializable, SerializableArray, ParametersCollection)):
+        return value.copy()
+    elif isinstance(value, numpy.ndarray):
+        if value.dtype != numpy.object_:
+            return value.copy()
+        out = numpy.empty(value.shape, dtype=numpy.object_)
+        for index, entry in enumerate(value.flat):
+            out.flat[index] = _copy_value(entry)
+        return out
+    elif isinstance(value, list):
+        return [_copy_value(entry) for entry in value]
+    elif isinstance(value, tuple):
+        return tuple(_copy_value(entry) for entry in value)
+    elif isinstance(value, dict):
+        return value.__class__((key, _copy_value(entry)) for key, entry in value.items())
+    return copy.deepcopy(value)
+
+
 class Serializable(object):
     """
     Basic abstract class specifying the serialization pattern. There are no clearly defined Python conventions
@@ -1182,6 +1371,76 @@ class Serializable(object):
                 'Class {} instance receiving unexpected attribute {}.\n'
                 '\tEnsure that this is not a typo of an expected field name.'.format(self.__class__.__name__, key))
         object.__setattr__(self, key, value)
+        if key in self._fields:
+            _link_children(self, getattr(self, key))
+            _note_modification(self)
+
+    @classmethod
+    def _get_field_descriptor(cls, attribute):
+        """
+        Gets the descriptor for the given field, if it is defined using a descriptor.
+
+        Parameters
+        ----------
+        attribute : str
+
+        Returns
+        -------
+        None|_BasicDescriptor
+        """
+
+        for the_class in cls.__mro__:
+            if attribute in the_class.__dict__:
+                descriptor = the_class.__dict__[attribute]
+                return descriptor if isinstance(descriptor, _BasicDescriptor) else None
+        return None
+
+    def __getstate__(self):
+        """
+        The state for pickling. The field values are stored by the descriptors,
+        rather than in the instance dictionary, so they are collected explicitly.
+        Likewise for the values of any `__slots__` of subclasses.
+
+        Returns
+        -------
+        tuple
+            The instance dictionary (including slot values) and the dictionary
+            of populated field values.
+        """
+
+        instance_dict = dict(
+            (key, value) for key, value in self.__dict__.items() if key not in _TRACKING_ATTRIBUTES)
+        for attribute, value in _get_slot_state(self).items():
+            if attribute not in instance_dict:
+                instance_dict[attribute] = value
+
+        fields = {}
+        for attribute in self._fields:
+            descriptor = self._get_field_descriptor(attribute)
+            if descriptor is not None and self in descriptor.data:
+                fields[attribute] = descriptor.data[self]
+        return instance_dict, fields
+
+    def __setstate__(self, state):
+        """
+        Restores the state from :func:`__getstate__`. The field values are placed
+        directly, since they were validated when first set.
+
+        Parameters
+        ----------
+        state : tuple
+
+        Returns
+        -------
+        None
+        """
+
+        instance_dict, fields = state
+        for attribute, value in instance_dict.items():
+            object.__setattr__(self, attribute, value)
+        for attribute, value in fields.items():
+            self._get_field_descriptor(attribute).data[self] = value
+            _link_children(self, value)
 
     def set_numeric_format(self, attribute, format_string):
         """Sets the numeric format string for the given attribute.
@@ -1319,9 +1578,49 @@ class Serializable(object):
             valid_children &= good
         return valid_children
 
+    @classmethod
+    def _get_child_dispatch(cls):
+        """
+        Gets the dispatch table for XML deserialization, mapping each child tag
+        to the fields which it populates. This is constructed from the class
+        metadata on first use, and cached.
+
+        Returns
+        -------
+        dict
+            Of the form `{<child_tag>: ((<attribute>, <is_list>), ...)}`, where
+            `is_list` indicates that every child with the given tag is collected,
+            rather than only the first.
+        """
+
+        dispatch = _CHILD_DISPATCH.get(cls, None)
+        if dispatch is not None:
+            return dispatch
+
+        dispatch = {}
+        for attribute in cls._fields:
+            if attribute in cls._set_as_attribute:
+                continue
+            the_tag, is_list = attribute, False
+            if attribute in cls._collections_tags:
+                # it's a collection type parameter
+                array_tag = cls._collections_tags[attribute]
+                child_tag = array_tag.get('child_tag', None)
+                if not array_tag.get('array', False):
+                    if child_tag is None:
+                        # the metadata is broken
+                        raise ValueError(
+                            'Attribute {} in class {} is listed in the _collections_tags dictionary, but the '
+                            '`child_tag` value is either not populated or None.'.format(attribute, cls))
+                    the_tag, is_list = child_tag, True
+            dispatch[the_tag] = dispatch.get(the_tag, ()) + ((attribute, is_list), )
+        _CHILD_DISPATCH[cls] = dispatch
+        return dispatch
+
     @classmethod
     def from_node(cls, node, kwargs=None):
-        """For XML deserialization.
+        """For XML deserialization. The children of `node` are visited once, and
+        assigned to fields using the dispatch table from :func:`_get_child_dispatch`.
 
         Parameters
         ----------
@@ -1335,53 +1634,52 @@ class Serializable(object):
             Corresponding class instance
         """
 
-        def handle_attribute(the_tag):
-            kwargs[the_tag] = node.attrib.get(the_tag, None)
-
-        def handle_single(the_tag):
-            kwargs[the_tag] = node.find(the_tag)
-
-        def handle_list(attrib, ch_tag):
-            cnodes = node.findall(ch_tag)
-            if len(cnodes) > 0:
-                kwargs[attrib] = cnodes
-
         if kwargs is None:
             kwargs = {}
         if not isinstance(kwargs, dict):
             raise ValueError(
                 "Named input argument kwargs for class {} must be dictionary instance".format(cls))
 
+        dispatch = cls._get_child_dispatch()
+        found = {}
+        for child in node:
+            for attribute, is_list in dispatch.get(child.tag, ()):
+                if is_list:
+                    if attribute in found:
+                        found[attribute].append(child)
+                    else:
+                        found[attribute] = [child, ]
+                elif attribute not in found:
+                    # only the first occurrence is used
+                    found[attribute] = child
+
         for attribute in cls._fields:
             if attribute in kwargs:
                 continue
-
-            kwargs[attribute] = None
-            # This value will be replaced if tags are present
-            # Note that we want to try explicitly setting to None to trigger descriptor behavior
-            # for required fields (warning or error)
-
+            # Note that we want to try explicitly setting to None, if absent, to trigger
+            # descriptor behavior for required fields (warning or error)
             if attribute in cls._set_as_attribute:
-                handle_attribute(attribute)
-            elif attribute in cls._collections_tags:
-                # it's a collection type parameter
-                array_tag = cls._collections_tags[attribute]
-                array = array_tag.get('array', False)
-                child_tag = array_tag.get('child_tag', None)
-                if array:
-                    handle_single(attribute)
-                elif child_tag is not None:
-                    handle_list(attribute, child_tag)
-                else:
-                    # the metadata is broken
-                    raise ValueError(
-                        'Attribute {} in class {} is listed in the _collections_tags dictionary, but the '
-                        '`child_tag` value is either not populated or None.'.format(attribute, cls))
+                kwargs[attribute] = node.attrib.get(attribute, None)
             else:
-                # it's a regular property
-                handle_single(attribute)
+                kwargs[attribute] = found.get(attribute, None)
         return cls.from_dict(kwargs)
 
+    @classmethod
+    def from_xml_bytes(cls, xml_bytes):
+        """For XML deserialization, from an xml document. Any namespace is ignored.
+
+        Parameters
+        ----------
+        xml_bytes : bytes|str
+            the xml document, where bytes are assumed to be utf-8 encoded.
+
+        Returns
+        -------
+            Corresponding class instance
+        """
+
+        return cls.from_node(_parse_xml_bytes(xml_bytes))
+
     def to_node(self, doc, tag, parent=None, check_validity=False, strict=DEFAULT_STRICT, exclude=()):
         """For XML serialization, to a dom element.
 
@@ -1658,16 +1956,38 @@ class Serializable(object):
                 out[attribute] = serialize_plain(attribute, value)
         return out
 
-    def copy(self):
+    def copy(self, share_references=None):
         """
-        Create a deep copy.
+        Create a deep copy. The field values are copied directly, without any
+        serialization or re-validation, since they were validated when set.
+
+        Parameters
+        ----------
+        share_references : None|Sequence[str]
+            The names of fields whose values (i.e. sub-trees) are referenced by
+            the copy, rather than copied. **This is plain reference sharing, not
+            copy-on-write.** Setting any field within a shared sub-tree, through
+            either instance, modifies it for both. Only share sub-trees which the
+            caller guarantees will not be modified. Replacing the whole field by
+            assignment, on either instance, is safe.
 
         Returns
         -------
-
+        Serializable
         """
 
-        return self.__class__.from_dict(copy.deepcopy(self.to_dict(check_validity=False)))
+        share_references = () if share_references is None else tuple(share_references)
+        unexpected = [attribute for attribute in share_references if attribute not in self._fields]
+        if len(unexpected) > 0:
+            raise ValueError(
+                'Got unexpected shared attributes {} for class {}'.format(unexpected, self.__class__.__name__))
+
+        instance_dict, fields = self.__getstate__()
+        the_copy = self.__class__.__new__(self.__class__)
+        the_copy.__setstate__((
+            dict((key, _copy_value(value)) for key, value in instance_dict.items()),
+            dict((key, value if key in share_references else _copy_value(value)) for key, value in fields.items())))
+        return the_copy
 
     def to_xml_bytes(self, urn=None, tag=None, check_validity=False, strict=DEFAULT_STRICT):
         """
@@ -1769,7 +2089,9 @@ class Arrayable(object):
 
 
 class SerializableArray(object):
-    __slots__ = ('_child_tag', '_child_type', '_array', '_name', '_minimum_length', '_maximum_length')
+    __slots__ = (
+        '_child_tag', '_child_type', '_array', '_name', '_minimum_length', '_maximum_length',
+        '_modification_stamp', '_parent_refs', '__weakref__')
     # TODO: make an iterator? I think it gets inferred.
     _default_minimum_length = 0
     _default_maximum_length = 2**32
@@ -1819,6 +2141,31 @@ class SerializableArray(object):
         if value is None:
             raise TypeError('Elements of {} must be of type {}, not None'.format(self._name, self._child_type))
         self._array[index] = _parse_serializable(value, self._name, self, self._child_type)
+        _link_children(self, self._array[index])
+        _note_modification(self)
+
+    def __getstate__(self):
+        return _get_slot_state(self)
+
+    def __setstate__(self, state):
+        for attribute, value in state.items():
+            object.__setattr__(self, attribute, value)
+        _link_children(self, self._array)
+
+    def copy(self):
+        """
+        Create a deep copy, without re-validation.
+
+        Returns
+        -------
+        SerializableArray
+        """
+
+        state = self.__getstate__()
+        state['_array'] = _copy_value(self._array)
+        the_copy = self.__class__.__new__(self.__class__)
+        the_copy.__setstate__(state)
+        return the_copy
 
     def is_valid(self, recursive=False):
         """Returns the validity of this object according to the schema. This is done by inspecting that the
@@ -1904,6 +2251,7 @@ class SerializableArray(object):
 
         if coords is None:
             self._array = None
+            _note_modification(self)
             return
         array = _parse_serializable_array(
             coords, 'coords', self, self._child_type, self._child_tag)
@@ -1914,6 +2262,8 @@ class SerializableArray(object):
 
         self._array = array
         self._check_indices()
+        _link_children(self, array)
+        _note_modification(self)
 
     def _check_indices(self):
         for i, entry in enumerate(self._array):
@@ -2017,7 +2367,7 @@ class SerializableCPArray(SerializableArray):
 
 
 class ParametersCollection(object):
-    __slots__ = ('_name', '_child_tag', '_dict')
+    __slots__ = ('_name', '_child_tag', '_dict', '_modification_stamp', '_parent_refs', '__weakref__')
 
     def __init__(self, collection=None, name=None, child_tag='Parameters'):
         self._dict = None
@@ -2051,8 +2401,10 @@ class ParametersCollection(object):
         if self._dict is None:
             self._dict = OrderedDict()
         self._dict[name] = value
+        _note_modification(self)
 
     def set_collection(self, value):
+        _note_modification(self)
         if value is None:
             self._dict = None
         else:
@@ -2061,6 +2413,28 @@ class ParametersCollection(object):
     def get_collection(self):
         return self._dict
 
+    def copy(self):
+        """
+        Create a deep copy.
+
+        Returns
+        -------
+        ParametersCollection
+        """
+
+        state = self.__getstate__()
+        state['_dict'] = _copy_value(self._dict)
+        the_copy = self.__class__.__new__(self.__class__)
+        the_copy.__setstate__(state)
+        return the_copy
+
+    def __getstate__(self):
+        return _get_slot_state(self)
+
+    def __setstate__(self, state):
+        for attribute, value in state.items():
+            object.__setattr__(self, attribute, value)
+
     # noinspection PyUnusedLocal
     def to_node(self, doc, parent=None, check_validity=False, strict=False):
         if self._dict is None:
@@ -7,18 +7,11 @@ import sys
 from collections import OrderedDict
 
 import numpy
-import scipy
 
 from .base import _get_node_value, _create_text_node, _create_new_node, Serializable, Arrayable, DEFAULT_STRICT, \
     _StringEnumDescriptor, _IntegerDescriptor, _FloatDescriptor, _FloatModularDescriptor, \
     _SerializableDescriptor
 
-if scipy.__version__ >= '1.0':
-    from scipy.special import comb
-else:
-    # noinspection PyUnresolvedReferences
-    from scipy.misc import comb
-
 integer_types = (int, )
 int_func = int
 if sys.version_info[0] < 3:
@@ -32,6 +25,19 @@ __classification__ = "UNCLASSIFIED"
 __author__ = "Thomas McCullough"
 
 
+def _comb(N, K):
+    """
+    The binomial coefficients, via scipy which is only imported when this is first required.
+    """
+
+    try:
+        from scipy.special import comb
+    except ImportError:
+        # noinspection PyUnresolvedReferences
+        from scipy.misc import comb  # older scipy versions
+    return comb(N, K)
+
+
 ##########
 # Geographical coordinates
 
@@ -857,7 +863,7 @@ class Poly1DType(Serializable, Arrayable):
             for i in range(siz):
                 N = numpy.arange(i, siz)
                 K = N-i
-                out[i] = numpy.sum(comb(N, K)*self._coefs[i:]*numpy.power(-t_0, K))
+                out[i] = numpy.sum(_comb(N, K)*self._coefs[i:]*numpy.power(-t_0, K))
                 # This is just the binomial expansion and gathering terms
 
         if alpha != 1:
@@ -3,6 +3,9 @@
 Common use sicd_elements methods.
 """
 
+# the speed of light in m/s (exact), as in scipy.constants without the import cost
+speed_of_light = 299792458.0
+
 
 def _get_center_frequency(RadarCollection, ImageFormation):
     """
@@ -7,7 +7,6 @@ import os
 import struct
 import logging
 import re
-from xml.etree import ElementTree
 from typing import Union, Dict, Tuple
 
 import numpy
@@ -17,7 +16,8 @@ from .sicd_elements.SICD import SICDType
 from .sicd_elements.ImageData import ImageDataType, FullImageType
 from .base import BaseReader
 from .bip import BIPChipper, BIPWriter
-from .sicd import complex_to_amp_phase, complex_to_int, amp_phase_to_complex, _SPECIFICATION_NAMESPACE
+from .codec import get_codec
+from .sicd import _SPECIFICATION_NAMESPACE
 
 __classification__ = "UNCLASSIFIED"
 __author__ = ("Thomas McCullough", "Wade Schwartzkopf")
@@ -97,6 +97,10 @@ class SIODetails(object):
     def data_offset(self):  # type: () -> int
         return self._data_offset
 
+    @property
+    def endian(self):  # type: () -> str
+        return self.ENDIAN[self._magic_number]
+
     @property
     def data_size(self):  # type: () -> Union[None, Tuple[int, int]]
         if self._head is None:
@@ -147,6 +151,7 @@ class SIODetails(object):
                     return out, user_dat_len
 
                 num_data_pairs = struct.unpack('{}I'.format(endian), fi.read(4))[0]
+                user_dat_len += 4
 
                 for i in range(num_data_pairs):
                     name_length = struct.unpack('{}I'.format(endian), fi.read(4))[0]
@@ -262,7 +267,8 @@ class SIODetails(object):
                 sicd_string = self._user_data.get(nam, None)
         # If so, assume that this SICD is valid and simply present it
         if sicd_string is not None:
-            self._sicd = SICDType.from_node(ElementTree.fromstring(sicd_string))
+            # the namespace is ignored, as for the sicd data extension
+            self._sicd = SICDType.from_xml_bytes(sicd_string)
             self._sicd.derive()
         else:
             # otherwise, we populate a really minimal sicd structure
@@ -301,11 +307,10 @@ class SIOReader(BaseReader):
                             'SIODetails object.')
         self._sio_details = sio_details
         sicd_meta = sio_details.get_sicd()
-        if sicd_meta.ImageData.PixelType == 'AMP8I_PHS8I':
-            complex_type = amp_phase_to_complex(sicd_meta.ImageData.AmpTable)
-        else:
-            complex_type = True
-        chipper = BIPChipper(sio_details.file_name, sio_details.data_type, sio_details.data_size,
+        # NB: the decoding handles the byte swap, if necessary
+        complex_type = get_codec(
+            sio_details.pixel_type, amp_table=sicd_meta.ImageData.AmpTable, byte_order=sio_details.endian)
+        chipper = BIPChipper(sio_details.file_name, complex_type.dtype, sio_details.data_size,
                              symmetry=sio_details.symmetry, complex_type=complex_type,
                              data_offset=sio_details.data_offset)
         super(SIOReader, self).__init__(sicd_meta, chipper)
@@ -315,7 +320,9 @@ class SIOReader(BaseReader):
 #  The actual writing implementation
 
 class SIOWriter(BIPWriter):
-    def __init__(self, file_name, sicd_meta, user_data=None):
+    __slots__ = ('_sicd_meta', )
+
+    def __init__(self, file_name, sicd_meta, user_data=None, threads=1, backend='memmap'):
         """
 
         Parameters
@@ -323,8 +330,14 @@ class SIOWriter(BIPWriter):
         file_name : str
         sicd_meta : SICDType
         user_data : None|Dict[str, str]
+        threads : int
+            The number of threads used for encoding the complex data.
+        backend : str
+            The writer backend, one of :data:`sarpy.io.complex.bip.WRITER_BACKENDS`.
         """
 
+        self._sicd_meta = sicd_meta.copy()
+
         # choose magic number (with user data) and corresponding endian-ness
         magic_number = 0xFD7F02FF
         endian = SIODetails.ENDIAN[magic_number]
@@ -333,20 +346,17 @@ class SIOWriter(BIPWriter):
         image_size = (sicd_meta.ImageData.NumRows, sicd_meta.ImageData.NumCols)
         pixel_type = sicd_meta.ImageData.PixelType
         if pixel_type == 'RE32F_IM32F':
-            data_type = numpy.dtype('{}f4'.format(endian))
             element_type = 13
             element_size = 8
-            complex_type = True
         elif pixel_type == 'RE16I_IM16I':
-            data_type = numpy.dtype('{}i2'.format(endian))
             element_type = 12
             element_size = 4
-            complex_type = complex_to_int
         else:
-            data_type = numpy.dtype('{}u1'.format(endian))
             element_type = 11
             element_size = 2
-            complex_type = complex_to_amp_phase(sicd_meta.ImageData.AmpTable)
+        complex_type = get_codec(
+            pixel_type, amp_table=sicd_meta.ImageData.AmpTable, byte_order=endian, threads=threads)
+        data_type = complex_type.dtype
         # construct the sio header
         header = numpy.array(
             [magic_number, image_size[0], image_size[1], element_type, element_size],
@@ -358,15 +368,25 @@ class SIOWriter(BIPWriter):
         data_offset = 20
         with open(file_name, 'wb') as fi:
             fi.write(struct.pack('{}5I'.format(endian), *header))
-            # write the user data - name size, name, value size, value
+            # write the user data - number of pairs, then name size, name, value size, value
+            fi.write(struct.pack('{}I'.format(endian), len(user_data)))
+            data_offset += 4
             for name in user_data:
                 name_bytes = name.encode('utf-8')
                 fi.write(struct.pack('{}I'.format(endian), len(name_bytes)))
-                fi.write(struct.pack('{}{}s'.format(endian, len(name_bytes), name_bytes)))
+                fi.write(struct.pack('{}{}s'.format(endian, len(name_bytes)), name_bytes))
                 val_bytes = user_data[name].encode('utf-8')
                 fi.write(struct.pack('{}I'.format(endian), len(val_bytes)))
-                fi.write(struct.pack('{}{}s'.format(endian, len(val_bytes), val_bytes)))
+                fi.write(struct.pack('{}{}s'.format(endian, len(val_bytes)), val_bytes))
                 data_offset += 4 + len(name_bytes) + 4 + len(val_bytes)
         # initialize the bip writer - we're ready to go
         super(SIOWriter, self).__init__(file_name, image_size, data_type,
-                                        complex_type=complex_type, data_offset=data_offset)
+                                        complex_type=complex_type, data_offset=data_offset, backend=backend)
+
+    @property
+    def sicd_meta(self):
+        """
+        SICDType: the sicd metadata
+        """
+
+        return self._sicd_meta
@@ -4,6 +4,10 @@ Module providing api consistent with other file types for reading tiff files.
 """
 
 import logging
+import sys
+import threading
+import zlib
+from multiprocessing.pool import ThreadPool
 import numpy
 import warnings
 
@@ -15,8 +19,13 @@ except ImportError:
     gdal = None
     _HAS_GDAL = False
 
-from .base import BaseChipper, BaseReader
-from .bip import BIPChipper
+from .base import BaseChipper, BaseReader, BlockCache
+from .bip import BIPChipper, PositionalFile
+
+int_func = int
+if sys.version_info[0] < 3:
+    # noinspection PyUnresolvedReferences
+    int_func = long  # to accommodate for 32-bit python 2
 
 
 __classification__ = "UNCLASSIFIED"
@@ -357,14 +366,168 @@ class TiffDetails(object):
         self._parse_ifd(fi, tags, type_dtype, offset_dtype, offset_size)  # recurse
 
 
+def _lzw_decode(data):
+    """
+    Decode TIFF style LZW compressed data. That is, codes are packed most
+    significant bit first, 256 is the clear code, 257 is the end of information
+    code, and the code width increases one code early.
+
+    Parameters
+    ----------
+    data : bytes
+
+    Returns
+    -------
+    bytes
+    """
+
+    source = bytearray(data)
+    out = bytearray()
+    table = [bytes(bytearray([i])) for i in range(256)] + [b'', b'']
+    code_length = 9
+    previous = None
+    bit_buffer, bit_count, index = 0, 0, 0
+    while True:
+        while bit_count < code_length:
+            if index >= len(source):
+                return bytes(out)
+            bit_buffer = (bit_buffer << 8) | source[index]
+            index += 1
+            bit_count += 8
+        bit_count -= code_length
+        code = (bit_buffer >> bit_count) & ((1 << code_length) - 1)
+        bit_buffer &= (1 << bit_count) - 1
+        if code == 257:
+            return bytes(out)
+        if code == 256:
+            del table[258:]
+            code_length = 9
+            previous = None
+            continue
+        if previous is None:
+            entry = table[code]
+        else:
+            if code < len(table):
+                entry = table[code]
+                table.append(previous + entry[:1])
+            else:
+                entry = previous + previous[:1]
+                table.append(entry)
+            if len(table) >= (1 << code_length) - 1 and code_length < 12:
+                code_length += 1
+        out += entry
+        previous = entry
+
+
+def _packbits_decode(data):
+    """
+    Decode PackBits compressed data.
+
+    Parameters
+    ----------
+    data : bytes
+
+    Returns
+    -------
+    bytes
+    """
+
+    source = bytearray(data)
+    out = bytearray()
+    index = 0
+    while index < len(source):
+        header = source[index]
+        index += 1
+        if header < 128:
+            # copy the next header + 1 bytes literally
+            out += source[index:index+header+1]
+            index += header + 1
+        elif header > 128:
+            # repeat the next byte 257 - header times
+            out += source[index:index+1]*(257 - header)
+            index += 1
+        # header == 128 is a no-op
+    return bytes(out)
+
+
+# the decompression function for each supported Compression tag value
+_DECOMPRESSORS = {
+    5: _lzw_decode,
+    8: zlib.decompress,  # Adobe deflate
+    32773: _packbits_decode,
+    32946: zlib.decompress,  # deflate
+}
+
+
+_SAMPLE_FORMATS = {
+    1: 'u', 2: 'i', 3: 'f', 5: 'i', 6: 'f'}  # 5 and 6 are complex int/float
+
+
+def _get_data_type(tiff_meta):
+    """
+    Determine the stored data type details from the tiff tags.
+
+    Parameters
+    ----------
+    tiff_meta : TiffDetails
+
+    Returns
+    -------
+    (numpy.dtype, bool, int)
+        The data type of each stored sample, whether the samples are complex
+        (i.e. real/imaginary components in adjacent bands), and the number of
+        stored samples per pixel.
+    """
+
+    samp_form = int(tiff_meta.tags['SampleFormat'][0]) if 'SampleFormat' in tiff_meta.tags else 1
+    if samp_form not in _SAMPLE_FORMATS:
+        raise ValueError('Invalid sample format {}'.format(samp_form))
+    bits_per_sample = int(tiff_meta.tags['BitsPerSample'][0])
+    samples_per_pixel = int(tiff_meta.tags['SamplesPerPixel'][0]) if 'SamplesPerPixel' in tiff_meta.tags else 1
+    complex_type = (samples_per_pixel == 2)  # NB: this is obviously not general
+    if samp_form in [5, 6]:
+        bits_per_sample /= 2
+        samples_per_pixel *= 2
+        complex_type = True
+    data_type = numpy.dtype('{0:s}{1:s}{2:d}'.format(
+        tiff_meta.endian, _SAMPLE_FORMATS[samp_form], int(bits_per_sample/8)))
+    return data_type, complex_type, samples_per_pixel
+
+
+def _has_contiguous_strips(tiff_meta):
+    """
+    Is the image data stored as uncompressed strips, which are contiguous in
+    the file? If so, it can be read directly as a band interleaved by pixel file.
+
+    Parameters
+    ----------
+    tiff_meta : TiffDetails
+
+    Returns
+    -------
+    bool
+    """
+
+    tags = tiff_meta.tags
+    compression = int(tags['Compression'][0]) if 'Compression' in tags else 1
+    if compression != 1 or 'TileOffsets' in tags or 'StripOffsets' not in tags:
+        return False
+    if 'PlanarConfiguration' in tags and int(tags['PlanarConfiguration'][0]) != 1:
+        return False
+    offsets = numpy.array(tags['StripOffsets'], dtype=numpy.int64)
+    byte_counts = numpy.array(tags['StripByteCounts'], dtype=numpy.int64)
+    return bool(numpy.all(offsets[1:] == offsets[:-1] + byte_counts[:-1]))
+
+
 class NativeTiffChipper(BIPChipper):
     """
-    Direct reading of data from tiff file, failing if compression is present
+    Direct reading of data from tiff file, failing if compression is present.
+    This requires that the strips are stored contiguously in the file, see
+    :class:`TiledTiffChipper` otherwise.
     """
 
     __slots__ = ('_tiff_meta', )
-    _SAMPLE_FORMATS = {
-        1: 'u', 2: 'i', 3: 'f', 5: 'i', 6: 'f'}  # 5 and 6 are complex int/float
+    _SAMPLE_FORMATS = _SAMPLE_FORMATS
 
     def __init__(self, tiff_meta, symmetry=(False, False, True)):
         """
@@ -381,29 +544,303 @@ class NativeTiffChipper(BIPChipper):
             raise TypeError('NativeTiffChipper input argument must be a filename '
                             'or TiffDetails object.')
 
-        compression_tag = int(tiff_meta.tags['Compression'][0])
+        tags = tiff_meta.tags
+        compression_tag = int(tags['Compression'][0]) if 'Compression' in tags else 1
         if compression_tag != 1:
             raise ValueError('Tiff has compression tag {}, but only 1 (no compression) '
                              'is supported.'.format(compression_tag))
 
         self._tiff_meta = tiff_meta
-        samp_form = tiff_meta.tags['SampleFormat'][0]
-        if samp_form not in self._SAMPLE_FORMATS:
-            raise ValueError('Invalid sample format {}'.format(samp_form))
-        bits_per_sample = tiff_meta.tags['BitsPerSample'][0]
-        complex_type = (int(tiff_meta.tags['SamplesPerPixel'][0]) == 2)  # NB: this is obviously not general
-        if samp_form in [5, 6]:
-            bits_per_sample /= 2
-            complex_type = True
+        data_type, complex_type, samples_per_pixel = _get_data_type(tiff_meta)
         data_size = (tiff_meta.tags['ImageLength'][0], tiff_meta.tags['ImageWidth'][0])
-        data_type = numpy.dtype('{0:s}{1:s}{2:d}'.format(self._tiff_meta.endian,
-                                                         self._SAMPLE_FORMATS[samp_form],
-                                                         int(bits_per_sample/8)))
         data_offset = tiff_meta.tags['StripOffsets'][0]
 
         super(NativeTiffChipper, self).__init__(
             tiff_meta.file_name, data_type, data_size, symmetry=symmetry, complex_type=complex_type,
-            data_offset=data_offset, bands_ip=1)
+            data_offset=data_offset, bands_ip=int_func(samples_per_pixel/2) if complex_type else samples_per_pixel)
+
+
+class TiledTiffChipper(BaseChipper):
+    """
+    Reading of data from a tiff file with arbitrarily located strips or tiles.
+    An index of the blocks (i.e. strips or tiles) is constructed from the
+    `StripOffsets`/`StripByteCounts` or `TileOffsets`/`TileByteCounts` tags, and
+    each read fetches only the portions of the blocks which it overlaps.
+
+    Deflate, LZW, and PackBits compression are supported, along with horizontal
+    differencing (`Predictor=2`). Compressed blocks must be decoded in their
+    entirety, so the decoded blocks are kept in a least recently used cache,
+    and the blocks required for a given read are decoded concurrently when
+    `threads` is greater than one.
+    """
+
+    __slots__ = (
+        '_tiff_meta', '_data_type', '_bands', '_image_shape', '_block_shape', '_grid_shape',
+        '_is_tiled', '_block_offsets', '_block_byte_counts', '_fid',
+        '_compression', '_predictor', '_decoded_blocks', '_threads', '_thread_pool', '_pool_lock')
+
+    def __init__(self, tiff_meta, symmetry=(False, False, True), threads=1, cache_bytes=2**26):
+        """
+
+        Parameters
+        ----------
+        tiff_meta : TiffDetails|str
+        symmetry : Tuple[bool]
+        threads : int
+            The number of threads used for decoding compressed blocks.
+        cache_bytes : int
+            The maximum size in bytes of the cache of decoded blocks, only
+            used for compressed data. Default is 2**26 = 64MB.
+        """
+
+        if isinstance(tiff_meta, str):
+            tiff_meta = TiffDetails(tiff_meta)
+        if not isinstance(tiff_meta, TiffDetails):
+            raise TypeError('TiledTiffChipper input argument must be a filename '
+                            'or TiffDetails object.')
+        self._tiff_meta = tiff_meta
+        tags = tiff_meta.tags
+        self._compression = int(tags['Compression'][0]) if 'Compression' in tags else 1
+        if self._compression != 1 and self._compression not in _DECOMPRESSORS:
+            raise ValueError(
+                'Tiff has compression tag {}, but only 1 (no compression) or {} are '
+                'supported.'.format(self._compression, sorted(_DECOMPRESSORS.keys())))
+        self._predictor = int(tags['Predictor'][0]) if 'Predictor' in tags else 1
+        if self._predictor not in [1, 2]:
+            raise ValueError('Tiff has predictor tag {}, but only 1 or 2 are supported.'.format(self._predictor))
+        if 'PlanarConfiguration' in tags and int(tags['PlanarConfiguration'][0]) != 1:
+            raise ValueError('Only PlanarConfiguration 1 (chunky) is supported.')
+
+        self._data_type, complex_type, self._bands = _get_data_type(tiff_meta)
+        self._image_shape = (int_func(tags['ImageLength'][0]), int_func(tags['ImageWidth'][0]))
+        self._is_tiled = ('TileOffsets' in tags)
+        if self._is_tiled:
+            # NB: tiles are always full size in the file, even at the image edges
+            self._block_shape = (int_func(tags['TileLength'][0]), int_func(tags['TileWidth'][0]))
+            self._block_offsets = numpy.array(tags['TileOffsets'], dtype=numpy.int64)
+            self._block_byte_counts = numpy.array(tags['TileByteCounts'], dtype=numpy.int64)
+        else:
+            # NB: the final strip may contain fewer rows
+            rows_per_strip = int_func(tags['RowsPerStrip'][0]) if 'RowsPerStrip' in tags else self._image_shape[0]
+            self._block_shape = (max(1, min(rows_per_strip, self._image_shape[0])), self._image_shape[1])
+            self._block_offsets = numpy.array(tags['StripOffsets'], dtype=numpy.int64)
+            self._block_byte_counts = numpy.array(tags['StripByteCounts'], dtype=numpy.int64)
+        self._grid_shape = (
+            int_func((self._image_shape[0] + self._block_shape[0] - 1)//self._block_shape[0]),
+            int_func((self._image_shape[1] + self._block_shape[1] - 1)//self._block_shape[1]))
+        if self._block_offsets.size != self._grid_shape[0]*self._grid_shape[1]:
+            raise ValueError(
+                'The tiff has {} blocks, but {} are expected for image shape {} and block '
+                'shape {}'.format(self._block_offsets.size, self._grid_shape[0]*self._grid_shape[1],
+                                  self._image_shape, self._block_shape))
+        self._fid = PositionalFile(tiff_meta.file_name, mode='r')
+        self._decoded_blocks = BlockCache(max_bytes=cache_bytes)
+        self._threads = max(1, int_func(threads))
+        self._thread_pool = None
+        self._pool_lock = threading.Lock()
+        super(TiledTiffChipper, self).__init__(self._image_shape, symmetry=symmetry, complex_type=complex_type)
+
+    def __del__(self):
+        if getattr(self, '_fid', None) is not None:
+            self._fid.close()
+        if getattr(self, '_thread_pool', None) is not None:
+            self._thread_pool.terminate()
+
+    @property
+    def compression(self):
+        """
+        int: The tiff Compression tag value.
+        """
+
+        return self._compression
+
+    @property
+    def decoded_blocks(self):
+        """
+        BlockCache: The cache of decoded blocks, which is only used for compressed data.
+        """
+
+        return self._decoded_blocks
+
+    def _get_thread_pool(self):
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPool(processes=self._threads)
+            return self._thread_pool
+
+    @property
+    def block_shape(self):
+        """
+        Tuple[int, int]: The (rows, columns) shape of the strips or tiles, in
+        file storage order.
+        """
+
+        return self._block_shape
+
+    def _get_block_rows(self, block_index):
+        """
+        Gets the number of rows stored in the given block.
+        """
+
+        if self._is_tiled:
+            return self._block_shape[0]
+        block_row = block_index//self._grid_shape[1]
+        return min(self._block_shape[0], self._image_shape[0] - block_row*self._block_shape[0])
+
+    def _decode_block(self, block_index):
+        """
+        Reads and decodes the given (compressed) block.
+
+        Parameters
+        ----------
+        block_index : int
+
+        Returns
+        -------
+        numpy.ndarray
+            Of shape `(block rows, block columns, bands)`.
+        """
+
+        raw = numpy.empty((int_func(self._block_byte_counts[block_index]), ), dtype=numpy.uint8)
+        self._fid.read_into(int_func(self._block_offsets[block_index]), raw)
+        decoded = _DECOMPRESSORS[self._compression](raw.tobytes())
+        shape = (self._get_block_rows(block_index), self._block_shape[1], self._bands)
+        size = shape[0]*shape[1]*shape[2]
+        if len(decoded) < size*self._data_type.itemsize:
+            raise ValueError(
+                'Block {} of file {} decoded to {} bytes, but {} are expected'.format(
+                    block_index, self._tiff_meta.file_name, len(decoded), size*self._data_type.itemsize))
+        data = numpy.frombuffer(decoded, dtype=self._data_type, count=size).reshape(shape)
+        if self._predictor == 2:
+            # undo the horizontal differencing, which is applied to each sample
+            # of the native value, with integer overflow wrapping around
+            native = data.astype(self._data_type.newbyteorder('='))
+            data = numpy.cumsum(native, axis=1, dtype=native.dtype)
+        return data
+
+    def _get_decoded_blocks(self, block_indices):
+        """
+        Gets the decoded blocks, from the cache or decoding (concurrently) as necessary.
+
+        Parameters
+        ----------
+        block_indices : List[int]
+
+        Returns
+        -------
+        dict
+        """
+
+        blocks = {}
+        missing = []
+        for block_index in block_indices:
+            block = self._decoded_blocks.get(block_index)
+            if block is None:
+                missing.append(block_index)
+            else:
+                blocks[block_index] = block
+        if self._threads > 1 and len(missing) > 1:
+            decoded = self._get_thread_pool().map(self._decode_block, missing, chunksize=1)
+        else:
+            decoded = [self._decode_block(block_index) for block_index in missing]
+        for block_index, block in zip(missing, decoded):
+            self._decoded_blocks.put(block_index, block)
+            blocks[block_index] = block
+        return blocks
+
+    def _read_block(self, block_index, row_start, row_stop):
+        """
+        Reads the given rows of the given (uncompressed) block.
+
+        Parameters
+        ----------
+        block_index : int
+        row_start : int
+            The first row, relative to the block.
+        row_stop : int
+            The (exclusive) final row, relative to the block.
+
+        Returns
+        -------
+        numpy.ndarray
+            Of shape `(row_stop - row_start, block columns, bands)`.
+        """
+
+        row_size = self._block_shape[1]*self._bands*self._data_type.itemsize
+        data = numpy.empty((row_stop - row_start, self._block_shape[1], self._bands), dtype=self._data_type)
+        self._fid.read_into(int_func(self._block_offsets[block_index]) + row_start*row_size, data)
+        return data
+
+    def _get_groups(self, indices, block_size):
+        """
+        Partitions the indices into runs lying within a single block.
+
+        Parameters
+        ----------
+        indices : numpy.ndarray
+        block_size : int
+
+        Returns
+        -------
+        List[Tuple[int, slice, numpy.ndarray]]
+            The block id, the slice of the output, and the indices relative to the block.
+        """
+
+        if indices.size == 0:
+            return []
+        block_ids = indices//block_size
+        bounds = numpy.concatenate(([0, ], numpy.nonzero(numpy.diff(block_ids))[0] + 1, [indices.size, ]))
+        groups = []
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            block_id = int_func(block_ids[begin])
+            groups.append(
+                (block_id, slice(int_func(begin), int_func(end)), indices[begin:end] - block_id*block_size))
+        return groups
+
+    def _plan_read(self, range1, range2):
+        """
+        Determines the block reads required for the given (reordered) ranges.
+
+        Parameters
+        ----------
+        range1 : Tuple[int, int, int]
+        range2 : Tuple[int, int, int]
+
+        Returns
+        -------
+        (Tuple[int, int], List[Tuple[int, slice, numpy.ndarray, slice, numpy.ndarray]])
+            The output shape, and a list of the block index, the output row slice,
+            the block relative rows, the output column slice, and the block relative
+            columns.
+        """
+
+        # NB: a "stop" of -1 with negative step is understood as running through 0
+        rows = numpy.arange(*range1, dtype=numpy.int64)
+        cols = numpy.arange(*range2, dtype=numpy.int64)
+        plan = []
+        for block_row, row_out, row_local in self._get_groups(rows, self._block_shape[0]):
+            for block_col, col_out, col_local in self._get_groups(cols, self._block_shape[1]):
+                plan.append((block_row*self._grid_shape[1] + block_col, row_out, row_local, col_out, col_local))
+        return (rows.size, cols.size), plan
+
+    def _read_raw_fun(self, range1, range2, out=None):
+        range1, range2 = self._reorder_arguments(range1, range2)
+        shape, plan = self._plan_read(range1, range2)
+        data = numpy.empty(shape + (self._bands, ), dtype=self._data_type)
+        if self._compression != 1:
+            blocks = self._get_decoded_blocks(sorted(set(entry[0] for entry in plan)))
+            for block_index, row_out, row_local, col_out, col_local in plan:
+                data[row_out, col_out] = blocks[block_index][numpy.ix_(row_local, col_local)]
+        else:
+            for block_index, row_out, row_local, col_out, col_local in plan:
+                # only read the required rows of the block
+                row_start, row_stop = int_func(row_local.min()), int_func(row_local.max()) + 1
+                block = self._read_block(block_index, row_start, row_stop)
+                data[row_out, col_out] = block[numpy.ix_(row_local - row_start, col_local)]
+        if out is None:
+            return data
+        out[:] = numpy.reshape(data, out.shape)
+        return out
 
 
 class GdalTiffChipper(BaseChipper):
@@ -450,16 +887,19 @@ class GdalTiffChipper(BaseChipper):
         # TODO: this does not generally work should we clunkily fall back to dataset.band.ReadAsArray()?
         #   This doesn't support slicing...
 
-    def _read_raw_fun(self, range1, range2):
+    def _read_raw_fun(self, range1, range2, out=None):
         arange1, arange2 = self._reorder_arguments(range1, range2)
         if self._bands == 1:
-            out = self._virt_array[arange1[0]:arange1[1]:arange1[2], arange2[0]:arange2[1]:arange2[2]]
+            data = self._virt_array[arange1[0]:arange1[1]:arange1[2], arange2[0]:arange2[1]:arange2[2]]
         elif self._data_set.band_sequential:
             # push the bands to the end
-            out = (self._virt_array[:, arange1[0]:arange1[1]:arange1[2], arange2[0]:arange2[1]:arange2[2]]).transpose((2, 0, 1))
+            data = (self._virt_array[:, arange1[0]:arange1[1]:arange1[2], arange2[0]:arange2[1]:arange2[2]]).transpose((2, 0, 1))
         else:
             # push the bands to the end
-            out = self._virt_array[arange1[0]:arange1[1]:arange1[2], arange2[0]:arange2[1]:arange2[2], :]
+            data = self._virt_array[arange1[0]:arange1[1]:arange1[2], arange2[0]:arange2[1]:arange2[2], :]
+        if out is None:
+            return data
+        out[:] = numpy.reshape(data, out.shape)
         return out
 
 
@@ -467,7 +907,7 @@ class TiffReader(BaseReader):
     __slots__ = ('_tiff_meta', '_sicd_meta', '_chipper')
     _DEFAULT_SYMMETRY = (False, False, False)
 
-    def __init__(self, tiff_meta, sicd_meta=None, symmetry=None, use_gdal=False):
+    def __init__(self, tiff_meta, sicd_meta=None, symmetry=None, use_gdal=False, threads=1):
         """
 
         Parameters
@@ -476,7 +916,11 @@ class TiffReader(BaseReader):
         sicd_meta : None|sarpy.io.complex.sicd_elements.SICD.SICDType
         symmetry : Tuple[bool]
         use_gdal : bool
-            Should we use gdal to read the tiff (required if compressed)
+            Should we use gdal to read the tiff? Otherwise, contiguous strips
+            are read directly, and anything else (including compressed data)
+            using a strip or tile index.
+        threads : int
+            The number of threads used for decoding compressed strips or tiles.
         """
 
         if isinstance(tiff_meta, str):
@@ -503,6 +947,8 @@ class TiffReader(BaseReader):
             use_gdal = False
         if use_gdal:
             chipper = GdalTiffChipper(tiff_meta, symmetry=symmetry)
-        else:
+        elif _has_contiguous_strips(tiff_meta):
             chipper = NativeTiffChipper(tiff_meta, symmetry=symmetry)
+        else:
+            chipper = TiledTiffChipper(tiff_meta, symmetry=symmetry, threads=threads)
         super(TiffReader, self).__init__(sicd_meta, chipper)
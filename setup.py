@@ -70,6 +70,9 @@ setup(name=parameters['__title__'],
         'csk':  ['h5py', ],
         'docs': ['Sphinx', 'sphinxcontrib-napoleon'],
       },
+      entry_points={
+        'console_scripts': ['sarpy_convert = sarpy.io.complex.batch:main', ],
+      },
       zip_safe=False,  # Use of __file__ and __path__ in some code makes it unusable from zip
       test_suite="tests",
       tests_require=tests_require,
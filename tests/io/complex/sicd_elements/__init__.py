@@ -25,6 +25,15 @@ def generic_construction_test(instance, the_type, the_dict, tag='The_Type', prin
         item2 = the_type.from_node(node)
         instance.assertEqual(the_item.to_dict(), item2.to_dict())
 
+    with instance.subTest(msg='Test xml bytes deserialization with namespace'):
+        item2 = the_type.from_xml_bytes(the_item.to_xml_bytes(urn='urn:Test:1.0', tag=tag))
+        instance.assertEqual(the_item.to_dict(), item2.to_dict())
+
+    with instance.subTest(msg='Test copy'):
+        item3 = the_item.copy()
+        instance.assertIsNot(item3, the_item)
+        instance.assertEqual(the_item.to_dict(), item3.to_dict())
+
     with instance.subTest(msg='Test validity'):
         instance.assertTrue(the_item.is_valid())
     return the_item
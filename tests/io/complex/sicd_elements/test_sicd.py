@@ -1,5 +1,9 @@
 
+import pickle
+from xml.etree import ElementTree
+
 from sarpy.io.complex.sicd_elements import SICD
+from sarpy.io.complex.sicd_elements.base import get_modification_count
 
 from . import generic_construction_test, unittest
 
@@ -82,3 +86,74 @@ class TestSICD(unittest.TestCase):
         item1.ImageFormation.ImageFormAlgo = 'PFA'
         # SICD does not have the PFA item set, so this should warn us
         self.assertFalse(item1.is_valid())
+
+    def test_memoized_validity(self):
+        item1 = SICD.SICDType.from_dict(sicd_dict)
+        item1.ImageFormation.ImageFormAlgo = 'OTHER'
+        valid = item1.is_valid(recursive=True)
+        memo = item1.__dict__['_validity_memo']
+        self.assertEqual(item1.is_valid(recursive=True), valid)
+        self.assertIs(item1.__dict__['_validity_memo'], memo)
+        # a non-recursive check is memoized separately
+        item1.is_valid()
+        self.assertIsNot(item1.__dict__['_validity_memo'], memo)
+        # modifying a field of a child invalidates the memoized result
+        item1.is_valid(recursive=True)
+        item1.ImageFormation.ImageFormAlgo = 'PFA'
+        self.assertFalse(item1.is_valid(recursive=True))
+
+        # modifying another instance does not invalidate the memoized result
+        item2 = SICD.SICDType.from_dict(sicd_dict)
+        item1.is_valid()
+        memo = item1.__dict__['_validity_memo']
+        item2.ImageFormation.ImageFormAlgo = 'PFA'
+        item2.copy().Grid.Row.SS = 1.
+        item1.is_valid()
+        self.assertIs(item1.__dict__['_validity_memo'], memo)
+
+        # the modification of a deeply nested field, including in an array, is propagated
+        for item in [item1, item1.copy(), pickle.loads(pickle.dumps(item1))]:
+            count = get_modification_count(item)
+            item.GeoData.ImageCorners[0].Lat = 1.
+            self.assertGreater(get_modification_count(item), count)
+            count = get_modification_count(item)
+            item.Position.ARPPoly.X.Coefs = [1., 2.]
+            self.assertGreater(get_modification_count(item), count)
+
+    def test_copy(self):
+        item1 = SICD.SICDType.from_dict(sicd_dict)
+        item2 = item1.copy()
+        self.assertEqual(item1.to_dict(), item2.to_dict())
+        self.assertIsNot(item1.Grid, item2.Grid)
+        self.assertIsNot(item1.Position.ARPPoly.X, item2.Position.ARPPoly.X)
+        item2.Grid.Row.SS = 2*item1.Grid.Row.SS
+        self.assertNotEqual(item1.Grid.Row.SS, item2.Grid.Row.SS)
+
+        item3 = item1.copy(share_references=('Position', 'Antenna'))
+        self.assertIs(item1.Position, item3.Position)
+        self.assertIsNot(item1.Grid, item3.Grid)
+        # a modification within a shared sub-tree is seen by both
+        count = get_modification_count(item1)
+        item3.Position.ARPPoly.X.Coefs = [1., 2.]
+        self.assertEqual(item1.Position.ARPPoly.X.Coefs.tolist(), [1., 2.])
+        self.assertGreater(get_modification_count(item1), count)
+        # shared sub-trees are safely replaced by assignment
+        item3.Position = item1.Position.copy()
+        self.assertIsNot(item1.Position, item3.Position)
+        self.assertEqual(item1.to_dict(), item3.to_dict())
+        item3.Position.ARPPoly.X.Coefs = [3., 4.]
+        self.assertEqual(item1.Position.ARPPoly.X.Coefs.tolist(), [1., 2.])
+        with self.assertRaises(ValueError):
+            item1.copy(share_references=('NotAField', ))
+
+    def test_from_xml_bytes(self):
+        item1 = SICD.SICDType.from_dict(sicd_dict)
+        xml = item1.to_xml_string(tag='SICD')
+        expected = item1.to_dict()
+        # prefixed namespaces are stripped, along with the default namespace
+        prefixed = xml.replace('<', '<sicd:').replace('<sicd:/', '</sicd:').replace(
+            '<sicd:SICD>', '<sicd:SICD xmlns:sicd="urn:SICD:1.1.0">', 1)
+        for value in [xml, xml.encode('utf-8'), prefixed]:
+            self.assertEqual(SICD.SICDType.from_xml_bytes(value).to_dict(), expected)
+        with self.assertRaises(ElementTree.ParseError):
+            SICD.SICDType.from_xml_bytes(b'<SICD>')
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from sarpy.io.complex.base import BlockCache, BaseReader, BlockSizeTuner, set_validation_policy, \
+    get_validation_policy
+from sarpy.io.complex.bip import BIPChipper
+from sarpy.io.complex.sicd_elements.SICD import SICDType
+from sarpy.io.complex.sicd_elements.CollectionInfo import CollectionInfoType
+
+from . import unittest
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        block = numpy.zeros((10, ), dtype=numpy.uint8)
+        cache = BlockCache(max_bytes=30)
+        for key in range(3):
+            cache.put(key, block.copy())
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.current_bytes, 30)
+        # touch 0, so that 1 is the least recently used
+        self.assertIsNotNone(cache.get(0))
+        cache.put(3, block.copy())
+        self.assertTrue(1 not in cache)
+        self.assertTrue(0 in cache and 2 in cache and 3 in cache)
+        self.assertEqual(cache.current_bytes, 30)
+
+    def test_oversize_block(self):
+        cache = BlockCache(max_bytes=5)
+        cache.put(0, numpy.zeros((10, ), dtype=numpy.uint8))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.current_bytes, 0)
+
+    def test_counters(self):
+        cache = BlockCache(max_bytes=100)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', numpy.zeros((2, ), dtype=numpy.uint8))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.current_bytes, 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.reset_statistics()
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_bad_size(self):
+        with self.assertRaises(ValueError):
+            BlockCache(max_bytes=-1)
+
+
+class TestBlockSizeTuner(unittest.TestCase):
+    def test_choice(self):
+        tuner = BlockSizeTuner(100, max_block_size=10000, min_block_size=100, trials=3)
+        self.assertEqual(tuner.trial_rows, (1, 10, 100))
+        self.assertEqual([tuner.next_rows() for _ in range(3)], [1, 10, 100])
+        self.assertIsNone(tuner.rows_per_block)
+        # nothing measured yet
+        self.assertEqual(tuner.next_rows(), 10)
+        tuner.record(1, 1.)
+        tuner.record(10, 1.)
+        tuner.record(100, 5.)
+        tuner.record(7, 0.)  # a truncated block is ignored
+        self.assertEqual(sorted(tuner.get_throughput().keys()), [1, 10, 100])
+        self.assertEqual(tuner.next_rows(), 100)
+        # within 10% of the best, the smaller size is preferred
+        tuner.record(10, 0.05)
+        self.assertEqual(tuner.next_rows(), 10)
+        self.assertEqual(tuner.rows_per_block, 10)
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            BlockSizeTuner(0)
+        with self.assertRaises(ValueError):
+            BlockSizeTuner(10, trials=0)
+        # the default budget is sensible
+        tuner = BlockSizeTuner(2**20, trials=1)
+        self.assertTrue(16 <= tuner.trial_rows[0] <= 1024)
+
+
+class _BIPFileTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (37, 23)
+        cls.file_name = os.path.join(cls.temp_directory, 'test.bip')
+        cls.data = numpy.reshape(numpy.arange(2*cls.shape[0]*cls.shape[1], dtype='>f4'), cls.shape + (2, ))
+        cls.data.tofile(cls.file_name)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+
+class TestChipperCache(_BIPFileTestCase):
+    def test_cached_reads(self):
+        ranges = [
+            (None, None),
+            ((3, 20, 1), (2, 20, 1)),
+            ((0, 23, 3), (1, 22, 4)),
+            ((20, 2, -3), (20, 1, -2)),
+            ((5, 6, 1), (7, 8, 1)),
+        ]
+        for symmetry in [(False, False, False), (True, False, False), (False, True, True), (True, True, True)]:
+            data_size = self.shape[::-1] if symmetry[2] else self.shape
+            chipper = BIPChipper(
+                self.file_name, '>f4', self.shape, symmetry=symmetry, complex_type=True, bands_ip=1)
+            expected = [chipper(*entry) for entry in ranges]
+            chipper.enable_cache(max_bytes=2**20, tile_shape=(8, 5))
+            for i in range(2):
+                for entry, value in zip(ranges, expected):
+                    with self.subTest(symmetry=symmetry, ranges=entry, attempt=i):
+                        self.assertTrue(numpy.all(chipper(*entry) == value))
+            self.assertGreater(chipper.block_cache.hits, 0)
+            self.assertEqual(
+                chipper.block_cache.misses,
+                int(numpy.ceil(data_size[0]/8.))*int(numpy.ceil(data_size[1]/5.)))
+            chipper.disable_cache()
+            self.assertIsNone(chipper.block_cache)
+
+    def test_read_into(self):
+        for symmetry in [(False, False, False), (True, False, False), (False, True, True)]:
+            chipper = BIPChipper(
+                self.file_name, '>f4', self.shape, symmetry=symmetry, complex_type=True, bands_ip=1)
+            for cache in [False, True]:
+                if cache:
+                    chipper.enable_cache(max_bytes=2**20, tile_shape=(8, 5))
+                for entry in [(None, None), ((3, 20, 2), (20, 1, -2))]:
+                    with self.subTest(symmetry=symmetry, cache=cache, ranges=entry):
+                        expected = chipper(*entry)
+                        out = numpy.zeros(expected.shape, dtype=numpy.complex64)
+                        self.assertIs(chipper(*entry, out=out), out)
+                        self.assertTrue(numpy.all(out == expected))
+            with self.assertRaises(ValueError):
+                chipper(None, None, out=numpy.zeros((2, 2), dtype=numpy.complex64))
+
+    def test_read_into_raw(self):
+        chipper = BIPChipper(
+            self.file_name, '>f4', self.shape, symmetry=(False, False, True), complex_type=False, bands_ip=2)
+        expected = numpy.swapaxes(self.data, 0, 1)[2:20:3, 1:30:2]
+        out = numpy.zeros(expected.shape, dtype=numpy.float32)
+        chipper((2, 20, 3), (1, 30, 2), out=out)
+        self.assertTrue(numpy.all(out == expected))
+        data = chipper((2, 20, 3), (1, 30, 2))
+        self.assertFalse(isinstance(data, numpy.memmap))
+        self.assertTrue(numpy.all(data == expected))
+
+
+class _SmallTileChipper(BIPChipper):
+    _TRANSPOSE_TILE = 8
+
+
+class TestTransposedRead(_BIPFileTestCase):
+    def test_swapped(self):
+        for symmetry in [(False, False, True), (True, False, True), (False, True, True)]:
+            reference = BIPChipper(self.file_name, '>f4', self.shape, symmetry=(symmetry[1], symmetry[0], False),
+                                   complex_type=True, bands_ip=1)
+            chipper = _SmallTileChipper(self.file_name, '>f4', self.shape, symmetry=symmetry,
+                                        complex_type=True, bands_ip=1)
+            for range1, range2 in [(None, None), ((20, 1, -2), (3, 30, 3)), ((5, 6, 1), None)]:
+                with self.subTest(symmetry=symmetry, range1=range1, range2=range2):
+                    expected = numpy.swapaxes(reference(range2, range1), 0, 1)
+                    data = chipper(range1, range2)
+                    self.assertTrue(data.flags['C_CONTIGUOUS'])
+                    self.assertTrue(numpy.all(data == expected))
+                    out = numpy.zeros(expected.shape, dtype=numpy.complex64)
+                    chipper(range1, range2, out=out)
+                    self.assertTrue(numpy.all(out == expected))
+                    raw, _ = chipper(range1, range2, raw=True)
+                    self.assertTrue(raw.flags['C_CONTIGUOUS'] and raw.dtype.isnative)
+                    self.assertTrue(numpy.all(raw[:, :, 0] + 1j*raw[:, :, 1] == expected))
+
+
+class TestIterBlocks(_BIPFileTestCase):
+    def test_iter_blocks(self):
+        for symmetry in [(False, False, False), (True, False, False), (False, True, True)]:
+            chipper = BIPChipper(
+                self.file_name, '>f4', self.shape, symmetry=symmetry, complex_type=True, bands_ip=1)
+            reader = BaseReader(SICDType(), chipper)
+            full = reader[:, :]
+            for prefetch in [0, 2]:
+                with self.subTest(symmetry=symmetry, prefetch=prefetch):
+                    out = numpy.zeros(full.shape, dtype=numpy.complex64)
+                    starts = []
+                    for block, (row_start, col_start) in reader.iter_blocks(rows_per_block=4, prefetch=prefetch):
+                        starts.append(row_start if not symmetry[2] else col_start)
+                        out[row_start:row_start+block.shape[0], col_start:col_start+block.shape[1]] = block
+                    self.assertTrue(numpy.all(out == full))
+                    # storage order
+                    flip = symmetry[1] if symmetry[2] else symmetry[0]
+                    self.assertEqual(starts, sorted(starts, reverse=flip))
+
+            with self.subTest(symmetry=symmetry, msg='limits'):
+                blocks = list(reader.iter_blocks(rows_per_block=5, rows=(2, 11), cols=(3, 9)))
+                out = numpy.zeros((9, 6), dtype=numpy.complex64)
+                for block, (row_start, col_start) in blocks:
+                    out[row_start-2:row_start-2+block.shape[0], col_start-3:col_start-3+block.shape[1]] = block
+                self.assertTrue(numpy.all(out == full[2:11, 3:9]))
+
+    def test_tuned(self):
+        for symmetry in [(False, False, False), (True, False, False), (False, True, True)]:
+            chipper = BIPChipper(
+                self.file_name, '>f4', self.shape, symmetry=symmetry, complex_type=True, bands_ip=1)
+            reader = BaseReader(SICDType(), chipper)
+            full = reader[:, :]
+            row_bytes = 8*(self.shape[0] if symmetry[2] else self.shape[1])
+            for prefetch in [0, 2]:
+                with self.subTest(symmetry=symmetry, prefetch=prefetch):
+                    tuner = BlockSizeTuner(row_bytes, max_block_size=4*row_bytes, min_block_size=row_bytes, trials=3)
+                    self.assertEqual(tuner.trial_rows, (1, 2, 4))
+                    out = numpy.zeros(full.shape, dtype=numpy.complex64)
+                    sizes, starts = [], []
+                    for block, (row_start, col_start) in reader.iter_blocks(rows_per_block=tuner, prefetch=prefetch):
+                        sizes.append(block.shape[1] if symmetry[2] else block.shape[0])
+                        starts.append(col_start if symmetry[2] else row_start)
+                        out[row_start:row_start+block.shape[0], col_start:col_start+block.shape[1]] = block
+                    self.assertTrue(numpy.all(out == full))
+                    self.assertEqual(sizes[:3], [1, 2, 4])
+                    self.assertIn(tuner.rows_per_block, tuner.trial_rows)
+                    flip = symmetry[1] if symmetry[2] else symmetry[0]
+                    self.assertEqual(starts, sorted(starts, reverse=flip))
+                    self.assertEqual(sorted(tuner.get_throughput().keys()), [1, 2, 4])
+            with self.subTest(symmetry=symmetry, msg='auto'):
+                blocks = list(reader.iter_blocks(rows_per_block='auto', rows=(2, 11), cols=(3, 9)))
+                out = numpy.zeros((9, 6), dtype=numpy.complex64)
+                for block, (row_start, col_start) in blocks:
+                    out[row_start-2:row_start-2+block.shape[0], col_start-3:col_start-3+block.shape[1]] = block
+                self.assertTrue(numpy.all(out == full[2:11, 3:9]))
+
+    def test_early_close(self):
+        chipper = BIPChipper(self.file_name, '>f4', self.shape, complex_type=True, bands_ip=1)
+        reader = BaseReader(SICDType(), chipper)
+        iterator = reader.iter_blocks(rows_per_block=1, prefetch=2)
+        next(iterator)
+        iterator.close()
+
+    def test_error(self):
+        chipper = BIPChipper(self.file_name, '>f4', self.shape, complex_type=True, bands_ip=1)
+        reader = BaseReader(SICDType(), chipper)
+        with self.assertRaises(ValueError):
+            list(reader.iter_blocks(rows_per_block=0))
+
+
+class TestRawRead(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (17, 13)
+        cls.file_name = os.path.join(cls.temp_directory, 'test.bip')
+        cls.data = numpy.reshape(numpy.arange(2*cls.shape[0]*cls.shape[1], dtype='>i2'), cls.shape + (2, ))
+        cls.data.tofile(cls.file_name)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_raw(self):
+        for symmetry in [(False, False, False), (True, False, True)]:
+            chipper = BIPChipper(self.file_name, '>i2', self.shape, symmetry=symmetry, complex_type=True)
+            reader = BaseReader(SICDType(ImageData={
+                'PixelType': 'RE16I_IM16I', 'NumRows': 17, 'NumCols': 13, 'FirstRow': 0, 'FirstCol': 0,
+                'FullImage': {'NumRows': 17, 'NumCols': 13}}), chipper)
+            with self.subTest(symmetry=symmetry):
+                data, parameters = reader.read_chip((1, 12, 2), (3, 10, 1), raw=True)
+                self.assertTrue(data.dtype.isnative)
+                self.assertEqual(data.dtype.name, 'int16')
+                self.assertEqual(parameters['complex_type'], 'interleaved')
+                self.assertEqual(parameters['stored_dtype'], '>i2')
+                self.assertEqual(parameters['PixelType'], 'RE16I_IM16I')
+                self.assertIsNone(parameters['AmpTable'])
+                expected = reader.read_chip((1, 12, 2), (3, 10, 1))
+                self.assertTrue(numpy.all(data[:, :, 0] + 1j*data[:, :, 1] == expected))
+
+
+class TestValidationPolicy(_BIPFileTestCase):
+    def get_reader(self):
+        chipper = BIPChipper(self.file_name, '>f4', self.shape, complex_type=True, bands_ip=1)
+        return BaseReader(SICDType(CollectionInfo=CollectionInfoType(CollectorName='Test')), chipper)
+
+    def test_policies(self):
+        for policy, validated, accessed in [
+                ('off', False, False), ('lazy', False, True), ('eager', True, True), ('LAZY', False, True)]:
+            with self.subTest(policy=policy):
+                reader = self.get_reader()
+                reader._apply_validation_policy(policy)
+                self.assertEqual('_validity_memo' in reader._sicd_meta.__dict__, validated)
+                self.assertIsInstance(reader.sicd_meta, SICDType)
+                self.assertEqual('_validity_memo' in reader._sicd_meta.__dict__, accessed)
+        with self.assertRaises(ValueError):
+            self.get_reader()._apply_validation_policy('sometimes')
+
+    def test_global_policy(self):
+        self.assertEqual(get_validation_policy(), 'eager')
+        try:
+            set_validation_policy('lazy')
+            reader = self.get_reader()
+            reader._apply_validation_policy()
+            self.assertFalse('_validity_memo' in reader._sicd_meta.__dict__)
+            reader.get_sicds_as_tuple()
+            self.assertTrue('_validity_memo' in reader._sicd_meta.__dict__)
+            with self.assertRaises(ValueError):
+                set_validation_policy('never')
+        finally:
+            set_validation_policy('eager')
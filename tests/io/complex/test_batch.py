@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from sarpy.io.complex.batch import expand_inputs, batch_conversion, main
+from sarpy.io.complex.converter import open_complex
+from sarpy.io.complex.sio import SIOWriter
+from sarpy.io.complex.sicd_elements.SICD import SICDType
+
+from . import unittest
+from .sicd_elements.test_sicd import sicd_dict
+
+
+class TestBatchConversion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.input_directory = os.path.join(cls.temp_directory, 'input')
+        os.mkdir(cls.input_directory)
+        cls.shapes = [(40, 30), (25, 35)]
+        cls.data = []
+        for i, shape in enumerate(cls.shapes):
+            sicd_meta = SICDType.from_dict(sicd_dict)
+            sicd_meta.ImageData = {
+                'PixelType': 'RE32F_IM32F', 'NumRows': shape[0], 'NumCols': shape[1],
+                'FirstRow': 0, 'FirstCol': 0, 'FullImage': {'NumRows': shape[0], 'NumCols': shape[1]},
+                'SCPPixel': {'Row': shape[0]//2, 'Col': shape[1]//2}}
+            # distinct suggested output names
+            sicd_meta.CollectionInfo.CoreName = 'CORE{}'.format(i)
+            data = (numpy.arange(shape[0]*shape[1]) + 1j*i).astype(numpy.complex64).reshape(shape)
+            writer = SIOWriter(os.path.join(cls.input_directory, 'test{}.sio'.format(i)), sicd_meta)
+            writer(data, start_indices=(0, 0))
+            writer.close()
+            cls.data.append(data)
+        # a file which can not be converted
+        with open(os.path.join(cls.input_directory, 'test2.sio'), 'wb') as fi:
+            fi.write(b'\x00'*100)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_expand_inputs(self):
+        pattern = os.path.join(self.input_directory, '*.sio')
+        expected = [os.path.join(self.input_directory, 'test{}.sio'.format(i)) for i in range(3)]
+        self.assertEqual(expand_inputs(pattern), expected)
+        self.assertEqual(
+            expand_inputs([expected[1], pattern, 'missing.sio']),
+            [expected[1], expected[0], expected[2], 'missing.sio'])
+
+    def test_conversion(self):
+        for processes in [1, 2]:
+            output_directory = os.path.join(self.temp_directory, 'output{}'.format(processes))
+            with self.subTest(processes=processes):
+                results = batch_conversion(
+                    os.path.join(self.input_directory, '*.sio'), output_directory, processes=processes)
+                self.assertEqual(len(results), 3)
+                for result, data in zip(results[:2], self.data):
+                    self.assertIsNone(result['error'])
+                    self.assertEqual(len(result['output_files']), 1)
+                    self.assertGreater(result['bytes'], data.size*8)
+                    self.assertGreater(result['throughput'], 0)
+                    reader = open_complex(result['output_files'][0])
+                    self.assertTrue(numpy.all(reader[:, :] == data))
+                    del reader
+                # the failure is isolated to the bad file
+                self.assertIsNotNone(results[2]['error'])
+                self.assertEqual(results[2]['output_files'], [])
+                self.assertEqual(len(os.listdir(output_directory)), 2)
+                # the outputs exist, so converting again fails
+                results = batch_conversion(
+                    os.path.join(self.input_directory, 'test0.sio'), output_directory, processes=processes)
+                self.assertIsNotNone(results[0]['error'])
+                self.assertEqual(len(os.listdir(output_directory)), 2)
+
+    def test_main(self):
+        output_directory = os.path.join(self.temp_directory, 'main')
+        self.assertEqual(main([os.path.join(self.input_directory, 'test0.sio'), output_directory, '-p', '1']), 0)
+        self.assertEqual(main([os.path.join(self.input_directory, '*.sio'), output_directory, '-p', '2']), 1)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+from multiprocessing.pool import ThreadPool
+
+import numpy
+
+from sarpy.io.complex.bip import PositionalFile, SequentialFile, BIPChipper, BIPWriter
+
+from . import unittest
+
+
+class TestBIP(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (41, 29)
+        cls.offset = 13
+        cls.file_name = os.path.join(cls.temp_directory, 'test.bip')
+        cls.data = numpy.reshape(numpy.arange(2*cls.shape[0]*cls.shape[1], dtype='>i2'), cls.shape + (2, ))
+        with open(cls.file_name, 'wb') as fi:
+            fi.write(b'\x01'*cls.offset)
+            cls.data.tofile(fi)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_positional_file(self):
+        fid = PositionalFile(self.file_name)
+        buffer = numpy.empty((3, 2), dtype='>i2')
+        fid.read_into(self.offset + 4*self.shape[1], buffer)
+        self.assertTrue(numpy.all(buffer == self.data[1, :3, :]))
+        with self.assertRaises(ValueError):
+            fid.read_into(0, numpy.empty((4, 4), dtype='>i2')[:, ::2])
+        with self.assertRaises(IOError):
+            fid.read_into(os.path.getsize(self.file_name) - 2, buffer)
+        fid.close()
+        self.assertTrue(fid.closed)
+
+    def test_positional_read(self):
+        ranges = [
+            (None, None),
+            ((3, 30, 1), (2, 20, 1)),
+            ((0, 41, 3), (1, 28, 4)),
+            ((30, 2, -3), (20, 1, -2)),
+            ((40, 0, -1), None),
+            ((5, 6, 1), (7, 8, 1)),
+        ]
+        for symmetry in [(False, False, False), (True, True, False), (False, True, True)]:
+            memmap_chipper = BIPChipper(
+                self.file_name, '>i2', self.shape, symmetry=symmetry, complex_type=True,
+                data_offset=self.offset)
+            file_chipper = BIPChipper(
+                self.file_name, '>i2', self.shape, symmetry=symmetry, complex_type=True,
+                data_offset=self.offset, use_memmap=False)
+            for range1, range2 in ranges:
+                if symmetry[2]:
+                    range1, range2 = range2, range1
+                with self.subTest(symmetry=symmetry, range1=range1, range2=range2):
+                    self.assertTrue(numpy.all(memmap_chipper(range1, range2) == file_chipper(range1, range2)))
+
+    def test_concurrent_reads(self):
+        chipper = BIPChipper(
+            self.file_name, '>i2', self.shape, complex_type=True, data_offset=self.offset, use_memmap=False)
+        expected = chipper(None, None)
+        pool = ThreadPool(processes=4)
+        results = pool.map(lambda i: chipper((i, i+10, 1), None), range(0, 31))
+        pool.close()
+        for i, result in enumerate(results):
+            self.assertTrue(numpy.all(result == expected[i:i+10, :]))
+
+    def test_positional_write(self):
+        file_name = os.path.join(self.temp_directory, 'write.bip')
+        for use_memmap in [True, False]:
+            with open(file_name, 'wb') as fi:
+                fi.write(b'\x00'*(self.offset + self.data.nbytes))
+            raw = self.data.reshape(self.shape[0], -1)
+            raw_shape = raw.shape
+            writer = BIPWriter(
+                file_name, raw_shape, '>i2', False, data_offset=self.offset, use_memmap=use_memmap)
+            writer(raw[:20, :], start_indices=(0, 0))
+            writer(raw[20:, :15], start_indices=(20, 0))
+            writer(raw[20:, 15:], start_indices=(20, 15))
+            writer.close()
+            del writer
+            with self.subTest(use_memmap=use_memmap):
+                written = numpy.fromfile(file_name, dtype='>i2', offset=self.offset).reshape(raw_shape)
+                self.assertTrue(numpy.all(written == raw))
+
+    def test_sequential_write(self):
+        file_name = os.path.join(self.temp_directory, 'sequential.bip')
+        raw = self.data.reshape(self.shape[0], -1)
+        for backend in ['sequential', 'sequential_direct']:
+            with open(file_name, 'wb') as fi:
+                fi.write(b'\x00'*self.offset)
+            writer = BIPWriter(file_name, raw.shape, '>i2', False, data_offset=self.offset, backend=backend)
+            self.assertIsInstance(writer._fid, SequentialFile)
+            # sequential, then out of order and partial rows
+            writer(raw[:20, :], start_indices=(0, 0))
+            writer(raw[30:, :], start_indices=(30, 0))
+            writer(raw[20:30, 15:], start_indices=(20, 15))
+            writer(raw[20:30, :15], start_indices=(20, 0))
+            writer.close()
+            del writer
+            with self.subTest(backend=backend):
+                written = numpy.fromfile(file_name, dtype='>i2', offset=self.offset).reshape(raw.shape)
+                self.assertTrue(numpy.all(written == raw))
+        with self.assertRaises(ValueError):
+            BIPWriter(file_name, raw.shape, '>i2', False, backend='other')
+
+    def test_sequential_file(self):
+        file_name = os.path.join(self.temp_directory, 'staged.bin')
+        expected = numpy.random.RandomState(0).randint(0, 256, size=50000).astype(numpy.uint8)
+        for direct in [False, True]:
+            with open(file_name, 'wb') as fi:
+                fi.write(b'')
+            # small buffers, so that the staged data is flushed many times
+            the_file = SequentialFile(file_name, offset=100, size=expected.size, buffer_size=5000, direct=direct)
+            with self.subTest(direct=direct):
+                self.assertGreaterEqual(os.path.getsize(file_name), 100 + expected.size)
+                for start, stop in [(0, 10), (10, 20000), (30000, 50000), (20000, 25000), (25000, 30000)]:
+                    the_file.write_from(100 + start, expected[start:stop])
+                the_file.close()
+                self.assertTrue(the_file.closed)
+                written = numpy.fromfile(file_name, dtype=numpy.uint8)[100:100 + expected.size]
+                self.assertTrue(numpy.all(written == expected))
+                with self.assertRaises(ValueError):
+                    the_file.write_from(0, expected[:10])
+
+    def test_sequential_column_slabs(self):
+        file_name = os.path.join(self.temp_directory, 'slabs.bip')
+        raw = self.data.reshape(self.shape[0], -1)
+        for backend in ['sequential', 'sequential_direct']:
+            with open(file_name, 'wb') as fi:
+                fi.write(b'\x00'*self.offset)
+            writer = BIPWriter(file_name, raw.shape, '>i2', False, data_offset=self.offset, backend=backend)
+            # the row fragments of each slab are coalesced in the staging window
+            for start in range(0, raw.shape[1], 7):
+                writer(raw[:, start:start + 7], start_indices=(0, start))
+                self.assertEqual(writer._fid._pending, [None, None])
+            writer.close()
+            del writer
+            with self.subTest(backend=backend):
+                written = numpy.fromfile(file_name, dtype='>i2', offset=self.offset).reshape(raw.shape)
+                self.assertTrue(numpy.all(written == raw))
+
+    def test_sequential_file_failed_init(self):
+        class FailingFile(SequentialFile):
+            __slots__ = ()
+
+            @classmethod
+            def _aligned_buffer(cls, size):
+                raise MemoryError('no buffers')
+
+        file_name = os.path.join(self.temp_directory, 'failed.bin')
+        with open(file_name, 'wb') as fi:
+            fi.write(b'')
+        fd_directory = '/proc/self/fd'
+        before = len(os.listdir(fd_directory)) if os.path.isdir(fd_directory) else None
+        with self.assertRaises(MemoryError):
+            FailingFile(file_name, direct=True)
+        if before is not None:
+            # the file descriptors of the partially constructed instance are closed
+            self.assertEqual(len(os.listdir(fd_directory)), before)
+
+    def test_decimated_read(self):
+        class SparseChipper(BIPChipper):
+            _MAX_COLUMN_GAP = 0
+
+        expected = self.data[:, :, 0] + 1j*self.data[:, :, 1]
+        for chipper_type in [BIPChipper, SparseChipper]:
+            for use_memmap in [True, False]:
+                chipper = chipper_type(
+                    self.file_name, '>i2', self.shape, complex_type=True,
+                    data_offset=self.offset, use_memmap=use_memmap)
+                for range1, range2 in [
+                        ((0, 41, 8), None),
+                        ((3, 40, 9), (1, 28, 5)),
+                        ((40, 0, -10), (27, 2, -4))]:
+                    with self.subTest(chipper_type=chipper_type, use_memmap=use_memmap, range1=range1, range2=range2):
+                        slice2 = slice(None) if range2 is None else slice(*range2)
+                        self.assertTrue(numpy.all(chipper(range1, range2) == expected[slice(*range1), slice2]))
+                self.assertIsNotNone(chipper._random_fid)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from sarpy.io.complex.codec import PixelCodec, RE32FCodec, get_codec, register_codec, benchmark_codecs
+
+from . import unittest
+
+
+class TestCodec(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        numpy.random.seed(0)
+        cls.shape = (37, 23)
+        cls.data = (numpy.random.normal(scale=100, size=cls.shape) +
+                    1j*numpy.random.normal(scale=100, size=cls.shape)).astype(numpy.complex64)
+        cls.amp_table = numpy.linspace(0, 400, 256)
+        cls.temp_directory = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_registry(self):
+        for pixel_type, dtype in [('RE32F_IM32F', '>f4'), ('RE16I_IM16I', '>i2'), ('AMP8I_PHS8I', 'u1')]:
+            codec = get_codec(pixel_type)
+            self.assertIsInstance(codec, PixelCodec)
+            self.assertEqual(codec.pixel_type, pixel_type)
+            self.assertEqual(codec.dtype, numpy.dtype(dtype))
+        with self.assertRaises(ValueError):
+            get_codec('RE64F_IM64F')
+        with self.assertRaises(TypeError):
+            register_codec(object)
+
+        class DoubleCodec(RE32FCodec):
+            __slots__ = ()
+            pixel_type = 'RE64F_IM64F'
+            base_dtype = 'f8'
+
+        register_codec(DoubleCodec)
+        codec = get_codec('RE64F_IM64F', byte_order='<')
+        self.assertTrue(numpy.all(codec.decode(codec.encode(self.data))[:, :, 0] == self.data))
+
+    def test_round_trip(self):
+        for pixel_type in ['RE32F_IM32F', 'RE16I_IM16I']:
+            for byte_order in ['>', '<']:
+                for chunk_pixels in [None, 50]:
+                    codec = get_codec(pixel_type, byte_order=byte_order, chunk_pixels=chunk_pixels)
+                    with self.subTest(pixel_type=pixel_type, byte_order=byte_order, chunk_pixels=chunk_pixels):
+                        encoded = codec.encode(self.data)
+                        self.assertEqual(encoded.dtype, codec.dtype)
+                        self.assertEqual(encoded.shape, self.shape + (2, ))
+                        decoded = codec.decode(encoded)
+                        self.assertEqual(decoded.dtype.name, 'complex64')
+                        self.assertEqual(decoded.shape, self.shape + (1, ))
+                        tolerance = 0 if pixel_type == 'RE32F_IM32F' else 0.5
+                        self.assertLessEqual(numpy.max(numpy.abs(decoded[:, :, 0].real - self.data.real)), tolerance)
+                        self.assertLessEqual(numpy.max(numpy.abs(decoded[:, :, 0].imag - self.data.imag)), tolerance)
+
+    def test_threads(self):
+        for pixel_type in ['RE32F_IM32F', 'RE16I_IM16I', 'AMP8I_PHS8I']:
+            codec = get_codec(pixel_type, amp_table=self.amp_table, chunk_pixels=50)
+            threaded = get_codec(pixel_type, amp_table=self.amp_table, chunk_pixels=50, threads=3)
+            self.assertEqual(threaded.threads, 3)
+            with self.subTest(pixel_type=pixel_type):
+                encoded = codec.encode(self.data)
+                # encode directly into a memory map slice
+                out = numpy.memmap(
+                    os.path.join(self.temp_directory, 'encode.bin'), dtype=codec.dtype, mode='w+',
+                    shape=(self.shape[0] + 5, self.shape[1], 2))
+                threaded.encode(self.data, out=out[5:, :, :])
+                self.assertTrue(numpy.all(out[5:, :, :] == encoded))
+                del out
+                self.assertTrue(numpy.all(threaded.decode(encoded) == codec.decode(encoded)))
+            threaded.threads = 1
+            self.assertEqual(threaded.threads, 1)
+        with self.assertRaises(ValueError):
+            get_codec('RE32F_IM32F', threads=0)
+
+    def test_int_clipping(self):
+        codec = get_codec('RE16I_IM16I')
+        encoded = codec.encode(numpy.array([[1e6 - 1e6j, 2.6 - 2.6j]], dtype=numpy.complex128))
+        self.assertTrue(numpy.all(encoded[0, :, :] == [[32767, -32768], [3, -3]]))
+
+    def test_amp_phase(self):
+        codec = get_codec('AMP8I_PHS8I', amp_table=self.amp_table, chunk_pixels=64)
+        stored = numpy.random.randint(0, 256, size=self.shape + (4, )).astype(numpy.uint8)
+        decoded = codec.decode(stored)
+        expected = self.amp_table[stored[:, :, 0::2]]*numpy.exp(2j*numpy.pi*stored[:, :, 1::2]/256.)
+        self.assertEqual(decoded.shape, self.shape + (2, ))
+        self.assertTrue(numpy.allclose(decoded, expected, atol=1e-3))
+        # decoding directly into a strided output
+        out = numpy.zeros((self.shape[1], self.shape[0], 2), dtype=numpy.complex64)
+        codec.decode(stored, out=numpy.swapaxes(out, 0, 1))
+        self.assertTrue(numpy.all(numpy.swapaxes(out, 0, 1) == decoded))
+        # encoding is the inverse, for stored values (phase is meaningless for zero amplitude)
+        encoded = codec.encode(decoded[:, :, 0])
+        self.assertTrue(numpy.all(encoded[:, :, 0] == stored[:, :, 0]))
+        nonzero = (stored[:, :, 0] > 0)
+        self.assertTrue(numpy.all(encoded[nonzero, 1] == stored[nonzero, 1]))
+
+        with self.subTest(msg='limits'):
+            encoded = codec.encode(numpy.array([[1e4, -1e-3j, -1 + 1e-6j, -1 - 1e-6j]], dtype=numpy.complex64))
+            self.assertTrue(numpy.all(encoded[0, :, 0] == [255, 0, 1, 1]))
+            self.assertTrue(numpy.all(encoded[0, :, 1] == [0, 192, 128, 128]))
+        with self.subTest(msg='uneven amp table'):
+            codec = get_codec('AMP8I_PHS8I', amp_table=numpy.arange(256)**2/10.)
+            decoded = codec.decode(stored)
+            encoded = codec.encode(decoded[:, :, 1])
+            self.assertTrue(numpy.all(encoded[:, :, 0] == stored[:, :, 2]))
+            self.assertTrue(numpy.all(codec.encode(numpy.array([[1e6, 0.04]], dtype=numpy.complex64))[0, :, 0] == [255, 0]))
+        with self.subTest(msg='no amp table'):
+            codec = get_codec('AMP8I_PHS8I')
+            self.assertTrue(numpy.allclose(codec.decode(numpy.array([[[7, 64]]], dtype=numpy.uint8)), 7j))
+        with self.assertRaises(ValueError):
+            get_codec('AMP8I_PHS8I', amp_table=numpy.arange(10))
+
+    def test_bad_arguments(self):
+        codec = get_codec('RE16I_IM16I')
+        with self.assertRaises(ValueError):
+            codec.decode(numpy.zeros((3, 3, 2), dtype=numpy.float32))
+        with self.assertRaises(ValueError):
+            codec.decode(numpy.zeros((3, 3, 3), dtype=numpy.int16))
+        with self.assertRaises(ValueError):
+            codec.encode(numpy.zeros((3, 3), dtype=numpy.float32))
+        with self.assertRaises(ValueError):
+            codec.encode(self.data, out=numpy.zeros((3, 3, 2), dtype=numpy.int16))
+
+
+class TestCodecBenchmark(unittest.TestCase):
+    def test_benchmark(self):
+        results = benchmark_codecs(shape=(256, 256), number=2, chunk_pixels=2**14, threads=2)
+        for pixel_type in ['RE32F_IM32F', 'RE16I_IM16I', 'AMP8I_PHS8I']:
+            with self.subTest(pixel_type=pixel_type):
+                self.assertGreater(results[pixel_type]['decode'], 0)
+                self.assertGreater(results[pixel_type]['encode'], 0)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import importlib
+import tempfile
+
+import numpy
+
+from sarpy.io.complex.converter import open_complex, register_format, _get_candidate_formats, _FORMATS, \
+    Converter
+from sarpy.io.complex.sio import SIOReader, SIOWriter
+from sarpy.io.complex.sicd_elements.SICD import SICDType
+
+from . import unittest
+from .sicd_elements.test_sicd import sicd_dict
+
+
+class TestOpenComplex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (30, 20)
+        cls.sicd_meta = SICDType(ImageData={
+            'PixelType': 'RE32F_IM32F', 'NumRows': cls.shape[0], 'NumCols': cls.shape[1],
+            'FirstRow': 0, 'FirstCol': 0, 'FullImage': {'NumRows': cls.shape[0], 'NumCols': cls.shape[1]}})
+        cls.sio_file = os.path.join(cls.temp_directory, 'test.sio')
+        writer = SIOWriter(cls.sio_file, cls.sicd_meta)
+        writer(numpy.ones(cls.shape, dtype=numpy.complex64), start_indices=(0, 0))
+        writer.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_signatures(self):
+        self.assertEqual(_get_candidate_formats(self.sio_file), ['sarpy.io.complex.sio'])
+        cases = [
+            ('test.ntf', b'NITF02.10' + b'0'*100, 'sarpy.io.complex.sicd'),
+            ('test.h5', b'\x89HDF\r\n\x1a\n' + b'\x00'*100, 'sarpy.io.complex.csk'),
+            ('userblock.h5', b'\x00'*512 + b'\x89HDF\r\n\x1a\n', 'sarpy.io.complex.csk'),
+            ('manifest.safe', b'<?xml version="1.0"?>', 'sarpy.io.complex.sentinel'),
+            ('product.xml', b'<?xml version="1.0"?>', 'sarpy.io.complex.radarsat'),
+            ('little.tif', b'II*\x00' + b'\x00'*100, 'sarpy.io.complex.tiff'),
+            ('big.tif', b'MM\x00*' + b'\x00'*100, 'sarpy.io.complex.tiff'),
+            ('bigtiff.tif', b'II+\x00' + b'\x00'*100, 'sarpy.io.complex.tiff'),
+            ('other.bin', b'\x00'*100, None)]
+        for name, header, expected in cases:
+            file_name = os.path.join(self.temp_directory, name)
+            with open(file_name, 'wb') as fi:
+                fi.write(header)
+            with self.subTest(name=name):
+                self.assertEqual(_get_candidate_formats(file_name), [] if expected is None else [expected, ])
+        directory = os.path.join(self.temp_directory, 'S1A.SAFE')
+        os.mkdir(directory)
+        with open(os.path.join(directory, 'manifest.safe'), 'wb') as fi:
+            fi.write(b'<?xml version="1.0"?>')
+        self.assertEqual(_get_candidate_formats(directory), ['sarpy.io.complex.sentinel'])
+
+    def test_open(self):
+        reader = open_complex(self.sio_file)
+        self.assertIsInstance(reader, SIOReader)
+        self.assertEqual(reader.data_size, self.shape)
+        del reader
+        file_name = os.path.join(self.temp_directory, 'unknown.bin')
+        with open(file_name, 'wb') as fi:
+            fi.write(b'\x00'*100)
+        imported = []
+        import_module = importlib.import_module
+        try:
+            importlib.import_module = lambda name: imported.append(name) or import_module(name)
+            with self.assertRaises(IOError):
+                open_complex(file_name)
+        finally:
+            importlib.import_module = import_module
+        # no format module is a candidate for an unrecognized file
+        self.assertEqual(imported, [])
+        with self.assertRaises(IOError):
+            open_complex(os.path.join(self.temp_directory, 'missing.bin'))
+
+    def test_register(self):
+        with self.assertRaises(TypeError):
+            register_format('sarpy.io.complex.sio', 'not callable')
+        signature = _FORMATS['sarpy.io.complex.sio']
+        try:
+            register_format('sarpy.io.complex.sio', lambda file_name, header: False)
+            self.assertEqual(_get_candidate_formats(self.sio_file), [])
+        finally:
+            register_format('sarpy.io.complex.sio', signature)
+
+
+class TestConverter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (600, 500)
+        # the SICDWriter requires fairly complete metadata
+        cls.sicd_meta = SICDType.from_dict(sicd_dict)
+        cls.sicd_meta.ImageData = {
+            'PixelType': 'RE32F_IM32F', 'NumRows': cls.shape[0], 'NumCols': cls.shape[1],
+            'FirstRow': 0, 'FirstCol': 0, 'FullImage': {'NumRows': cls.shape[0], 'NumCols': cls.shape[1]},
+            'SCPPixel': {'Row': 300, 'Col': 250}}
+        random = numpy.random.RandomState(0)
+        cls.data = (random.normal(size=cls.shape) + 1j*random.normal(size=cls.shape)).astype(numpy.complex64)
+        cls.sio_file = os.path.join(cls.temp_directory, 'input.sio')
+        writer = SIOWriter(cls.sio_file, cls.sicd_meta)
+        writer(cls.data, start_indices=(0, 0))
+        writer.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_pipelined(self):
+        reader = SIOReader(self.sio_file)
+        for output_format in ['SIO', 'SICD']:
+            for workers, max_memory, backend in [
+                    (0, None, None), (1, None, 'sequential'), (3, 2**20, 'memmap'), (3, 2**22, 'sequential'),
+                    (0, None, 'sequential_direct')]:
+                output_file = 'output_{}_{}_{}.{}'.format(workers, max_memory, backend, output_format.lower())
+                with self.subTest(output_format=output_format, workers=workers, max_memory=max_memory, backend=backend):
+                    with Converter(reader, self.temp_directory, output_file=output_file,
+                                   row_limits=(10, 590), output_format=output_format, backend=backend) as converter:
+                        converter.write_data(max_block_size=2**20, workers=workers, max_memory=max_memory)
+                    del converter
+                    output_reader = open_complex(os.path.join(self.temp_directory, output_file))
+                    self.assertTrue(numpy.all(output_reader[:, :] == self.data[10:590, :]))
+                    del output_reader
+        with self.assertRaises(ValueError):
+            Converter(reader, self.temp_directory, output_file='bad.sio', output_format='SIO').write_data(workers=-1)
+
+    def test_auto_tune(self):
+        reader = SIOReader(self.sio_file)
+        for workers, max_memory in [(0, None), (2, 2**21)]:
+            output_file = 'tuned_{}.sio'.format(workers)
+            with self.subTest(workers=workers, max_memory=max_memory):
+                with Converter(reader, self.temp_directory, output_file=output_file,
+                               col_limits=(5, 495), output_format='SIO') as converter:
+                    converter.write_data(max_block_size=2**21, workers=workers, max_memory=max_memory, auto_tune=True)
+                del converter
+                output_reader = open_complex(os.path.join(self.temp_directory, output_file))
+                self.assertTrue(numpy.all(output_reader[:, :] == self.data[:, 5:495]))
+                del output_reader
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from sarpy.io.complex.bip import BIPChipper
+from sarpy.io.complex.csk import h5py, HDF5Handle, CSKBandChipper
+
+from . import unittest
+
+
+@unittest.skipIf(h5py is None, 'h5py is not available')
+class TestCSKBandChipper(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.file_name = os.path.join(cls.temp_directory, 'test.h5')
+        cls.shape = (45, 31)
+        cls.data = numpy.reshape(numpy.arange(2*cls.shape[0]*cls.shape[1], dtype='>i2'), cls.shape + (2, ))
+        with h5py.File(cls.file_name, 'w') as hf:
+            hf.create_dataset('S01/SBI', data=cls.data, chunks=(8, 10, 2), compression='gzip')
+        # the same data in a bip file, as reference
+        cls.bip_file_name = os.path.join(cls.temp_directory, 'test.bip')
+        cls.data.tofile(cls.bip_file_name)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_read(self):
+        handle = HDF5Handle(self.file_name, chunk_cache_bytes=2**16)
+        for symmetry in [(False, False, False), (True, False, False), (False, True, True), (True, True, True)]:
+            chipper = CSKBandChipper(self.file_name, 'S01', self.shape, symmetry, handle=handle)
+            reference = BIPChipper(self.bip_file_name, '>i2', self.shape, symmetry=symmetry, complex_type=True)
+            for range1, range2 in [
+                    (None, None),
+                    ((3, 20, 1), (2, 20, 3)),
+                    ((20, 0, -3), (29, 1, -4)),
+                    ((0, 20, 9), None),
+                    ((5, 6, 1), (7, 8, 1))]:
+                with self.subTest(symmetry=symmetry, range1=range1, range2=range2):
+                    self.assertTrue(numpy.all(chipper(range1, range2) == reference(range1, range2)))
+        # the handle is reopened as necessary
+        handle.close()
+        self.assertTrue(numpy.all(chipper(None, None) == reference(None, None)))
+        handle.close()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import subprocess
+import sys
+
+from . import unittest
+
+
+_SCRIPT = '''
+import json, sys, time
+start = time.time()
+import {module}
+elapsed = time.time() - start
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules.keys())}}))
+'''
+
+
+def import_in_subprocess(module):
+    """
+    Imports the module in a fresh interpreter, returning the elapsed time and the imported module names.
+    """
+
+    output = subprocess.check_output([sys.executable, '-c', _SCRIPT.format(module=module)])
+    result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    return result['elapsed'], result['modules']
+
+
+class TestImportTime(unittest.TestCase):
+    def test_package_import(self):
+        elapsed, modules = import_in_subprocess('sarpy.io.complex')
+        logging.info('Importing sarpy.io.complex took {} seconds'.format(elapsed))
+        for prefix in ['scipy', 'h5py', 'sarpy.io.complex.sicd_elements', 'sarpy.io.complex.base']:
+            with self.subTest(prefix=prefix):
+                self.assertFalse(any(name.startswith(prefix) for name in modules))
+
+    def test_sicd_import(self):
+        elapsed, modules = import_in_subprocess('sarpy.io.complex.sicd')
+        logging.info('Importing sarpy.io.complex.sicd took {} seconds'.format(elapsed))
+        for prefix in ['scipy', 'h5py']:
+            with self.subTest(prefix=prefix):
+                self.assertFalse(any(name.startswith(prefix) for name in modules))
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import time
+
+from sarpy.io.complex.metadata_cache import MetadataCache, enable_metadata_cache, disable_metadata_cache, \
+    get_metadata_cache, load_metadata
+from sarpy.io.complex.sicd_elements.SICD import SICDType
+
+from . import unittest
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.temp_directory, 'cache')
+        self.file_name = os.path.join(self.temp_directory, 'product.bin')
+        with open(self.file_name, 'wb') as fi:
+            fi.write(b'\x00'*10)
+        self.sicd = SICDType(ImageData={
+            'PixelType': 'RE32F_IM32F', 'NumRows': 30, 'NumCols': 20, 'FirstRow': 0, 'FirstCol': 0,
+            'FullImage': {'NumRows': 30, 'NumCols': 20}})
+
+    def tearDown(self):
+        disable_metadata_cache()
+        shutil.rmtree(self.temp_directory)
+
+    def test_round_trip(self):
+        cache = MetadataCache(self.cache_directory)
+        self.assertIsNone(cache.get(self.file_name, 'test'))
+        cache.put(self.file_name, 'test', [self.sicd, ])
+        value = cache.get(self.file_name, 'test')
+        self.assertIsInstance(value[0], SICDType)
+        self.assertEqual(value[0].to_xml_string(), self.sicd.to_xml_string())
+        self.assertIsNone(cache.get(self.file_name, 'other'))
+        self.assertGreater(cache.current_bytes, 0)
+
+        with self.subTest(msg='modified'):
+            with open(self.file_name, 'ab') as fi:
+                fi.write(b'\x00')
+            self.assertIsNone(cache.get(self.file_name, 'test'))
+
+        with self.subTest(msg='corrupt'):
+            cache.put(self.file_name, 'test', 1)
+            with open(os.path.join(cache.directory, cache.get_key(self.file_name, 'test') + '.pkl'), 'wb') as fi:
+                fi.write(b'junk')
+            self.assertIsNone(cache.get(self.file_name, 'test'))
+
+        cache.clear()
+        self.assertEqual(cache.current_bytes, 0)
+        with self.assertRaises(ValueError):
+            MetadataCache(self.cache_directory, max_bytes=-1)
+
+    def test_dependencies(self):
+        cache = MetadataCache(self.cache_directory)
+        dependency = os.path.join(self.temp_directory, 'calibration.xml')
+        missing = os.path.join(self.temp_directory, 'noise.xml')
+        with open(dependency, 'wb') as fi:
+            fi.write(b'\x00'*10)
+        dependencies = [dependency, missing]
+        cache.put(self.file_name, 'test', 1, dependencies=dependencies)
+        self.assertEqual(cache.get(self.file_name, 'test', dependencies=dependencies), 1)
+        self.assertIsNone(cache.get(self.file_name, 'test'))
+
+        with self.subTest(msg='modified dependency'):
+            with open(dependency, 'ab') as fi:
+                fi.write(b'\x00')
+            self.assertIsNone(cache.get(self.file_name, 'test', dependencies=dependencies))
+
+        with self.subTest(msg='created dependency'):
+            cache.put(self.file_name, 'test', 2, dependencies=dependencies)
+            with open(missing, 'wb') as fi:
+                fi.write(b'\x00')
+            self.assertIsNone(cache.get(self.file_name, 'test', dependencies=dependencies))
+
+    def test_eviction(self):
+        cache = MetadataCache(self.cache_directory, max_bytes=2500)
+        payload = b'\x00'*1000
+        for kind in ['a', 'b']:
+            cache.put(self.file_name, kind, payload)
+        # mark a as the most recently used
+        path = os.path.join(cache.directory, cache.get_key(self.file_name, 'b') + '.pkl')
+        os.utime(path, (time.time() - 100, time.time() - 100))
+        self.assertIsNotNone(cache.get(self.file_name, 'a'))
+        cache.put(self.file_name, 'c', payload)
+        self.assertIsNone(cache.get(self.file_name, 'b'))
+        self.assertIsNotNone(cache.get(self.file_name, 'a'))
+        self.assertIsNotNone(cache.get(self.file_name, 'c'))
+        self.assertLessEqual(cache.current_bytes, 2500)
+
+    def test_load_metadata(self):
+        calls = []
+
+        def create():
+            calls.append(1)
+            return self.sicd
+
+        self.assertIsNone(get_metadata_cache())
+        load_metadata(self.file_name, 'test', create)
+        load_metadata(self.file_name, 'test', create)
+        self.assertEqual(len(calls), 2)
+
+        cache = enable_metadata_cache(self.cache_directory)
+        self.assertIs(get_metadata_cache(), cache)
+        for i in range(2):
+            value = load_metadata(self.file_name, 'test', create)
+            self.assertEqual(value.ImageData.NumRows, 30)
+        self.assertEqual(len(calls), 3)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from sarpy.io.complex.base import BaseReader
+from sarpy.io.complex.bip import BIPChipper
+from sarpy.io.complex.overview import OverviewPyramid, build_overview, open_overview
+from sarpy.io.complex.sicd_elements.SICD import SICDType
+
+from . import unittest
+
+
+class _InterruptedReader(BaseReader):
+    __slots__ = ()
+
+    def iter_blocks(self, *args, **kwargs):
+        # interrupted after the first block is processed
+        for entry in super(_InterruptedReader, self).iter_blocks(*args, **kwargs):
+            yield entry
+            raise KeyboardInterrupt
+
+
+class TestOverview(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (45, 37)
+        cls.file_name = os.path.join(cls.temp_directory, 'test.bip')
+        numpy.random.seed(0)
+        cls.data = numpy.random.normal(size=cls.shape + (2, )).astype('>f4')
+        cls.data.tofile(cls.file_name)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def get_reader(self, symmetry=(False, False, False)):
+        chipper = BIPChipper(self.file_name, '>f4', self.shape, symmetry=symmetry, complex_type=True)
+        return BaseReader(SICDType(), chipper)
+
+    def test_power(self):
+        overview_file = os.path.join(self.temp_directory, 'power.ovr')
+        for symmetry in [(False, False, False), (True, False, True)]:
+            reader = self.get_reader(symmetry)
+            full = reader[:, :]
+            pyramid = build_overview(reader, overview_file, min_size=4)
+            self.assertEqual(pyramid.factors, (2, 4, 8, 16))
+            power = numpy.abs(full)**2
+            for level, factor in enumerate(pyramid.factors):
+                with self.subTest(symmetry=symmetry, factor=factor):
+                    array = pyramid.get_level(level)
+                    rows = int(numpy.ceil(full.shape[0]/float(factor)))
+                    cols = int(numpy.ceil(full.shape[1]/float(factor)))
+                    self.assertEqual(array.shape, (rows, cols))
+                    for i, j in [(0, 0), (rows-1, cols-1), (rows//2, cols-1)]:
+                        expected = numpy.sqrt(numpy.mean(power[i*factor:(i+1)*factor, j*factor:(j+1)*factor]))
+                        self.assertAlmostEqual(array[i, j], expected, places=4)
+            del pyramid
+
+    def test_decimate(self):
+        overview_file = os.path.join(self.temp_directory, 'decimate.ovr')
+        reader = self.get_reader()
+        full = reader[:, :]
+        pyramid = build_overview(reader, overview_file, method='decimate', min_size=1, max_levels=2)
+        self.assertEqual(pyramid.factors, (2, 4))
+        self.assertTrue(numpy.allclose(pyramid.get_level(1), numpy.abs(full[::4, ::4])))
+
+        with self.subTest(msg='read_magnitude'):
+            rows, cols = numpy.arange(0, 45, 4), numpy.arange(1, 37, 5)
+            expected = numpy.abs(full[numpy.ix_(4*(rows//4), 4*(cols//4))])
+            self.assertTrue(numpy.allclose(pyramid.read_magnitude((0, 45, 4), (1, 37, 5)), expected))
+            rows, cols = numpy.arange(40, 0, -2), numpy.arange(0, 37, 3)
+            expected = numpy.abs(full[numpy.ix_(2*(rows//2), 2*(cols//2))])
+            self.assertTrue(numpy.allclose(pyramid.read_magnitude((40, 0, -2), 3), expected))
+            # finer than any level, so read from the reader
+            self.assertTrue(numpy.allclose(pyramid.read_magnitude((0, 45, 2), None), numpy.abs(full[::2, :])))
+
+    def test_open(self):
+        overview_file = os.path.join(self.temp_directory, 'open.ovr')
+        reader = self.get_reader()
+        with self.assertRaises(ValueError):
+            build_overview(reader)
+        pyramid = open_overview(reader, overview_file, min_size=16)
+        self.assertTrue(os.path.isfile(overview_file))
+        self.assertFalse(pyramid.is_current())
+        self.assertIsInstance(open_overview(reader, overview_file), OverviewPyramid)
+
+    def test_open_index(self):
+        overview_file = os.path.join(self.temp_directory, 'index.ovr')
+        chippers = tuple(
+            BIPChipper(self.file_name, '>f4', self.shape, symmetry=symmetry, complex_type=True)
+            for symmetry in [(False, False, False), (False, True, True)])
+        reader = BaseReader((SICDType(), SICDType()), chippers)
+        pyramid = open_overview(reader, overview_file, index=0, min_size=4)
+        self.assertTrue(pyramid.matches(0, self.shape))
+        del pyramid
+        # the sidecar was built for index 0, so it must be rebuilt for index 1
+        pyramid = open_overview(reader, overview_file, index=1, min_size=4)
+        self.assertTrue(pyramid.matches(1, self.shape[::-1]))
+        self.assertFalse(pyramid.matches(0, self.shape))
+        self.assertEqual(pyramid.data_size, self.shape[::-1])
+        full = reader.read_chip(None, None, index=1)
+        self.assertTrue(numpy.allclose(pyramid.read_magnitude((0, 37, 2), None), numpy.abs(full[::2, :])))
+        del pyramid
+
+    def test_interrupted_build(self):
+        overview_file = os.path.join(self.temp_directory, 'interrupted.ovr')
+        reader = _InterruptedReader(SICDType(), self.get_reader()._chipper)
+        full = reader[:, :]
+        with self.assertRaises(KeyboardInterrupt):
+            build_overview(reader, overview_file, min_size=4, max_levels=2)
+        # neither the sidecar nor the temporary file remains
+        self.assertFalse(os.path.exists(overview_file))
+        self.assertEqual([name for name in os.listdir(self.temp_directory) if name.endswith('.tmp')], [])
+
+        reader = self.get_reader()
+        pyramid = open_overview(reader, overview_file, min_size=4, max_levels=2)
+        expected = numpy.sqrt(numpy.mean(numpy.abs(full[:2, :2])**2))
+        self.assertAlmostEqual(pyramid.get_level(0)[0, 0], expected, places=4)
+        self.assertTrue(numpy.all(pyramid.get_level(0) > 0))
+        del pyramid
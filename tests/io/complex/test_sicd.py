@@ -1,10 +1,18 @@
 import os
 import time
 import logging
+import shutil
+import tempfile
+
+import numpy
 
 from . import unittest
 
-from sarpy.io.complex.sicd import SICDDetails, SICDReader
+from sarpy.io.complex.sicd import SICDDetails, SICDReader, SICDWriter, MultiSegmentChipper
+from sarpy.io.complex.codec import get_codec
+from sarpy.io.complex.sicd_elements.SICD import SICDType
+
+from .sicd_elements.test_sicd import sicd_dict
 
 
 def generic_sicd_check(instance, test_file):
@@ -82,3 +90,125 @@ class TestSICDReader(unittest.TestCase):
                 logging.info('No file {} found'.format(test_file))
 
         self.assertTrue(tested > 0, msg="No files for testing found")
+
+
+class TestMultiSegmentChipper(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.file_name = os.path.join(cls.temp_directory, 'segments.bin')
+        cls.data_sizes = numpy.array([[7, 11], [5, 11], [9, 11]], dtype=numpy.int64)
+        rows = int(numpy.sum(cls.data_sizes[:, 0]))
+        cls.data = numpy.reshape(numpy.arange(2*rows*11, dtype='>f4'), (rows, 11, 2))
+        offsets = []
+        with open(cls.file_name, 'wb') as fi:
+            row_start = 0
+            for segment_rows in cls.data_sizes[:, 0]:
+                fi.write(b'\x00'*16)  # some fake header
+                offsets.append(fi.tell())
+                cls.data[row_start:row_start+segment_rows].tofile(fi)
+                row_start += segment_rows
+        cls.data_offsets = numpy.array(offsets, dtype=numpy.int64)
+        cls.complex_data = cls.data[:, :, 0] + 1j*cls.data[:, :, 1]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_read(self):
+        for threads, complex_type in [(1, True), (3, True), (3, get_codec('RE32F_IM32F'))]:
+            chipper = MultiSegmentChipper(
+                self.file_name, self.data_sizes, self.data_offsets, numpy.dtype('>f4'),
+                symmetry=(False, False, False), complex_type=complex_type, threads=threads)
+            for range1, range2 in [
+                    (None, None),
+                    ((2, 20, 1), (1, 10, 3)),
+                    ((0, 21, 4), None),
+                    ((20, 3, -2), (10, 0, -3)),
+                    ((8, 9, 1), (2, 3, 1)),
+                    ((5, 5, 1), None),
+                    ((5, 5, -1), (1, 10, 3))]:
+                with self.subTest(threads=threads, complex_type=complex_type, range1=range1, range2=range2):
+                    slice1 = slice(None) if range1 is None else slice(*range1)
+                    slice2 = slice(None) if range2 is None else slice(*range2)
+                    expected = self.complex_data[slice1, slice2]
+                    self.assertTrue(numpy.all(chipper(range1, range2) == expected))
+                    out = numpy.zeros(expected.shape, dtype=numpy.complex64)
+                    chipper(range1, range2, out=out)
+                    self.assertTrue(numpy.all(out == expected))
+                    data, parameters = chipper(range1, range2, raw=True)
+                    self.assertEqual(parameters['stored_dtype'], '>f4')
+                    self.assertEqual(parameters['complex_type'], 'interleaved')
+                    self.assertEqual(data.shape, expected.shape + (2, ))
+                    self.assertTrue(numpy.all(data[:, :, 0] + 1j*data[:, :, 1] == expected))
+
+
+class _SmallSegmentWriter(SICDWriter):
+    __slots__ = ()
+    # forces 7 rows per image segment, for 31 columns of RE32F_IM32F
+    _IM_SEG_LIMIT = 7*31*8
+
+
+class TestSICDWriter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (40, 31)
+        cls.sicd_meta = SICDType.from_dict(sicd_dict)
+        cls.sicd_meta.ImageData = {
+            'PixelType': 'RE32F_IM32F', 'NumRows': cls.shape[0], 'NumCols': cls.shape[1],
+            'FirstRow': 0, 'FirstCol': 0, 'FullImage': {'NumRows': cls.shape[0], 'NumCols': cls.shape[1]},
+            'SCPPixel': {'Row': 20, 'Col': 15}}
+        cls.data = numpy.reshape(
+            numpy.arange(cls.shape[0]*cls.shape[1]) - 1j*numpy.arange(cls.shape[0]*cls.shape[1]),
+            cls.shape).astype(numpy.complex64)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_segments(self):
+        for segment_threads in [1, 3]:
+            file_name = os.path.join(self.temp_directory, 'segments_{}.nitf'.format(segment_threads))
+            with self.subTest(segment_threads=segment_threads):
+                writer = _SmallSegmentWriter(file_name, self.sicd_meta, segment_threads=segment_threads)
+                self.assertEqual(len(writer._image_segment_limits), 6)
+                # chips which start part way into a segment, and span several segments
+                for row_start, row_end, col_start in [(3, 26, 0), (26, 40, 0), (0, 3, 0)]:
+                    writer(self.data[row_start:row_end, col_start:], start_indices=(row_start, col_start))
+                self.assertTrue(numpy.all(writer._pixels_written == writer._image_segment_limits[:, 4]//8))
+                writer.close()
+                del writer
+                reader = SICDReader(file_name)
+                self.assertEqual(reader.data_size, self.shape)
+                self.assertEqual(len(SICDDetails(file_name).img_headers), 6)
+                self.assertTrue(numpy.all(reader[:, :] == self.data))
+                del reader
+        with self.assertRaises(ValueError):
+            SICDWriter(os.path.join(self.temp_directory, 'bad.nitf'), self.sicd_meta, segment_threads=0)
+
+    def test_cache(self):
+        file_name = os.path.join(self.temp_directory, 'cache.nitf')
+        sicd_meta = self.sicd_meta.copy()
+        sicd_meta.ImageData.PixelType = 'RE16I_IM16I'
+        writer = _SmallSegmentWriter(file_name, sicd_meta)
+        writer(self.data, start_indices=(0, 0))
+        writer.close()
+        del writer
+        for threads in [1, 3]:
+            with self.subTest(threads=threads):
+                reader = SICDReader(file_name, threads=threads)
+                self.assertGreater(len(reader._chipper._child_chippers), 1)
+                reader.enable_cache(max_bytes=2**20, tile_shape=(8, 10))
+                for range1, range2 in [((3, 26, 1), (2, 30, 1)), ((0, 40, 2), None), ((30, 5, -1), (20, 0, -1))]:
+                    slice1, slice2 = slice(*range1), slice(None) if range2 is None else slice(*range2)
+                    self.assertTrue(numpy.all(reader.read_chip(range1, range2) == self.data[slice1, slice2]))
+                cache = reader._chipper.block_cache
+                self.assertGreater(cache.hits, 0)
+                # the samples are cached as stored in the file
+                for tile in cache._blocks.values():
+                    self.assertEqual(tile.dtype, numpy.dtype('>i2'))
+                    self.assertEqual(tile.ndim, 3)
+                reader.disable_cache()
+                self.assertIsNone(reader._chipper.block_cache)
+                del reader
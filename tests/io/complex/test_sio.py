@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from sarpy.io.complex.sio import SIODetails, SIOReader, SIOWriter
+from sarpy.io.complex.sicd_elements.SICD import SICDType
+
+from . import unittest
+
+
+class TestSIO(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (30, 20)
+        numpy.random.seed(0)
+        cls.data = (numpy.random.normal(scale=100, size=cls.shape) +
+                    1j*numpy.random.normal(scale=100, size=cls.shape)).astype(numpy.complex64)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def test_round_trip(self):
+        file_name = os.path.join(self.temp_directory, 'test.sio')
+        amp_table = numpy.linspace(0, 400, 256)
+        for pixel_type, tolerance in [('RE32F_IM32F', 0), ('RE16I_IM16I', 0.71), ('AMP8I_PHS8I', 5.)]:
+            sicd_meta = SICDType(ImageData={
+                'PixelType': pixel_type, 'NumRows': self.shape[0], 'NumCols': self.shape[1],
+                'FirstRow': 0, 'FirstCol': 0, 'FullImage': {'NumRows': self.shape[0], 'NumCols': self.shape[1]},
+                'AmpTable': amp_table if pixel_type == 'AMP8I_PHS8I' else None})
+            for threads in [1, 3]:
+                with self.subTest(pixel_type=pixel_type, threads=threads):
+                    writer = SIOWriter(file_name, sicd_meta, threads=threads)
+                    writer(self.data[:10, :], start_indices=(0, 0))
+                    writer(self.data[10:, :], start_indices=(10, 0))
+                    writer.close()
+                    del writer
+
+                    details = SIODetails(file_name)
+                    self.assertEqual(details.pixel_type, pixel_type)
+                    reader = SIOReader(details)
+                    self.assertEqual(reader.sicd_meta.ImageData.PixelType, pixel_type)
+                    self.assertLessEqual(numpy.max(numpy.abs(reader[:, :] - self.data)), tolerance)
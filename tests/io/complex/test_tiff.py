@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+
+import numpy
+
+from sarpy.io.complex.bip import BIPChipper
+from sarpy.io.complex.tiff import TiffDetails, TiffReader, NativeTiffChipper, TiledTiffChipper, \
+    _lzw_decode, _packbits_decode
+
+from . import unittest
+
+
+def lzw_encode(data):
+    """
+    TIFF style LZW encoding, with the code width changing one code early.
+    """
+
+    out_codes = [(256, 9)]
+    table = dict((bytes(bytearray([i])), i) for i in range(256))
+    next_code, code_length = 258, 9
+    current = b''
+    for value in bytearray(data):
+        candidate = current + bytes(bytearray([value]))
+        if candidate in table:
+            current = candidate
+            continue
+        out_codes.append((table[current], code_length))
+        table[candidate] = next_code
+        next_code += 1
+        if next_code == 4094:
+            out_codes.append((256, code_length))
+            table = dict((bytes(bytearray([i])), i) for i in range(256))
+            next_code, code_length = 258, 9
+        elif next_code > (1 << code_length) - 1:
+            code_length += 1
+        current = bytes(bytearray([value]))
+    if len(current) > 0:
+        out_codes.append((table[current], code_length))
+        next_code += 1
+        if next_code > (1 << code_length) - 1 and code_length < 12:
+            code_length += 1
+    out_codes.append((257, code_length))
+
+    out = bytearray()
+    bit_buffer, bit_count = 0, 0
+    for code, length in out_codes:
+        bit_buffer = (bit_buffer << length) | code
+        bit_count += length
+        while bit_count >= 8:
+            bit_count -= 8
+            out.append((bit_buffer >> bit_count) & 0xFF)
+    if bit_count > 0:
+        out.append((bit_buffer << (8 - bit_count)) & 0xFF)
+    return bytes(out)
+
+
+def packbits_encode(data):
+    """
+    PackBits encoding, using runs for repeated bytes and literals otherwise.
+    """
+
+    source = bytearray(data)
+    out = bytearray()
+    index = 0
+    while index < len(source):
+        run = 1
+        while index + run < len(source) and run < 128 and source[index + run] == source[index]:
+            run += 1
+        if run > 1:
+            out.append(257 - run)
+            out.append(source[index])
+            index += run
+        else:
+            stop = index + 1
+            while stop < len(source) and stop - index < 128 and \
+                    (stop + 1 >= len(source) or source[stop] != source[stop + 1]):
+                stop += 1
+            out.append(stop - index - 1)
+            out += source[index:stop]
+            index = stop
+    # include a no-op header, which must be ignored
+    out.append(128)
+    return bytes(out)
+
+
+_COMPRESSORS = {5: lzw_encode, 8: zlib.compress, 32773: packbits_encode, 32946: zlib.compress}
+
+
+def write_tiff(file_name, data, block_shape=None, tiled=False, endian='<', sample_format=1, shuffle=True,
+               compression=1, predictor=1):
+    """
+    Writes a minimal tiff file containing the data of shape (rows, cols, samples),
+    with the strips or tiles stored in a shuffled order. A `compression` of `None`
+    omits the Compression tag, which then defaults to no compression.
+    """
+
+    rows, cols, samples = data.shape
+    data = data.astype(data.dtype.newbyteorder(endian))
+    if block_shape is None:
+        block_shape = (rows, cols)
+    if not tiled:
+        block_shape = (block_shape[0], cols)
+    grid = ((rows + block_shape[0] - 1)//block_shape[0], (cols + block_shape[1] - 1)//block_shape[1])
+    blocks = []
+    for i in range(grid[0]):
+        for j in range(grid[1]):
+            block = data[i*block_shape[0]:(i+1)*block_shape[0], j*block_shape[1]:(j+1)*block_shape[1]]
+            if tiled:
+                # tiles are padded to full size
+                padded = numpy.zeros(block_shape + (samples, ), dtype=data.dtype)
+                padded[:block.shape[0], :block.shape[1]] = block
+                block = padded
+            if predictor == 2:
+                native = block.astype(block.dtype.newbyteorder('='))
+                differenced = native.copy()
+                differenced[:, 1:] = native[:, 1:] - native[:, :-1]
+                block = differenced.astype(data.dtype)
+            block = block.tobytes()
+            if compression not in [None, 1]:
+                block = _COMPRESSORS[compression](block)
+            blocks.append(block)
+
+    order = numpy.arange(len(blocks))
+    if shuffle:
+        order = numpy.random.RandomState(1).permutation(len(blocks))
+    offsets = numpy.zeros((len(blocks), ), dtype=numpy.int64)
+    position = 8
+    body = b''
+    for index in order:
+        # leave a gap between the blocks
+        body += b'\x00'*3
+        position += 3
+        offsets[index] = position
+        body += blocks[index]
+        position += len(blocks[index])
+
+    if sample_format in [5, 6]:
+        bits, samples_tag = 8*2*data.dtype.itemsize, samples//2
+    else:
+        bits, samples_tag = 8*data.dtype.itemsize, samples
+    entries = [
+        (256, 4, [cols, ]), (257, 4, [rows, ]), (258, 3, [bits, ]), (259, 3, [compression, ]),
+        (277, 3, [samples_tag, ]), (284, 3, [1, ]), (317, 3, [predictor, ]), (339, 3, [sample_format, ])]
+    if compression is None:
+        entries = [entry for entry in entries if entry[0] != 259]
+    if tiled:
+        entries.extend([
+            (322, 4, [block_shape[1], ]), (323, 4, [block_shape[0], ]),
+            (324, 4, offsets.tolist()), (325, 4, [len(entry) for entry in blocks])])
+    else:
+        entries.extend([
+            (273, 4, offsets.tolist()), (278, 4, [block_shape[0], ]), (279, 4, [len(entry) for entry in blocks])])
+    entries = sorted(entries)
+
+    ifd_offset = position
+    extra_offset = ifd_offset + 2 + 12*len(entries) + 4
+    ifd = struct.pack('{}H'.format(endian), len(entries))
+    extra = b''
+    for tag, tiff_type, values in entries:
+        fmt = {3: 'H', 4: 'I'}[tiff_type]
+        value_bytes = struct.pack('{}{}{}'.format(endian, len(values), fmt), *values)
+        if len(value_bytes) <= 4:
+            value_bytes += b'\x00'*(4 - len(value_bytes))
+            ifd += struct.pack('{}HHI'.format(endian), tag, tiff_type, len(values)) + value_bytes
+        else:
+            ifd += struct.pack('{}HHII'.format(endian), tag, tiff_type, len(values), extra_offset + len(extra))
+            extra += value_bytes
+    ifd += struct.pack('{}I'.format(endian), 0)
+    with open(file_name, 'wb') as fi:
+        fi.write((b'II' if endian == '<' else b'MM') + struct.pack('{}HI'.format(endian), 42, ifd_offset))
+        fi.write(body)
+        fi.write(ifd)
+        fi.write(extra)
+
+
+class TestTiledTiffChipper(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_directory = tempfile.mkdtemp()
+        cls.shape = (45, 37)
+        cls.data = numpy.reshape(numpy.arange(2*cls.shape[0]*cls.shape[1], dtype='>i2'), cls.shape + (2, ))
+        cls.bip_file_name = os.path.join(cls.temp_directory, 'test.bip')
+        cls.data.tofile(cls.bip_file_name)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_directory)
+
+    def check_reads(self, chipper, symmetry):
+        reference = BIPChipper(self.bip_file_name, '>i2', self.shape, symmetry=symmetry, complex_type=True)
+        for range1, range2 in [
+                (None, None),
+                ((3, 20, 1), (2, 20, 3)),
+                ((20, 0, -3), (30, 1, -4)),
+                ((0, 30, 9), None),
+                ((5, 6, 1), (7, 8, 1))]:
+            with self.subTest(symmetry=symmetry, range1=range1, range2=range2):
+                self.assertTrue(numpy.all(chipper(range1, range2) == reference(range1, range2)))
+
+    def test_layouts(self):
+        file_name = os.path.join(self.temp_directory, 'test.tif')
+        for tiled, block_shape, endian, sample_format, compression in [
+                (False, (7, None), '<', 2, 1),
+                (False, (45, None), '>', 2, 1),
+                (True, (16, 16), '<', 5, 1),
+                (True, (8, 32), '>', 2, 1),
+                (False, (7, None), '<', 2, None),
+                (False, (45, None), '<', 2, None),
+                (True, (16, 16), '>', 2, None)]:
+            write_tiff(file_name, self.data, block_shape=block_shape, tiled=tiled,
+                       endian=endian, sample_format=sample_format, compression=compression)
+            details = TiffDetails(file_name)
+            if compression is None:
+                self.assertNotIn('Compression', details.tags)
+            for symmetry in [(False, False, False), (True, False, True), (False, True, True)]:
+                with self.subTest(tiled=tiled, block_shape=block_shape, endian=endian, compression=compression):
+                    reader = TiffReader(details, symmetry=symmetry)
+                    chipper = reader._chipper
+                    if block_shape[0] == self.shape[0]:
+                        # a single strip is contiguous
+                        self.assertIsInstance(chipper, NativeTiffChipper)
+                    else:
+                        self.assertIsInstance(chipper, TiledTiffChipper)
+                    self.check_reads(chipper, symmetry)
+                    del reader, chipper
+
+    def test_compression(self):
+        file_name = os.path.join(self.temp_directory, 'compressed.tif')
+        for compression in [5, 8, 32773, 32946]:
+            for tiled, block_shape, endian, predictor in [
+                    (False, (7, None), '<', 1),
+                    (False, (45, None), '>', 2),
+                    (True, (16, 16), '>', 1),
+                    (True, (8, 32), '<', 2)]:
+                write_tiff(file_name, self.data, block_shape=block_shape, tiled=tiled,
+                           endian=endian, sample_format=2, compression=compression, predictor=predictor)
+                details = TiffDetails(file_name)
+                for threads in [1, 3]:
+                    symmetry = (False, True, True)
+                    with self.subTest(compression=compression, tiled=tiled, predictor=predictor, threads=threads):
+                        reader = TiffReader(details, symmetry=symmetry, threads=threads)
+                        chipper = reader._chipper
+                        self.assertIsInstance(chipper, TiledTiffChipper)
+                        self.assertEqual(chipper.compression, compression)
+                        self.check_reads(chipper, symmetry)
+                        self.assertGreater(chipper.decoded_blocks.hits, 0)
+                        self.assertEqual(chipper.decoded_blocks.misses, len(chipper._block_offsets))
+                        del reader, chipper
+
+    def test_codecs(self):
+        data = bytes(bytearray(numpy.random.RandomState(0).randint(0, 4, size=20000).astype(numpy.uint8)))
+        data += b'\x07'*300 + b'ab'*200
+        # enough codes to require the table to be cleared
+        self.assertEqual(_lzw_decode(lzw_encode(data)), data)
+        self.assertEqual(_lzw_decode(lzw_encode(b'')), b'')
+        self.assertEqual(_packbits_decode(packbits_encode(data)), data)